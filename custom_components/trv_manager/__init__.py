@@ -1,37 +1,114 @@
 """The TRV Manager integration."""
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
+from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_NAME, Platform
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers import device_registry as dr
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv, device_registry as dr
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.start import async_at_started
+from homeassistant.helpers.typing import ConfigType
 
 from .const import (
+    CONF_COALESCE_WINDOW,
+    CONF_COMMAND_INTERVAL,
+    CONF_COMBINED_DIAGNOSTICS,
+    CONF_COMMAND_JITTER,
+    CONF_DAILY_TRAVEL_BUDGET,
     CONF_DEVICE_ID,
     CONF_DEVICE_NAME,
     CONF_DEVICES,
+    CONF_FEEDFORWARD_GAIN,
+    CONF_FORECAST_ENTITY,
     CONF_I_GAIN,
+    CONF_MAX_DT,
+    CONF_OUTDOOR_TEMP_ENTITY,
     CONF_P_GAIN,
+    CONF_PREHEAT_COMFORT_TEMP,
+    CONF_PREHEAT_SCHEDULE_ENTITY,
+    CONF_REFERENCE_FILTER,
     CONF_REFERENCE_TEMP_ENTITY,
+    CONF_SENSOR_MAX_AGE,
+    CONF_SETPOINT_MIN_DELTA,
+    CONF_SENSOR_MIN_INTERVAL,
+    CONF_SETPOINT_REFRESH_INTERVAL,
+    CONF_STATE_MAX_AGE,
     CONF_TARGET_TEMP_ENTITY,
+    CONF_TRACE,
     CONF_TRV_ENTITY,
     CONF_TRV_DWELL_TIME,
+    CONF_TRV_TEMP_FILTER,
     CONF_VALVE_POSITION_ENTITY,
     CONF_VALVE_STEP,
+    CONF_VALVE_UPDATE_INTERVAL,
+    DEFAULT_COALESCE_WINDOW,
+    DEFAULT_COMBINED_DIAGNOSTICS,
+    DEFAULT_COMMAND_INTERVAL,
+    DEFAULT_COMMAND_JITTER,
+    DEFAULT_DAILY_TRAVEL_BUDGET,
+    DEFAULT_FEEDFORWARD_GAIN,
+    DEFAULT_FILTER,
     DEFAULT_I_GAIN,
+    DEFAULT_MAX_DT,
     DEFAULT_P_GAIN,
+    DEFAULT_PREHEAT_COMFORT_TEMP,
+    DEFAULT_SENSOR_MAX_AGE,
+    DEFAULT_SENSOR_MIN_INTERVAL,
+    DEFAULT_SETPOINT_MIN_DELTA,
+    DEFAULT_SETPOINT_REFRESH_INTERVAL,
+    DEFAULT_STATE_MAX_AGE,
+    DEFAULT_TRACE,
     DEFAULT_TRV_DWELL_TIME,
     DEFAULT_VALVE_STEP,
+    DEFAULT_VALVE_UPDATE_INTERVAL,
     DOMAIN,
+    SIGNAL_DEVICE_ADDED,
+    SIGNAL_SETTINGS_UPDATED,
+    STARTUP_PARALLELISM,
 )
 from .coordinator import TRVManagerCoordinator
+from .hub import TRVManagerHub
+from .metrics import TRVManagerMetricsView
+from .services import async_setup_services
+from .storage import TRVManagerStateStore
+from .ticker import async_remove_valve_ticker
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS: list[Platform] = [Platform.NUMBER, Platform.SENSOR]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+# Device settings that bind a coordinator (and its entities) to entities;
+# changing them recreates the device instead of updating it in place
+DEVICE_BINDING_KEYS = (CONF_TRV_ENTITY, CONF_VALVE_POSITION_ENTITY)
+
+# Hub settings that require a full reload when changed
+HUB_RELOAD_KEYS = (
+    CONF_REFERENCE_TEMP_ENTITY,
+    CONF_TARGET_TEMP_ENTITY,
+    CONF_OUTDOOR_TEMP_ENTITY,
+    CONF_FORECAST_ENTITY,
+    CONF_PREHEAT_SCHEDULE_ENTITY,
+    CONF_PREHEAT_COMFORT_TEMP,
+    CONF_SENSOR_MIN_INTERVAL,
+    CONF_COMBINED_DIAGNOSTICS,
+    CONF_REFERENCE_FILTER,
+    CONF_SENSOR_MAX_AGE,
+)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the TRV Manager services and metrics endpoint."""
+    async_setup_services(hass)
+    hass.http.register_view(TRVManagerMetricsView())
+    return True
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up TRV Manager from a config entry."""
@@ -40,6 +117,12 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # Get hub configuration (shared by all devices)
     reference_temp_entity = entry.data[CONF_REFERENCE_TEMP_ENTITY]
     target_temp_entity = entry.data[CONF_TARGET_TEMP_ENTITY]
+    outdoor_temp_entity = entry.data.get(CONF_OUTDOOR_TEMP_ENTITY)
+    forecast_entity = entry.data.get(CONF_FORECAST_ENTITY)
+    preheat_schedule_entity = entry.data.get(CONF_PREHEAT_SCHEDULE_ENTITY)
+    preheat_comfort_temp = entry.data.get(
+        CONF_PREHEAT_COMFORT_TEMP, DEFAULT_PREHEAT_COMFORT_TEMP
+    )
     devices_config = entry.data.get(CONF_DEVICES, [])
 
     if not devices_config:
@@ -56,103 +139,346 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         model="Hub",
     )
 
-    # Store hub info and coordinators
-    coordinators = {}
-
-    # Create a coordinator for each device
-    for device_config in devices_config:
-        device_id = device_config[CONF_DEVICE_ID]
-        device_name = device_config[CONF_DEVICE_NAME]
-        trv_entity = device_config[CONF_TRV_ENTITY]
-        valve_position_entity = device_config.get(CONF_VALVE_POSITION_ENTITY)
-        
-        # Get device-specific settings with defaults
-        p_gain = device_config.get(CONF_P_GAIN, DEFAULT_P_GAIN)
-        i_gain = device_config.get(CONF_I_GAIN, DEFAULT_I_GAIN)
-        trv_dwell_time = device_config.get(CONF_TRV_DWELL_TIME, DEFAULT_TRV_DWELL_TIME)
-        valve_step = device_config.get(CONF_VALVE_STEP, DEFAULT_VALVE_STEP)
-
-        # Create coordinator for this device
-        coordinator = TRVManagerCoordinator(
-            hass,
-            entry.entry_id,
-            device_id,
-            trv_entity,
-            reference_temp_entity,
-            target_temp_entity,
-            valve_position_entity,
-            p_gain,
-            i_gain,
-            trv_dwell_time,
-            valve_step,
-        )
-
-        # Set up the coordinator
-        await coordinator.async_setup()
-
-        # Store coordinator
-        coordinators[device_id] = {
-            "coordinator": coordinator,
-            "device_name": device_name,
-            "trv_entity": trv_entity,
-        }
-
-        # Create device in device registry
-        device_registry.async_get_or_create(
-            config_entry_id=entry.entry_id,
-            identifiers={(DOMAIN, f"{entry.entry_id}_{device_id}")},
-            name=device_name,
-            manufacturer="TRV Manager",
-            model="TRV Controller",
-            via_device=(DOMAIN, entry.entry_id),  # Link to hub
-        )
+    # Controller state saved by the previous run
+    state_store = TRVManagerStateStore(
+        hass,
+        entry.entry_id,
+        entry.data.get(CONF_STATE_MAX_AGE, DEFAULT_STATE_MAX_AGE) * 60,
+    )
+    await state_store.async_load()
 
-        _LOGGER.info(
-            "TRV Manager device initialized: %s (TRV: %s)",
-            device_name,
-            trv_entity,
-        )
+    # Shared inputs are subscribed to and parsed once for the whole hub
+    hub = TRVManagerHub(
+        hass,
+        reference_temp_entity,
+        target_temp_entity,
+        entry.data.get(CONF_COMMAND_INTERVAL, DEFAULT_COMMAND_INTERVAL),
+        entry.data.get(CONF_COMMAND_JITTER, DEFAULT_COMMAND_JITTER),
+        state_store,
+        outdoor_temp_entity,
+        forecast_entity,
+        preheat_schedule_entity,
+        preheat_comfort_temp,
+        entry.data.get(CONF_REFERENCE_FILTER, DEFAULT_FILTER),
+        entry.data.get(CONF_SENSOR_MAX_AGE, DEFAULT_SENSOR_MAX_AGE),
+    )
+    hub.async_setup()
 
-    # Store data
-    hass.data[DOMAIN][entry.entry_id] = {
+    # Store hub info and coordinators
+    entry_data = hass.data[DOMAIN][entry.entry_id] = {
         "hub_name": entry.data[CONF_NAME],
         "reference_temp_entity": reference_temp_entity,
         "target_temp_entity": target_temp_entity,
-        "coordinators": coordinators,
+        "outdoor_temp_entity": outdoor_temp_entity,
+        "forecast_entity": forecast_entity,
+        "preheat_schedule_entity": preheat_schedule_entity,
+        "preheat_comfort_temp": preheat_comfort_temp,
+        # Diagnostic sensor throttling, read by the sensor platform
+        "sensor_min_interval": entry.data.get(
+            CONF_SENSOR_MIN_INTERVAL, DEFAULT_SENSOR_MIN_INTERVAL
+        ),
+        "combined_diagnostics": entry.data.get(
+            CONF_COMBINED_DIAGNOSTICS, DEFAULT_COMBINED_DIAGNOSTICS
+        ),
+        # Hub settings as configured, to tell which changes need a reload
+        "hub_config": {key: entry.data.get(key) for key in HUB_RELOAD_KEYS},
+        "hub": hub,
+        "coordinators": {},
+        "devices_config": {},
+        "entities": {},  # Entities per device, filled in by the platforms
+        "relay_tuners": {},  # Running relay tuning experiments per device
     }
 
+    # Create a coordinator for each device
+    for device_config in devices_config:
+        _async_setup_device(hass, entry, device_config)
+
     # Set up platforms
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    # Start control once Home Assistant has started, without holding up
+    # entity creation or startup on TRV round-trips
+    _async_start_when_ready(hass, entry, list(entry_data["coordinators"].values()))
+
     # Register update listener for config changes
     entry.async_on_unload(entry.add_update_listener(async_reload_entry))
 
     _LOGGER.info(
         "TRV Manager hub '%s' initialized with %d device(s)",
         entry.data[CONF_NAME],
-        len(coordinators),
+        len(entry_data["coordinators"]),
     )
 
     return True
 
 
+@callback
+def _async_setup_device(
+    hass: HomeAssistant, entry: ConfigEntry, device_config: dict[str, Any]
+) -> dict[str, Any]:
+    """Create the coordinator and registry device for one TRV device."""
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    hub: TRVManagerHub = entry_data["hub"]
+
+    device_id = device_config[CONF_DEVICE_ID]
+    device_name = device_config[CONF_DEVICE_NAME]
+    trv_entity = device_config[CONF_TRV_ENTITY]
+    valve_position_entity = device_config.get(CONF_VALVE_POSITION_ENTITY)
+
+    # Get device-specific settings with defaults
+    p_gain = device_config.get(CONF_P_GAIN, DEFAULT_P_GAIN)
+    i_gain = device_config.get(CONF_I_GAIN, DEFAULT_I_GAIN)
+    trv_dwell_time = device_config.get(CONF_TRV_DWELL_TIME, DEFAULT_TRV_DWELL_TIME)
+    valve_step = device_config.get(CONF_VALVE_STEP, DEFAULT_VALVE_STEP)
+    coalesce_window = device_config.get(CONF_COALESCE_WINDOW, DEFAULT_COALESCE_WINDOW)
+    setpoint_min_delta = device_config.get(CONF_SETPOINT_MIN_DELTA, DEFAULT_SETPOINT_MIN_DELTA)
+    setpoint_refresh_interval = device_config.get(
+        CONF_SETPOINT_REFRESH_INTERVAL, DEFAULT_SETPOINT_REFRESH_INTERVAL
+    )
+    valve_update_interval = device_config.get(
+        CONF_VALVE_UPDATE_INTERVAL, DEFAULT_VALVE_UPDATE_INTERVAL
+    )
+    feedforward_gain = device_config.get(CONF_FEEDFORWARD_GAIN, DEFAULT_FEEDFORWARD_GAIN)
+    trace = device_config.get(CONF_TRACE, DEFAULT_TRACE)
+    max_dt = device_config.get(CONF_MAX_DT, DEFAULT_MAX_DT)
+    daily_travel_budget = device_config.get(
+        CONF_DAILY_TRAVEL_BUDGET, DEFAULT_DAILY_TRAVEL_BUDGET
+    )
+    trv_temp_filter = device_config.get(CONF_TRV_TEMP_FILTER, DEFAULT_FILTER)
+
+    # Create coordinator for this device
+    coordinator = TRVManagerCoordinator(
+        hass,
+        entry.entry_id,
+        device_id,
+        hub,
+        trv_entity,
+        valve_position_entity,
+        p_gain,
+        i_gain,
+        trv_dwell_time,
+        valve_step,
+        coalesce_window,
+        setpoint_min_delta,
+        setpoint_refresh_interval,
+        valve_update_interval,
+        feedforward_gain,
+        trace,
+        max_dt,
+        daily_travel_budget,
+        trv_temp_filter,
+    )
+
+    # Restore the PI state and include the device in state saves
+    state_store = hub.state_store
+    if (saved_state := state_store.pop_state(device_id)) is not None:
+        coordinator.async_restore_state(saved_state)
+    state_store.async_register(device_id, coordinator)
+
+    # Set up listeners; the first control pass waits for HA to start
+    coordinator.async_setup()
+
+    # Store coordinator
+    device_data = entry_data["coordinators"][device_id] = {
+        "coordinator": coordinator,
+        "device_name": device_name,
+        "trv_entity": trv_entity,
+    }
+    entry_data["devices_config"][device_id] = dict(device_config)
+
+    # Create device in device registry
+    dr.async_get(hass).async_get_or_create(
+        config_entry_id=entry.entry_id,
+        identifiers={(DOMAIN, f"{entry.entry_id}_{device_id}")},
+        name=device_name,
+        manufacturer="TRV Manager",
+        model="TRV Controller",
+        via_device=(DOMAIN, entry.entry_id),  # Link to hub
+    )
+
+    _LOGGER.info(
+        "TRV Manager device initialized: %s (TRV: %s)",
+        device_name,
+        trv_entity,
+    )
+
+    return device_data
+
+
+async def _async_unload_device(
+    hass: HomeAssistant, entry: ConfigEntry, device_id: str
+) -> None:
+    """Remove the entities and coordinator of one TRV device."""
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+
+    if (tuner := entry_data["relay_tuners"].get(device_id)) is not None:
+        await tuner.async_cancel()
+
+    for entity in entry_data["entities"].pop(device_id, []):
+        # Entities disabled in the registry were never added to Home Assistant
+        if entity.hass is not None:
+            await entity.async_remove(force_remove=True)
+
+    device_data = entry_data["coordinators"].pop(device_id)
+    await device_data["coordinator"].async_shutdown()
+    entry_data["hub"].state_store.async_unregister(device_id)
+    entry_data["devices_config"].pop(device_id, None)
+
+
+@callback
+def _async_start_when_ready(
+    hass: HomeAssistant, entry: ConfigEntry, devices: list[dict[str, Any]]
+) -> None:
+    """Start the given devices once Home Assistant has started."""
+
+    @callback
+    def _async_start_control(_hass: HomeAssistant) -> None:
+        entry.async_create_background_task(
+            hass,
+            _async_start_coordinators(entry, devices),
+            f"{DOMAIN} start {entry.title}",
+        )
+
+    entry.async_on_unload(async_at_started(hass, _async_start_control))
+
+
+async def _async_start_coordinators(
+    entry: ConfigEntry, devices: list[dict]
+) -> None:
+    """Run the first control pass of each device with bounded parallelism."""
+    semaphore = asyncio.Semaphore(STARTUP_PARALLELISM)
+    start = time.monotonic()
+
+    async def _async_start(device_data: dict) -> None:
+        async with semaphore:
+            elapsed = await device_data["coordinator"].async_start()
+        _LOGGER.info(
+            "TRV Manager device started: %s (first control pass took %.2fs)",
+            device_data["device_name"],
+            elapsed,
+        )
+
+    await asyncio.gather(*(_async_start(device_data) for device_data in devices))
+
+    _LOGGER.info(
+        "TRV Manager hub '%s' started %d device(s) in %.2fs",
+        entry.title,
+        len(devices),
+        time.monotonic() - start,
+    )
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     # Unload platforms
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        # Shutdown all coordinators
+        # Stop tuning experiments, then shutdown all coordinators
         entry_data = hass.data[DOMAIN][entry.entry_id]
+        for tuner in list(entry_data["relay_tuners"].values()):
+            await tuner.async_cancel()
         for device_id, device_data in entry_data["coordinators"].items():
             coordinator: TRVManagerCoordinator = device_data["coordinator"]
             await coordinator.async_shutdown()
 
+        entry_data["hub"].async_shutdown()
+
+        # Keep the final controller state for the next setup
+        await entry_data["hub"].state_store.async_save()
+
         # Remove data
         hass.data[DOMAIN].pop(entry.entry_id)
+        if not hass.data[DOMAIN]:
+            async_remove_valve_ticker(hass)
 
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete the saved controller state of a removed hub."""
+    await TRVManagerStateStore(hass, entry.entry_id, 0).async_remove()
+
+
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Reload config entry when configuration changes."""
-    await async_unload_entry(hass, entry)
-    await async_setup_entry(hass, entry)
+    """Apply configuration changes.
+
+    Device changes are applied incrementally: only added, removed or
+    rebound devices are torn down or created, and changed settings are
+    applied in place so unaffected controllers keep their state and TRVs
+    are not sent fresh commands.
+    """
+    entry_data = hass.data[DOMAIN].get(entry.entry_id)
+    if entry_data is None or any(
+        entry.data.get(key) != entry_data["hub_config"].get(key)
+        for key in HUB_RELOAD_KEYS
+    ):
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+
+    hub: TRVManagerHub = entry_data["hub"]
+    hub.scheduler.async_set_rate(
+        entry.data.get(CONF_COMMAND_INTERVAL, DEFAULT_COMMAND_INTERVAL),
+        entry.data.get(CONF_COMMAND_JITTER, DEFAULT_COMMAND_JITTER),
+    )
+
+    old_devices: dict[str, dict[str, Any]] = entry_data["devices_config"]
+    new_devices = {
+        device_config[CONF_DEVICE_ID]: device_config
+        for device_config in entry.data.get(CONF_DEVICES, [])
+    }
+    device_registry = dr.async_get(hass)
+    added: list[dict[str, Any]] = []
+
+    for device_id in set(old_devices) - set(new_devices):
+        await _async_unload_device(hass, entry, device_id)
+        if device := device_registry.async_get_device(
+            identifiers={(DOMAIN, f"{entry.entry_id}_{device_id}")}
+        ):
+            device_registry.async_update_device(
+                device.id, remove_config_entry_id=entry.entry_id
+            )
+        _LOGGER.info("TRV Manager device removed: %s", device_id)
+
+    for device_id, device_config in new_devices.items():
+        old_config = old_devices.get(device_id)
+
+        if old_config is None or any(
+            old_config.get(key) != device_config.get(key) for key in DEVICE_BINDING_KEYS
+        ):
+            # New device, or bound to other entities: (re)create it
+            if old_config is not None:
+                await _async_unload_device(hass, entry, device_id)
+            added.append(_async_setup_device(hass, entry, device_config))
+            async_dispatcher_send(
+                hass, SIGNAL_DEVICE_ADDED.format(entry.entry_id), device_id
+            )
+            continue
+
+        changed = {
+            key: value
+            for key, value in device_config.items()
+            if old_config.get(key) != value
+        }
+        if not changed:
+            continue
+
+        device_data = entry_data["coordinators"][device_id]
+        if CONF_DEVICE_NAME in changed:
+            device_data["device_name"] = changed[CONF_DEVICE_NAME]
+            if device := device_registry.async_get_device(
+                identifiers={(DOMAIN, f"{entry.entry_id}_{device_id}")}
+            ):
+                device_registry.async_update_device(
+                    device.id, name=changed[CONF_DEVICE_NAME]
+                )
+
+        device_data["coordinator"].async_update_settings(changed)
+        entry_data["devices_config"][device_id] = dict(device_config)
+        async_dispatcher_send(
+            hass, SIGNAL_SETTINGS_UPDATED.format(entry.entry_id, device_id)
+        )
+        _LOGGER.debug(
+            "TRV Manager device %s updated in place: %s", device_id, sorted(changed)
+        )
+
+    if added:
+        _async_start_when_ready(hass, entry, added)
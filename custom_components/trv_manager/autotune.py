@@ -0,0 +1,277 @@
+"""PI gain tuning from recorded history for TRV Manager."""
+from __future__ import annotations
+
+from bisect import bisect_right
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+import logging
+import math
+from typing import Any
+
+from homeassistant.components.recorder import get_instance, history
+from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN
+from homeassistant.core import HomeAssistant, State
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    AUTOTUNE_MAX_DEAD_TIME,
+    AUTOTUNE_MIN_SAMPLES,
+    AUTOTUNE_MIN_VALVE_SPREAD,
+    AUTOTUNE_SAMPLE_INTERVAL,
+    MAX_I_GAIN,
+    MAX_P_GAIN,
+    MIN_I_GAIN,
+    MIN_P_GAIN,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class AutotuneError(HomeAssistantError):
+    """The history does not allow a process model to be identified."""
+
+
+@dataclass
+class FOPDTModel:
+    """First order plus dead time model of a room heated through its valve."""
+
+    gain: float  # °C per % valve opening
+    time_constant: float  # Seconds
+    dead_time: float  # Seconds
+    rmse: float  # °C, one-step prediction error of the fit
+
+
+@dataclass
+class AutotuneResult:
+    """Recommended gains for a device."""
+
+    p_gain: float
+    i_gain: float
+    model: FOPDTModel
+    samples: int
+    tuned_at: datetime
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the result for service responses and diagnostics."""
+        return {
+            "p_gain": self.p_gain,
+            "i_gain": self.i_gain,
+            "model": asdict(self.model),
+            "samples": self.samples,
+            "tuned_at": self.tuned_at.isoformat(),
+        }
+
+
+def _valve_input(trv_state: State, valve_state: State) -> float | None:
+    """Return the effective valve opening, 0 while the TRV is not heating."""
+    try:
+        valve = float(valve_state.state)
+    except (ValueError, TypeError):
+        return None
+    # Idle TRVs close by themselves, whatever the valve limit says
+    if trv_state.attributes.get("hvac_action") == "idle":
+        return 0.0
+    return valve
+
+
+def _resample(
+    states: list[State], start: datetime, count: int, interval: float
+) -> list[State | None]:
+    """Return the state in effect at each sample time (zero-order hold)."""
+    changed = [state.last_updated for state in states]
+    samples: list[State | None] = []
+    for index in range(count):
+        position = bisect_right(changed, start + timedelta(seconds=index * interval))
+        state = states[position - 1] if position else None
+        if state is not None and state.state in (STATE_UNAVAILABLE, STATE_UNKNOWN):
+            state = None
+        samples.append(state)
+    return samples
+
+
+def _solve3(matrix: list[list[float]], vector: list[float]) -> list[float] | None:
+    """Solve a 3x3 linear system by Gaussian elimination."""
+    rows = [row[:] + [value] for row, value in zip(matrix, vector)]
+    for col in range(3):
+        pivot = max(range(col, 3), key=lambda row: abs(rows[row][col]))
+        if abs(rows[pivot][col]) < 1e-12:
+            return None
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        for row in range(col + 1, 3):
+            factor = rows[row][col] / rows[col][col]
+            for k in range(col, 4):
+                rows[row][k] -= factor * rows[col][k]
+    solution = [0.0] * 3
+    for row in (2, 1, 0):
+        solution[row] = (
+            rows[row][3] - sum(rows[row][k] * solution[k] for k in range(row + 1, 3))
+        ) / rows[row][row]
+    return solution
+
+
+def identify_fopdt(
+    valve: list[float | None],
+    temperature: list[float | None],
+    interval: float,
+    max_dead_time: float = AUTOTUNE_MAX_DEAD_TIME,
+) -> FOPDTModel:
+    """Fit a FOPDT model to sampled valve opening and room temperature.
+
+    For each candidate dead time d the discrete model
+    y[k+1] = a*y[k] + b*u[k-d] + c is fitted by least squares (c absorbs the
+    heat loss to a roughly constant outdoor temperature) and the dead time
+    with the smallest mean squared residual wins.
+    """
+    best: tuple[float, int, list[float]] | None = None
+
+    for delay in range(int(max_dead_time // interval) + 1):
+        # Normal equations of [y[k], u[k-d], 1] -> y[k+1]
+        ata = [[0.0] * 3 for _ in range(3)]
+        atb = [0.0] * 3
+        rows = 0
+        for k in range(delay, len(temperature) - 1):
+            y, y_next, u = temperature[k], temperature[k + 1], valve[k - delay]
+            if y is None or y_next is None or u is None:
+                continue
+            regressors = (y, u, 1.0)
+            for i in range(3):
+                atb[i] += regressors[i] * y_next
+                for j in range(3):
+                    ata[i][j] += regressors[i] * regressors[j]
+            rows += 1
+        if rows < AUTOTUNE_MIN_SAMPLES:
+            continue
+        if (solution := _solve3(ata, atb)) is None:
+            continue
+
+        # Residual sum of squares from the normal equations
+        yy = sum(
+            temperature[k + 1] ** 2  # type: ignore[operator]
+            for k in range(delay, len(temperature) - 1)
+            if None not in (temperature[k], temperature[k + 1], valve[k - delay])
+        )
+        mse = max(yy - sum(solution[i] * atb[i] for i in range(3)), 0.0) / rows
+        if best is None or mse < best[0]:
+            best = (mse, delay, solution)
+
+    if best is None:
+        raise AutotuneError("Not enough history to identify the room")
+
+    mse, delay, (a, b, _c) = best
+    if not 0.0 < a < 1.0 or b <= 0.0:
+        raise AutotuneError(
+            "The history does not show the room warming up when the valve opens"
+        )
+
+    return FOPDTModel(
+        gain=b / (1.0 - a),
+        time_constant=-interval / math.log(a),
+        dead_time=delay * interval,
+        rmse=math.sqrt(mse),
+    )
+
+
+def compute_pi_gains(model: FOPDTModel, interval: float) -> tuple[float, float]:
+    """Return (p_gain, i_gain) for a model using the SIMC tuning rules.
+
+    The closed loop time constant is set to the dead time (at least one
+    sample), the usual trade-off between speed and robustness. The I gain
+    is per degree-minute, matching the coordinator's integrator.
+    """
+    tau_c = max(model.dead_time, interval)
+    p_gain = model.time_constant / (model.gain * (tau_c + model.dead_time))
+    integral_time = min(model.time_constant, 4 * (tau_c + model.dead_time))
+    i_gain = p_gain / (integral_time / 60.0)
+
+    return (
+        round(max(MIN_P_GAIN, min(MAX_P_GAIN, p_gain)), 2),
+        round(max(MIN_I_GAIN, min(MAX_I_GAIN, i_gain)), 3),
+    )
+
+
+def tune_from_history(
+    history_states: dict[str, list[State]],
+    reference_temp_entity: str,
+    trv_entity: str,
+    valve_position_entity: str,
+    start: datetime,
+    end: datetime,
+) -> AutotuneResult:
+    """Identify a model from recorded states and return recommended gains.
+
+    CPU bound, run in the executor.
+    """
+    interval = AUTOTUNE_SAMPLE_INTERVAL
+    count = int((end - start).total_seconds() // interval)
+
+    references = _resample(
+        history_states.get(reference_temp_entity, []), start, count, interval
+    )
+    trvs = _resample(history_states.get(trv_entity, []), start, count, interval)
+    valves = _resample(
+        history_states.get(valve_position_entity, []), start, count, interval
+    )
+
+    temperature: list[float | None] = []
+    valve: list[float | None] = []
+    for reference_state, trv_state, valve_state in zip(references, trvs, valves):
+        try:
+            temperature.append(float(reference_state.state) if reference_state else None)
+        except ValueError:
+            temperature.append(None)
+        valve.append(
+            _valve_input(trv_state, valve_state) if trv_state and valve_state else None
+        )
+
+    openings = [value for value in valve if value is not None]
+    if len(openings) < AUTOTUNE_MIN_SAMPLES:
+        raise AutotuneError("Not enough history to identify the room")
+    if max(openings) - min(openings) < AUTOTUNE_MIN_VALVE_SPREAD:
+        raise AutotuneError("The valve barely moved in the selected history")
+
+    model = identify_fopdt(valve, temperature, interval)
+    p_gain, i_gain = compute_pi_gains(model, interval)
+    _LOGGER.debug(
+        "Auto-tune of %s: K=%f °C/%%, tau=%fs, theta=%fs, rmse=%f -> P=%f, I=%f",
+        trv_entity, model.gain, model.time_constant, model.dead_time, model.rmse,
+        p_gain, i_gain,
+    )
+
+    return AutotuneResult(p_gain, i_gain, model, len(openings), dt_util.utcnow())
+
+
+async def async_autotune(
+    hass: HomeAssistant,
+    reference_temp_entity: str,
+    trv_entity: str,
+    valve_position_entity: str,
+    days: float,
+) -> AutotuneResult:
+    """Read the recorder history of a device and recommend PI gains."""
+    end = dt_util.utcnow()
+    start = end - timedelta(days=days)
+    entity_ids = [reference_temp_entity, trv_entity, valve_position_entity]
+
+    history_states: dict[str, list[State]] = await get_instance(
+        hass
+    ).async_add_executor_job(
+        lambda: history.get_significant_states(
+            hass,
+            start,
+            end,
+            entity_ids,
+            include_start_time_state=True,
+            significant_changes_only=False,
+        )
+    )
+
+    return await hass.async_add_executor_job(
+        tune_from_history,
+        history_states,
+        reference_temp_entity,
+        trv_entity,
+        valve_position_entity,
+        start,
+        end,
+    )
@@ -0,0 +1,136 @@
+"""Valve actuation and battery budget accounting for TRV Manager."""
+from __future__ import annotations
+
+from array import array
+from collections.abc import Callable
+from typing import Any
+
+from .const import (
+    BUDGET_ADAPT_FROM,
+    BUDGET_BUCKET_SECONDS,
+    BUDGET_BUCKETS,
+    COMMAND_BATTERY_COST,
+    MAX_STEP_FACTOR,
+    TRAVEL_BATTERY_COST,
+)
+
+
+class ActuationBudget:
+    """Rolling accounting of valve travel, commands and battery cost.
+
+    Every radio command and every percent the valve motor moves costs
+    battery. Travel and commands are summed into hourly buckets of a ring
+    covering the last 24 hours, so recording is O(1) and the windows cost
+    nothing to maintain. The battery cost is an estimate in command
+    equivalents: one radio command, plus the motor travel weighted by
+    TRAVEL_BATTERY_COST.
+
+    With a daily travel budget set, step_factor() widens the valve step
+    (and with it the hysteresis band) once more than BUDGET_ADAPT_FROM of
+    the budget was used in the last 24 hours, up to MAX_STEP_FACTOR times
+    the configured step when the budget is used up.
+    """
+
+    def __init__(self, daily_travel_budget: float, clock: Callable[[], float]) -> None:
+        """Initialize the budget.
+
+        Args:
+            daily_travel_budget: Valve travel (%) allowed per 24 hours (0 = unlimited)
+            clock: Monotonic time source in seconds
+        """
+        self.daily_travel_budget = daily_travel_budget
+        self._clock = clock
+        self._travel = array("f", bytes(4 * BUDGET_BUCKETS))
+        self._commands = array("L", bytes(array("L").itemsize * BUDGET_BUCKETS))
+        self._bucket = int(clock() // BUDGET_BUCKET_SECONDS)
+
+        # Since start, for metrics
+        self.total_travel = 0.0
+        self.total_commands = 0
+
+    def _advance(self) -> int:
+        """Clear the buckets the clock moved past and return the current index."""
+        bucket = int(self._clock() // BUDGET_BUCKET_SECONDS)
+        if (passed := bucket - self._bucket) > 0:
+            for offset in range(1, min(passed, BUDGET_BUCKETS) + 1):
+                index = (self._bucket + offset) % BUDGET_BUCKETS
+                self._travel[index] = 0.0
+                self._commands[index] = 0
+            self._bucket = bucket
+        return bucket % BUDGET_BUCKETS
+
+    def record_command(self, travel: float = 0.0) -> None:
+        """Account for a command sent, moving the valve by travel percent."""
+        index = self._advance()
+        self._travel[index] += travel
+        self._commands[index] += 1
+        self.total_travel += travel
+        self.total_commands += 1
+
+    def _window(self, hours: int) -> list[int]:
+        """Return the bucket indices of the last hours (the current one included)."""
+        index = self._advance()
+        return [(index - offset) % BUDGET_BUCKETS for offset in range(hours)]
+
+    def travel(self, hours: int = BUDGET_BUCKETS) -> float:
+        """Return the valve travel (%) over the last hours."""
+        return sum(self._travel[index] for index in self._window(hours))
+
+    def commands(self, hours: int = BUDGET_BUCKETS) -> int:
+        """Return the number of commands over the last hours."""
+        return sum(self._commands[index] for index in self._window(hours))
+
+    def battery_cost(self, hours: int = BUDGET_BUCKETS) -> float:
+        """Return the estimated battery cost (command equivalents) over the last hours."""
+        return (
+            self.commands(hours) * COMMAND_BATTERY_COST
+            + self.travel(hours) * TRAVEL_BATTERY_COST
+        )
+
+    def step_factor(self) -> float:
+        """Return how much to widen the valve step to stay within the budget."""
+        if not self.daily_travel_budget:
+            return 1.0
+        used = self.travel() / self.daily_travel_budget
+        if used <= BUDGET_ADAPT_FROM:
+            return 1.0
+        return min(
+            MAX_STEP_FACTOR,
+            1.0 + (used - BUDGET_ADAPT_FROM) / (1.0 - BUDGET_ADAPT_FROM) * (MAX_STEP_FACTOR - 1.0),
+        )
+
+    def get_state(self) -> dict[str, Any]:
+        """Return the buckets worth keeping across restarts, oldest first."""
+        window = list(reversed(self._window(BUDGET_BUCKETS)))
+        return {
+            "travel": [round(self._travel[index], 2) for index in window],
+            "commands": [self._commands[index] for index in window],
+        }
+
+    def restore_state(self, state: dict[str, Any], age: float) -> None:
+        """Restore buckets saved age seconds ago."""
+        shift = int(age // BUDGET_BUCKET_SECONDS)
+        travel = [float(value) for value in state.get("travel") or []]
+        commands = [int(value) for value in state.get("commands") or []]
+        # Saved oldest first, the last entry was the current bucket
+        index = self._advance()
+        for offset, (moved, sent) in enumerate(zip(reversed(travel), reversed(commands))):
+            if offset + shift >= BUDGET_BUCKETS:
+                break
+            bucket = (index - offset - shift) % BUDGET_BUCKETS
+            self._travel[bucket] = moved
+            self._commands[bucket] = sent
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the accounting for diagnostics."""
+        return {
+            "daily_travel_budget": self.daily_travel_budget,
+            "travel_1h": round(self.travel(1), 1),
+            "travel_24h": round(self.travel(), 1),
+            "commands_1h": self.commands(1),
+            "commands_24h": self.commands(),
+            "battery_cost_24h": round(self.battery_cost(), 1),
+            "step_factor": round(self.step_factor(), 2),
+            "total_travel": round(self.total_travel, 1),
+            "total_commands": self.total_commands,
+        }
@@ -0,0 +1,107 @@
+"""Outbound command bookkeeping for TRV Manager."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+def quantize(value: float, step: float) -> float:
+    """Round a value to the device's resolution."""
+    if step <= 0:
+        return value
+    # Round again to drop float noise such as 21.500000000000004
+    return round(round(value / step) * step, 3)
+
+
+@dataclass
+class CommandRecord:
+    """Last commanded and last confirmed value for one entity."""
+
+    sent_value: float | None = None
+    sent_at: float | None = None  # Monotonic seconds
+    confirmed_value: float | None = None
+    confirmed_at: float | None = None  # Monotonic seconds
+
+
+class CommandCache:
+    """Write-suppression cache for device commands, keyed by entity ID.
+
+    Every write to a TRV is a radio transmission that costs battery. A write
+    is only needed when the new value differs from what the device last
+    confirmed, or when the last write is old enough to warrant a keep-alive.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the cache."""
+        self._records: dict[str, CommandRecord] = {}
+
+    def get(self, entity_id: str) -> CommandRecord | None:
+        """Return the record for an entity, if any."""
+        return self._records.get(entity_id)
+
+    def confirm(self, entity_id: str, value: float | None, now: float) -> None:
+        """Record the value an entity currently reports."""
+        if value is None:
+            return
+        record = self._records.setdefault(entity_id, CommandRecord())
+        if record.confirmed_value != value:
+            record.confirmed_value = value
+            record.confirmed_at = now
+
+    def should_send(
+        self,
+        entity_id: str,
+        value: float,
+        now: float,
+        min_delta: float = 0.0,
+        refresh_interval: float = 0.0,
+        retry_interval: float = 0.0,
+    ) -> bool:
+        """Return True if a write of value to entity_id is needed.
+
+        Args:
+            entity_id: Target entity
+            value: New value, already quantized to the device resolution
+            now: Current monotonic time in seconds
+            min_delta: Smallest change from the confirmed value worth sending
+                (0 sends any change)
+            refresh_interval: Seconds after which an unchanged value is sent
+                again as a keep-alive (0 disables keep-alives)
+            retry_interval: Seconds to wait for the device to confirm a value
+                before sending the same value again
+        """
+        record = self._records.get(entity_id)
+        if record is None:
+            return True
+
+        if (
+            retry_interval > 0
+            and record.sent_value == value
+            and record.sent_at is not None
+            and now - record.sent_at < retry_interval
+        ):
+            # Already sent, still waiting for the device to report it
+            return False
+
+        if record.confirmed_value is None:
+            return True
+
+        delta = abs(value - record.confirmed_value)
+        if delta > 1e-6 and delta >= min_delta:
+            return True
+
+        if refresh_interval > 0:
+            last_write = record.sent_at or record.confirmed_at
+            if last_write is None or now - last_write >= refresh_interval:
+                return True
+
+        return False
+
+    def record_sent(self, entity_id: str, value: float, now: float) -> None:
+        """Record that a value was sent to an entity."""
+        record = self._records.setdefault(entity_id, CommandRecord())
+        record.sent_value = value
+        record.sent_at = now
+
+    def forget(self, entity_id: str) -> None:
+        """Drop the record for an entity."""
+        self._records.pop(entity_id, None)
@@ -21,18 +21,72 @@ from .const import (
     CONF_TARGET_TEMP_ENTITY,
     CONF_VALVE_POSITION_ENTITY,
     CONF_DEVICES,
+    CONF_COMMAND_INTERVAL,
+    CONF_COMMAND_JITTER,
+    CONF_STATE_MAX_AGE,
+    CONF_SENSOR_MIN_INTERVAL,
+    CONF_COMBINED_DIAGNOSTICS,
+    CONF_OUTDOOR_TEMP_ENTITY,
+    CONF_FORECAST_ENTITY,
+    CONF_PREHEAT_SCHEDULE_ENTITY,
+    CONF_PREHEAT_COMFORT_TEMP,
+    CONF_FEEDFORWARD_GAIN,
+    CONF_TRACE,
+    CONF_MAX_DT,
+    CONF_DAILY_TRAVEL_BUDGET,
+    CONF_REFERENCE_FILTER,
+    CONF_TRV_TEMP_FILTER,
+    CONF_SENSOR_MAX_AGE,
     CONF_P_GAIN,
     CONF_I_GAIN,
     CONF_TRV_DWELL_TIME,
     CONF_VALVE_STEP,
+    CONF_COALESCE_WINDOW,
+    CONF_SETPOINT_MIN_DELTA,
+    CONF_SETPOINT_REFRESH_INTERVAL,
+    CONF_VALVE_UPDATE_INTERVAL,
+    DEFAULT_COMMAND_INTERVAL,
+    DEFAULT_COMMAND_JITTER,
+    DEFAULT_STATE_MAX_AGE,
+    DEFAULT_SENSOR_MIN_INTERVAL,
+    DEFAULT_COMBINED_DIAGNOSTICS,
+    DEFAULT_FEEDFORWARD_GAIN,
+    DEFAULT_TRACE,
+    DEFAULT_MAX_DT,
+    DEFAULT_DAILY_TRAVEL_BUDGET,
+    DEFAULT_FILTER,
+    DEFAULT_SENSOR_MAX_AGE,
+    FILTER_TYPES,
+    DEFAULT_PREHEAT_COMFORT_TEMP,
     DEFAULT_P_GAIN,
     DEFAULT_I_GAIN,
     DEFAULT_TRV_DWELL_TIME,
     DEFAULT_VALVE_STEP,
+    DEFAULT_COALESCE_WINDOW,
+    DEFAULT_SETPOINT_MIN_DELTA,
+    DEFAULT_SETPOINT_REFRESH_INTERVAL,
+    DEFAULT_VALVE_UPDATE_INTERVAL,
     MIN_P_GAIN,
     MAX_P_GAIN,
     MIN_I_GAIN,
     MAX_I_GAIN,
+    MIN_COALESCE_WINDOW,
+    MAX_COALESCE_WINDOW,
+    MAX_COMMAND_INTERVAL,
+    MAX_COMMAND_JITTER,
+    MAX_STATE_MAX_AGE,
+    MAX_SENSOR_MIN_INTERVAL,
+    MAX_FEEDFORWARD_GAIN,
+    MIN_MAX_DT,
+    MAX_MAX_DT,
+    MAX_DAILY_TRAVEL_BUDGET,
+    MAX_SENSOR_MAX_AGE,
+    MIN_TRV_TARGET_TEMP,
+    MAX_TRV_TARGET_TEMP,
+    MAX_SETPOINT_MIN_DELTA,
+    MAX_SETPOINT_REFRESH_INTERVAL,
+    MIN_VALVE_UPDATE_INTERVAL,
+    MAX_VALVE_UPDATE_INTERVAL,
 )
 
 
@@ -222,6 +276,35 @@ class TRVManagerOptionsFlow(config_entries.OptionsFlow):
             new_data = {**self.config_entry.data}
             new_data[CONF_REFERENCE_TEMP_ENTITY] = user_input[CONF_REFERENCE_TEMP_ENTITY]
             new_data[CONF_TARGET_TEMP_ENTITY] = user_input[CONF_TARGET_TEMP_ENTITY]
+            new_data[CONF_COMMAND_INTERVAL] = user_input.get(
+                CONF_COMMAND_INTERVAL, DEFAULT_COMMAND_INTERVAL
+            )
+            new_data[CONF_COMMAND_JITTER] = user_input.get(
+                CONF_COMMAND_JITTER, DEFAULT_COMMAND_JITTER
+            )
+            new_data[CONF_STATE_MAX_AGE] = user_input.get(
+                CONF_STATE_MAX_AGE, DEFAULT_STATE_MAX_AGE
+            )
+            new_data[CONF_OUTDOOR_TEMP_ENTITY] = user_input.get(CONF_OUTDOOR_TEMP_ENTITY)
+            new_data[CONF_FORECAST_ENTITY] = user_input.get(CONF_FORECAST_ENTITY)
+            new_data[CONF_PREHEAT_SCHEDULE_ENTITY] = user_input.get(
+                CONF_PREHEAT_SCHEDULE_ENTITY
+            )
+            new_data[CONF_PREHEAT_COMFORT_TEMP] = user_input.get(
+                CONF_PREHEAT_COMFORT_TEMP, DEFAULT_PREHEAT_COMFORT_TEMP
+            )
+            new_data[CONF_SENSOR_MIN_INTERVAL] = user_input.get(
+                CONF_SENSOR_MIN_INTERVAL, DEFAULT_SENSOR_MIN_INTERVAL
+            )
+            new_data[CONF_COMBINED_DIAGNOSTICS] = user_input.get(
+                CONF_COMBINED_DIAGNOSTICS, DEFAULT_COMBINED_DIAGNOSTICS
+            )
+            new_data[CONF_REFERENCE_FILTER] = user_input.get(
+                CONF_REFERENCE_FILTER, DEFAULT_FILTER
+            )
+            new_data[CONF_SENSOR_MAX_AGE] = user_input.get(
+                CONF_SENSOR_MAX_AGE, DEFAULT_SENSOR_MAX_AGE
+            )
             
             self.hass.config_entries.async_update_entry(
                 self.config_entry,
@@ -245,6 +328,63 @@ class TRVManagerOptionsFlow(config_entries.OptionsFlow):
                 ): selector.EntitySelector(
                     {"domain": ["sensor", "input_number", "number"]}
                 ),
+                vol.Optional(
+                    CONF_COMMAND_INTERVAL,
+                    default=current_data.get(CONF_COMMAND_INTERVAL, DEFAULT_COMMAND_INTERVAL),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=MAX_COMMAND_INTERVAL)),
+                vol.Optional(
+                    CONF_COMMAND_JITTER,
+                    default=current_data.get(CONF_COMMAND_JITTER, DEFAULT_COMMAND_JITTER),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=MAX_COMMAND_JITTER)),
+                vol.Optional(
+                    CONF_STATE_MAX_AGE,
+                    default=current_data.get(CONF_STATE_MAX_AGE, DEFAULT_STATE_MAX_AGE),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=MAX_STATE_MAX_AGE)),
+                vol.Optional(
+                    CONF_OUTDOOR_TEMP_ENTITY,
+                    description={"suggested_value": current_data.get(CONF_OUTDOOR_TEMP_ENTITY)},
+                ): selector.EntitySelector(
+                    {"domain": "sensor", "device_class": "temperature"}
+                ),
+                vol.Optional(
+                    CONF_FORECAST_ENTITY,
+                    description={"suggested_value": current_data.get(CONF_FORECAST_ENTITY)},
+                ): selector.EntitySelector({"domain": "weather"}),
+                vol.Optional(
+                    CONF_PREHEAT_SCHEDULE_ENTITY,
+                    description={
+                        "suggested_value": current_data.get(CONF_PREHEAT_SCHEDULE_ENTITY)
+                    },
+                ): selector.EntitySelector({"domain": "schedule"}),
+                vol.Optional(
+                    CONF_PREHEAT_COMFORT_TEMP,
+                    default=current_data.get(
+                        CONF_PREHEAT_COMFORT_TEMP, DEFAULT_PREHEAT_COMFORT_TEMP
+                    ),
+                ): vol.All(
+                    vol.Coerce(float),
+                    vol.Range(min=MIN_TRV_TARGET_TEMP, max=MAX_TRV_TARGET_TEMP),
+                ),
+                vol.Optional(
+                    CONF_SENSOR_MIN_INTERVAL,
+                    default=current_data.get(
+                        CONF_SENSOR_MIN_INTERVAL, DEFAULT_SENSOR_MIN_INTERVAL
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=MAX_SENSOR_MIN_INTERVAL)),
+                vol.Optional(
+                    CONF_COMBINED_DIAGNOSTICS,
+                    default=current_data.get(
+                        CONF_COMBINED_DIAGNOSTICS, DEFAULT_COMBINED_DIAGNOSTICS
+                    ),
+                ): cv.boolean,
+                vol.Optional(
+                    CONF_REFERENCE_FILTER,
+                    default=current_data.get(CONF_REFERENCE_FILTER, DEFAULT_FILTER),
+                ): vol.In(FILTER_TYPES),
+                vol.Optional(
+                    CONF_SENSOR_MAX_AGE,
+                    default=current_data.get(CONF_SENSOR_MAX_AGE, DEFAULT_SENSOR_MAX_AGE),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=MAX_SENSOR_MAX_AGE)),
             }
         )
 
@@ -378,6 +518,29 @@ class TRVManagerOptionsFlow(config_entries.OptionsFlow):
                     CONF_I_GAIN: user_input.get(CONF_I_GAIN, DEFAULT_I_GAIN),
                     CONF_TRV_DWELL_TIME: user_input.get(CONF_TRV_DWELL_TIME, DEFAULT_TRV_DWELL_TIME),
                     CONF_VALVE_STEP: user_input.get(CONF_VALVE_STEP, DEFAULT_VALVE_STEP),
+                    CONF_COALESCE_WINDOW: user_input.get(
+                        CONF_COALESCE_WINDOW, DEFAULT_COALESCE_WINDOW
+                    ),
+                    CONF_SETPOINT_MIN_DELTA: user_input.get(
+                        CONF_SETPOINT_MIN_DELTA, DEFAULT_SETPOINT_MIN_DELTA
+                    ),
+                    CONF_SETPOINT_REFRESH_INTERVAL: user_input.get(
+                        CONF_SETPOINT_REFRESH_INTERVAL, DEFAULT_SETPOINT_REFRESH_INTERVAL
+                    ),
+                    CONF_VALVE_UPDATE_INTERVAL: user_input.get(
+                        CONF_VALVE_UPDATE_INTERVAL, DEFAULT_VALVE_UPDATE_INTERVAL
+                    ),
+                    CONF_FEEDFORWARD_GAIN: user_input.get(
+                        CONF_FEEDFORWARD_GAIN, DEFAULT_FEEDFORWARD_GAIN
+                    ),
+                    CONF_TRACE: user_input.get(CONF_TRACE, DEFAULT_TRACE),
+                    CONF_MAX_DT: user_input.get(CONF_MAX_DT, DEFAULT_MAX_DT),
+                    CONF_DAILY_TRAVEL_BUDGET: user_input.get(
+                        CONF_DAILY_TRAVEL_BUDGET, DEFAULT_DAILY_TRAVEL_BUDGET
+                    ),
+                    CONF_TRV_TEMP_FILTER: user_input.get(
+                        CONF_TRV_TEMP_FILTER, DEFAULT_FILTER
+                    ),
                 }
                 if d[CONF_DEVICE_ID] == self._current_device_id
                 else d
@@ -419,6 +582,58 @@ class TRVManagerOptionsFlow(config_entries.OptionsFlow):
                     CONF_VALVE_STEP,
                     default=device.get(CONF_VALVE_STEP, DEFAULT_VALVE_STEP),
                 ): vol.All(vol.Coerce(int), vol.Range(min=1, max=20)),
+                vol.Optional(
+                    CONF_COALESCE_WINDOW,
+                    default=device.get(CONF_COALESCE_WINDOW, DEFAULT_COALESCE_WINDOW),
+                ): vol.All(
+                    vol.Coerce(float),
+                    vol.Range(min=MIN_COALESCE_WINDOW, max=MAX_COALESCE_WINDOW),
+                ),
+                vol.Optional(
+                    CONF_SETPOINT_MIN_DELTA,
+                    default=device.get(CONF_SETPOINT_MIN_DELTA, DEFAULT_SETPOINT_MIN_DELTA),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=MAX_SETPOINT_MIN_DELTA)),
+                vol.Optional(
+                    CONF_SETPOINT_REFRESH_INTERVAL,
+                    default=device.get(
+                        CONF_SETPOINT_REFRESH_INTERVAL, DEFAULT_SETPOINT_REFRESH_INTERVAL
+                    ),
+                ): vol.All(
+                    vol.Coerce(int), vol.Range(min=0, max=MAX_SETPOINT_REFRESH_INTERVAL)
+                ),
+                vol.Optional(
+                    CONF_VALVE_UPDATE_INTERVAL,
+                    default=device.get(
+                        CONF_VALVE_UPDATE_INTERVAL, DEFAULT_VALVE_UPDATE_INTERVAL
+                    ),
+                ): vol.All(
+                    vol.Coerce(int),
+                    vol.Range(min=MIN_VALVE_UPDATE_INTERVAL, max=MAX_VALVE_UPDATE_INTERVAL),
+                ),
+                vol.Optional(
+                    CONF_FEEDFORWARD_GAIN,
+                    default=device.get(CONF_FEEDFORWARD_GAIN, DEFAULT_FEEDFORWARD_GAIN),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=MAX_FEEDFORWARD_GAIN)),
+                vol.Optional(
+                    CONF_MAX_DT,
+                    default=device.get(CONF_MAX_DT, DEFAULT_MAX_DT),
+                ): vol.All(vol.Coerce(int), vol.Range(min=MIN_MAX_DT, max=MAX_MAX_DT)),
+                vol.Optional(
+                    CONF_DAILY_TRAVEL_BUDGET,
+                    default=device.get(
+                        CONF_DAILY_TRAVEL_BUDGET, DEFAULT_DAILY_TRAVEL_BUDGET
+                    ),
+                ): vol.All(
+                    vol.Coerce(int), vol.Range(min=0, max=MAX_DAILY_TRAVEL_BUDGET)
+                ),
+                vol.Optional(
+                    CONF_TRV_TEMP_FILTER,
+                    default=device.get(CONF_TRV_TEMP_FILTER, DEFAULT_FILTER),
+                ): vol.In(FILTER_TYPES),
+                vol.Optional(
+                    CONF_TRACE,
+                    default=device.get(CONF_TRACE, DEFAULT_TRACE),
+                ): cv.boolean,
             }
         )
 
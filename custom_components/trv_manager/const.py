@@ -8,6 +8,15 @@ DOMAIN: Final = "trv_manager"
 CONF_REFERENCE_TEMP_ENTITY: Final = "reference_temp_entity"
 CONF_TARGET_TEMP_ENTITY: Final = "target_temp_entity"
 CONF_DEVICES: Final = "devices"
+CONF_COMMAND_INTERVAL: Final = "command_interval"
+CONF_COMMAND_JITTER: Final = "command_jitter"
+CONF_STATE_MAX_AGE: Final = "state_max_age"
+CONF_SENSOR_MIN_INTERVAL: Final = "sensor_min_interval"
+CONF_COMBINED_DIAGNOSTICS: Final = "combined_diagnostics"
+CONF_OUTDOOR_TEMP_ENTITY: Final = "outdoor_temp_entity"
+CONF_FORECAST_ENTITY: Final = "forecast_entity"
+CONF_PREHEAT_SCHEDULE_ENTITY: Final = "preheat_schedule_entity"
+CONF_PREHEAT_COMFORT_TEMP: Final = "preheat_comfort_temp"
 
 # Device configuration keys (per TRV device)
 CONF_DEVICE_ID: Final = "device_id"
@@ -19,13 +28,39 @@ CONF_I_GAIN: Final = "i_gain"
 CONF_ANTI_WINDUP_GAIN: Final = "anti_windup_gain"
 CONF_TRV_DWELL_TIME: Final = "trv_dwell_time"
 CONF_VALVE_STEP: Final = "valve_step"
+CONF_VALVE_UPDATE_INTERVAL: Final = "valve_update_interval"
+CONF_COALESCE_WINDOW: Final = "coalesce_window"
+CONF_SETPOINT_MIN_DELTA: Final = "setpoint_min_delta"
+CONF_SETPOINT_REFRESH_INTERVAL: Final = "setpoint_refresh_interval"
+CONF_FEEDFORWARD_GAIN: Final = "feedforward_gain"
+CONF_TRACE: Final = "trace"
+CONF_MAX_DT: Final = "max_dt"
+CONF_DAILY_TRAVEL_BUDGET: Final = "daily_travel_budget"
+CONF_REFERENCE_FILTER: Final = "reference_filter"
+CONF_TRV_TEMP_FILTER: Final = "trv_temp_filter"
+CONF_SENSOR_MAX_AGE: Final = "sensor_max_age"
 
 # Default values
+DEFAULT_COMMAND_INTERVAL: Final = 0.5  # Minimum seconds between radio commands in a hub
+DEFAULT_COMMAND_JITTER: Final = 0.5  # Random extra seconds added to each gap
+DEFAULT_STATE_MAX_AGE: Final = 360  # Minutes after which saved controller state is discarded
+DEFAULT_SENSOR_MIN_INTERVAL: Final = 60  # Seconds between state writes of a diagnostic sensor
+DEFAULT_COMBINED_DIAGNOSTICS: Final = False  # One controller sensor instead of four
 DEFAULT_P_GAIN: Final = 10.0  # Proportional gain (valve % per degree error)
 DEFAULT_I_GAIN: Final = 0.5   # Integral gain (valve % per degree-minute)
 DEFAULT_ANTI_WINDUP_GAIN: Final = 1.0  # Back-calculation gain
 DEFAULT_TRV_DWELL_TIME: Final = 60  # Seconds between TRV target temperature updates
 DEFAULT_VALVE_STEP: Final = 5  # Valve position step size in % (prevents micro-adjustments)
+DEFAULT_VALVE_UPDATE_INTERVAL: Final = 60  # Seconds between periodic valve updates
+DEFAULT_COALESCE_WINDOW: Final = 0.5  # Seconds to collect bursts of events into one control pass
+DEFAULT_SETPOINT_MIN_DELTA: Final = 0.0  # °C, smallest setpoint change worth a write (0 = any step)
+DEFAULT_SETPOINT_REFRESH_INTERVAL: Final = 3600  # Seconds before an unchanged setpoint is resent
+DEFAULT_FEEDFORWARD_GAIN: Final = 0.0  # Valve % per °C the target is above outdoors (0 = off)
+DEFAULT_TRACE: Final = False  # Log every control pass of the device at INFO
+DEFAULT_MAX_DT: Final = 300  # Seconds, longest time step the PI controller integrates at once
+DEFAULT_DAILY_TRAVEL_BUDGET: Final = 0  # Valve travel in % per 24 hours (0 = unlimited)
+DEFAULT_SENSOR_MAX_AGE: Final = 0  # Seconds without a report before an input is stale (0 = never)
+DEFAULT_PREHEAT_COMFORT_TEMP: Final = 21.0  # °C reached when the pre-heat schedule turns on
 
 # Limits
 MIN_TRV_TARGET_TEMP: Final = 5.0  # °C
@@ -33,8 +68,11 @@ MAX_TRV_TARGET_TEMP: Final = 25.0  # °C
 MIN_VALVE_POSITION: Final = 0.0
 MAX_VALVE_POSITION: Final = 100.0
 
+# Startup
+STARTUP_PARALLELISM: Final = 4  # Devices running their first control pass at once
+
 # Update intervals
-VALVE_UPDATE_INTERVAL: Final = timedelta(seconds=60)
+VALVE_TICK_INTERVAL: Final = timedelta(seconds=5)  # Resolution of the shared valve tick
 FAST_UPDATE_INTERVAL: Final = timedelta(seconds=5)
 
 # PI controller limits
@@ -43,6 +81,113 @@ MAX_P_GAIN: Final = 50.0
 MIN_I_GAIN: Final = 0.0
 MAX_I_GAIN: Final = 5.0
 
+# Event coalescing limits (seconds)
+MIN_COALESCE_WINDOW: Final = 0.0
+MAX_COALESCE_WINDOW: Final = 10.0
+
+# Periodic valve update limits (seconds)
+MIN_VALVE_UPDATE_INTERVAL: Final = 30
+MAX_VALVE_UPDATE_INTERVAL: Final = 900
+
+# Radio command scheduler limits (seconds)
+MAX_COMMAND_INTERVAL: Final = 10.0
+MAX_COMMAND_JITTER: Final = 10.0
+
+# Saved controller state limits (minutes)
+MAX_STATE_MAX_AGE: Final = 10080
+MAX_SENSOR_MIN_INTERVAL: Final = 3600
+MIN_MAX_DT: Final = 30
+MAX_MAX_DT: Final = 3600
+MAX_DAILY_TRAVEL_BUDGET: Final = 10000  # %
+MAX_SENSOR_MAX_AGE: Final = 86400
+
+# Setpoint write-suppression limits
+MAX_SETPOINT_MIN_DELTA: Final = 2.0  # °C
+MAX_SETPOINT_REFRESH_INTERVAL: Final = 86400  # Seconds
+
+# Auto-tune from recorder history
+DEFAULT_AUTOTUNE_DAYS: Final = 3  # Days of history used
+MAX_AUTOTUNE_DAYS: Final = 14
+AUTOTUNE_SAMPLE_INTERVAL: Final = 60.0  # Seconds between resampled history points
+AUTOTUNE_MIN_SAMPLES: Final = 360  # Usable samples required (6 hours)
+AUTOTUNE_MIN_VALVE_SPREAD: Final = 20.0  # % the valve must have moved
+AUTOTUNE_MAX_DEAD_TIME: Final = 5400.0  # Seconds, longest dead time considered
+
+# Relay (Åström–Hägglund) tuning experiment
+DEFAULT_RELAY_HIGH: Final = 100  # Valve % while the room is below target
+DEFAULT_RELAY_LOW: Final = 0  # Valve % while the room is above target
+DEFAULT_RELAY_HYSTERESIS: Final = 0.1  # °C around target before the relay switches
+DEFAULT_RELAY_CYCLES: Final = 3  # Oscillation periods measured
+DEFAULT_RELAY_MAX_DURATION: Final = 360  # Minutes before the experiment is aborted
+DEFAULT_RELAY_MAX_DEVIATION: Final = 1.5  # °C from target before the experiment is aborted
+MAX_RELAY_MAX_DURATION: Final = 1440
+MAX_RELAY_MAX_DEVIATION: Final = 4.0
+RELAY_SAMPLE_INTERVAL: Final = 30  # Seconds between reference temperature samples
+RELAY_MAX_STALE: Final = 600  # Seconds without a reference temperature before aborting
+
+# Services and events
+SERVICE_AUTOTUNE: Final = "autotune"
+SERVICE_RELAY_TUNE: Final = "relay_tune"
+SERVICE_CANCEL_RELAY_TUNE: Final = "cancel_relay_tune"
+SERVICE_GET_HISTORY: Final = "get_history"
+EVENT_RELAY_TUNE_FINISHED: Final = f"{DOMAIN}_relay_tune_finished"
+ATTR_DAYS: Final = "days"
+ATTR_APPLY: Final = "apply"
+ATTR_HIGH: Final = "high"
+ATTR_LOW: Final = "low"
+ATTR_HYSTERESIS: Final = "hysteresis"
+ATTR_CYCLES: Final = "cycles"
+ATTR_MAX_DURATION: Final = "max_duration"
+ATTR_MAX_DEVIATION: Final = "max_deviation"
+ATTR_LIMIT: Final = "limit"
+
+# Outdoor temperature feed-forward
+MAX_FEEDFORWARD_GAIN: Final = 10.0  # Valve % per °C
+FORECAST_LOOKAHEAD: Final = timedelta(hours=3)  # Forecast period averaged into the outdoor temperature
+
+# Pre-heat planning
+DEFAULT_HEATUP_RATE: Final = 1.0  # °C per hour assumed until a rate was measured
+HEATUP_RATE_BUFFER_SIZE: Final = 32  # Heat-up rate samples kept per device
+HEATUP_SAMPLE_PERIOD: Final = 900  # Seconds of full heating per rate sample
+HEATUP_MIN_VALVE: Final = 80  # Valve % from which a device counts as heating at full power
+MAX_PREHEAT_LEAD: Final = 4 * 3600  # Seconds, earliest pre-heat start before the schedule
+
+# Control pass history
+PASS_HISTORY_SIZE: Final = 128  # Passes kept per device
+MAX_HISTORY_LIMIT: Final = PASS_HISTORY_SIZE
+
+# Temperature input filters
+FILTER_NONE: Final = "none"
+FILTER_EMA: Final = "ema"
+FILTER_MEDIAN: Final = "median"
+FILTER_KALMAN: Final = "kalman"
+FILTER_TYPES: Final = (FILTER_NONE, FILTER_EMA, FILTER_MEDIAN, FILTER_KALMAN)
+DEFAULT_FILTER: Final = FILTER_NONE
+FILTER_EMA_ALPHA: Final = 0.3  # Weight of a new sample
+FILTER_MEDIAN_SIZE: Final = 5  # Samples in the median window
+FILTER_KALMAN_PROCESS_NOISE: Final = 1e-4  # °C² per second the temperature may drift
+FILTER_KALMAN_MEASUREMENT_NOISE: Final = 0.04  # °C², sensor noise (0.2 °C standard deviation)
+FILTER_OUTLIER_LIMIT: Final = 2.0  # °C from the estimate before a sample is held back
+FILTER_OUTLIER_CONFIRM: Final = 300  # Seconds a jump must last to be accepted
+
+# Valve actuation budget
+BUDGET_BUCKETS: Final = 24  # Hourly buckets in the rolling window
+BUDGET_BUCKET_SECONDS: Final = 3600
+BUDGET_ADAPT_FROM: Final = 0.5  # Share of the daily budget used before the step widens
+MAX_STEP_FACTOR: Final = 4.0  # Widest valve step, as a multiple of the configured step
+MAX_ADAPTIVE_VALVE_STEP: Final = 25  # %, widest valve step whatever the configured step
+COMMAND_BATTERY_COST: Final = 1.0  # Battery cost of one radio command (command equivalents)
+TRAVEL_BATTERY_COST: Final = 0.1  # Battery cost of 1 % valve travel (command equivalents)
+
+# Metrics
+METRICS_URL: Final = f"/api/{DOMAIN}/metrics"
+PASS_LATENCY_BUCKETS: Final = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)  # Seconds
+SERVICE_CALL_BUCKETS: Final = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # Seconds
+
+# Dispatcher signals, formatted with the entry ID (and device ID)
+SIGNAL_DEVICE_ADDED: Final = f"{DOMAIN}_device_added_{{}}"
+SIGNAL_SETTINGS_UPDATED: Final = f"{DOMAIN}_settings_updated_{{}}_{{}}"
+
 # Entity suffixes
 ENTITY_ID_P_GAIN: Final = "_p_gain"
 ENTITY_ID_I_GAIN: Final = "_i_gain"
@@ -50,4 +195,17 @@ ENTITY_ID_ERROR: Final = "_error"
 ENTITY_ID_INTEGRATOR: Final = "_integrator"
 ENTITY_ID_TEMP_ADJUSTMENT: Final = "_temp_adjustment"
 ENTITY_ID_VALVE_OUTPUT: Final = "_valve_output"
+ENTITY_ID_SETPOINT_WRITES_SUPPRESSED: Final = "_setpoint_writes_suppressed"
+ENTITY_ID_COMMAND_QUEUE: Final = "_command_queue"
+ENTITY_ID_CONTROLLER: Final = "_controller"
+ENTITY_ID_VALVE_TRAVEL: Final = "_valve_travel"
+ENTITY_ID_INPUT_TEMPERATURES: Final = "_input_temperatures"
+
+# Smallest change of a diagnostic sensor value worth a state write
+ERROR_SIGNIFICANCE: Final = 0.05  # °C
+INTEGRATOR_SIGNIFICANCE: Final = 0.1  # Degree-minutes
+TEMP_ADJUSTMENT_SIGNIFICANCE: Final = 0.1  # °C
+VALVE_OUTPUT_SIGNIFICANCE: Final = 1  # %
+VALVE_TRAVEL_SIGNIFICANCE: Final = 5  # %
+INPUT_TEMP_SIGNIFICANCE: Final = 0.05  # °C
 
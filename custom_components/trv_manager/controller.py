@@ -0,0 +1,168 @@
+"""PI controller and controller data for TRV Manager.
+
+Plain Python with no Home Assistant references, so the same code runs in
+the coordinator, in state persistence and in the offline simulation.
+"""
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+import math
+from typing import Any
+
+from .const import DEFAULT_ANTI_WINDUP_GAIN, MAX_VALVE_POSITION, MIN_VALVE_POSITION
+
+
+class PIController:
+    """Valve PI controller with back-calculation anti-windup and stepping.
+
+    The terms of the last update are kept (NaN when the controller did not
+    run) for traces, history and metrics; they are not part of the state.
+    """
+
+    __slots__ = (
+        "p_gain",
+        "i_gain",
+        "anti_windup_gain",
+        "valve_step",
+        "integrator",
+        "last_valve_position",
+        "p_term",
+        "i_term",
+        "raw_output",
+        "windup_excess",
+        "held",
+    )
+
+    def __init__(
+        self,
+        p_gain: float,
+        i_gain: float,
+        valve_step: int,
+        anti_windup_gain: float = DEFAULT_ANTI_WINDUP_GAIN,
+    ) -> None:
+        """Initialize the controller."""
+        self.p_gain = p_gain
+        self.i_gain = i_gain
+        self.anti_windup_gain = anti_windup_gain
+        self.valve_step = valve_step
+
+        # State
+        self.integrator = 0.0
+        self.last_valve_position: int | None = None
+
+        # Terms of the last update
+        self.p_term = math.nan
+        self.i_term = math.nan
+        self.raw_output = math.nan
+        self.windup_excess = 0.0
+        self.held: int | None = None  # Stepped output kept back by the hysteresis
+
+    def update(self, error: float, dt: float, bias: float = 0.0) -> int:
+        """Update PI controller and return valve position output (0-100).
+
+        Uses back-calculation anti-windup to prevent integrator windup.
+        Output is rounded to steps to prevent micro-adjustments.
+
+        Args:
+            error: Temperature error (target - reference)
+            dt: Time delta in seconds since last update
+            bias: Feed-forward valve position added before saturation
+
+        Returns:
+            Valve position as integer (0-100), rounded to configured step
+        """
+        if dt <= 0:
+            dt = 1.0  # Prevent division by zero
+
+        # Convert dt to minutes for integrator (as per requirements)
+        dt_minutes = dt / 60.0
+
+        # Calculate P and I terms
+        p_term = self.p_gain * error
+        i_term = self.i_gain * self.integrator
+
+        # Desired output (before saturation), the feed-forward bias is
+        # subject to the same saturation and anti-windup as the PI terms
+        valve_output_desired = p_term + i_term + bias
+
+        # Apply saturation limits
+        valve_output_actual = max(
+            MIN_VALVE_POSITION, min(MAX_VALVE_POSITION, valve_output_desired)
+        )
+
+        # Back-calculation anti-windup
+        if valve_output_desired != valve_output_actual:
+            # We're saturated - calculate excess
+            excess = valve_output_desired - valve_output_actual
+            # Reduce integrator based on excess (back-calculation)
+            self.integrator -= excess * self.anti_windup_gain * dt_minutes
+        else:
+            # Not saturated - normal integration
+            excess = 0.0
+            self.integrator += error * dt_minutes
+
+        # Round to step size to prevent micro-adjustments
+        # This prevents 99%->100%->99% oscillations and saves battery
+        valve_stepped = round(valve_output_actual / self.valve_step) * self.valve_step
+        valve_stepped = int(max(MIN_VALVE_POSITION, min(MAX_VALVE_POSITION, valve_stepped)))
+
+        # Apply hysteresis: only change if difference is more than half a step
+        # This prevents ringing at step boundaries (17%->15%, 18%->20%, 17%->15%...)
+        held = None
+        if self.last_valve_position is not None:
+            diff = abs(valve_stepped - self.last_valve_position)
+            # Only change if at least one full step different
+            if diff > 0 and diff < self.valve_step:
+                # Too close to current position, don't change
+                held = valve_stepped
+                valve_stepped = self.last_valve_position
+
+        self.p_term = p_term
+        self.i_term = i_term
+        self.raw_output = valve_output_actual
+        self.windup_excess = excess
+        self.held = held
+
+        return valve_stepped
+
+    def skip(self) -> None:
+        """Record that the controller did not run this pass (idle failsafe)."""
+        self.p_term = self.i_term = self.raw_output = math.nan
+        self.windup_excess = 0.0
+        self.held = None
+
+    def resume_heating(self) -> None:
+        """Halve the integrator on idle -> heating to soften the valve swing."""
+        self.integrator *= 0.5
+
+    def snapshot(self) -> tuple[float, int | None]:
+        """Return the controller state."""
+        return (self.integrator, self.last_valve_position)
+
+    def restore(self, snapshot: tuple[float, int | None]) -> None:
+        """Restore a state returned by snapshot."""
+        self.integrator, self.last_valve_position = snapshot
+
+
+@dataclass(slots=True)
+class ControllerData:
+    """Latest values of a device's control loop, shown by its sensors."""
+
+    error: float = 0.0
+    integrator: float = 0.0
+    temp_adjustment: float = 0.0
+    valve_output: int = 0  # Integer valve position
+    hvac_action: str | None = None  # Current TRV hvac_action
+    reference_temp: float | None = None  # Filtered
+    target_temp: float | None = None
+    trv_temp: float | None = None  # Filtered
+    reference_temp_raw: float | None = None
+    trv_temp_raw: float | None = None
+    feedforward_bias: float = 0.0
+    preheat_start: str | None = None
+    valve_travel: float = 0.0  # Valve travel (%) in the last 24 hours
+    valve_step: int = 0  # Valve step in use, widened by the travel budget
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the values for diagnostics."""
+        return asdict(self)
@@ -1,9 +1,12 @@
 """Data update coordinator for TRV Manager."""
 from __future__ import annotations
 
+from collections.abc import Callable
 from datetime import datetime, timedelta
+import asyncio
 import logging
-from typing import Any
+import time
+from typing import TYPE_CHECKING, Any, Final
 
 from homeassistant.components.climate import (
     ATTR_TEMPERATURE,
@@ -11,38 +14,84 @@ from homeassistant.components.climate import (
     SERVICE_SET_TEMPERATURE,
 )
 from homeassistant.components.number import DOMAIN as NUMBER_DOMAIN, SERVICE_SET_VALUE
-from homeassistant.const import (
-    ATTR_ENTITY_ID,
-    STATE_UNAVAILABLE,
-    STATE_UNKNOWN,
-)
-from homeassistant.core import Event, HomeAssistant, State, callback
-from homeassistant.helpers.event import async_track_state_change_event, async_track_time_interval
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, State, callback
+from homeassistant.helpers.event import async_call_later, async_track_state_change_event
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.util import dt as dt_util
 
 from .const import (
+    CONF_COALESCE_WINDOW,
+    CONF_DAILY_TRAVEL_BUDGET,
+    CONF_FEEDFORWARD_GAIN,
+    CONF_SETPOINT_MIN_DELTA,
+    CONF_SETPOINT_REFRESH_INTERVAL,
+    CONF_TRV_DWELL_TIME,
+    CONF_VALVE_STEP,
+    CONF_VALVE_UPDATE_INTERVAL,
     CONF_I_GAIN,
+    CONF_MAX_DT,
     CONF_P_GAIN,
     CONF_REFERENCE_TEMP_ENTITY,
     CONF_TARGET_TEMP_ENTITY,
+    CONF_TRACE,
+    CONF_TRV_TEMP_FILTER,
     CONF_TRV_ENTITY,
     CONF_VALVE_POSITION_ENTITY,
     CONF_ANTI_WINDUP_GAIN,
-    DEFAULT_ANTI_WINDUP_GAIN,
+    DEFAULT_COALESCE_WINDOW,
+    DEFAULT_DAILY_TRAVEL_BUDGET,
+    DEFAULT_FILTER,
+    DEFAULT_FEEDFORWARD_GAIN,
+    DEFAULT_MAX_DT,
+    DEFAULT_SETPOINT_MIN_DELTA,
+    DEFAULT_SETPOINT_REFRESH_INTERVAL,
+    DEFAULT_TRACE,
     DEFAULT_TRV_DWELL_TIME,
     DEFAULT_VALVE_STEP,
+    DEFAULT_VALVE_UPDATE_INTERVAL,
     DOMAIN,
+    HEATUP_MIN_VALVE,
+    MAX_ADAPTIVE_VALVE_STEP,
     MAX_TRV_TARGET_TEMP,
-    MAX_VALVE_POSITION,
     MIN_TRV_TARGET_TEMP,
-    MIN_VALVE_POSITION,
-    VALVE_UPDATE_INTERVAL,
+    PASS_LATENCY_BUCKETS,
 )
 
+from .budget import ActuationBudget
+from .commands import quantize
+from .controller import ControllerData, PIController
+from .filters import SensorFilter
+from .history import PassHistory
+from .metrics import Histogram
+from .hub import parse_float_state, reported_at
+from .preheat import PreheatPlanner
+from .scheduler import PRIORITY_KEEPALIVE, PRIORITY_SETPOINT, PRIORITY_VALVE
+from .ticker import async_get_valve_ticker
+from .trace import PassTrace
+
+if TYPE_CHECKING:
+    from .autotune import AutotuneResult
+    from .hub import TRVManagerHub
+    from .relay import RelayTuneResult
+
 _LOGGER = logging.getLogger(__name__)
 
+# Control pass kinds, in increasing order of work done
+PASS_VALVE: Final = "valve"  # Periodic valve-only pass
+PASS_FULL: Final = "full"  # Full pass (TRV setpoint and valve)
+
+# TRV attributes that feed the control loop
+CONTROL_ATTRIBUTES: Final = ("current_temperature", "hvac_action")
+# TRV attributes that may report the valve opening we commanded
+VALVE_ATTRIBUTES: Final = ("valve_position", "position", "pi_heating_demand")
+# Setpoint resolution assumed when the TRV does not report target_temp_step
+DEFAULT_TARGET_TEMP_STEP: Final = 0.5
+# PI time step of the first update after a start or resume
+FIRST_UPDATE_DT: Final = 1.0
 
-class TRVManagerCoordinator(DataUpdateCoordinator[dict[str, Any]]):
+
+class TRVManagerCoordinator(DataUpdateCoordinator[ControllerData]):
     """Coordinator to manage TRV control with PI controller."""
 
     def __init__(
@@ -50,14 +99,22 @@ class TRVManagerCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         hass: HomeAssistant,
         entry_id: str,
         device_id: str,
+        hub: TRVManagerHub,
         trv_entity: str,
-        reference_temp_entity: str,
-        target_temp_entity: str,
         valve_position_entity: str | None,
         p_gain: float,
         i_gain: float,
         trv_dwell_time: int = DEFAULT_TRV_DWELL_TIME,
         valve_step: int = DEFAULT_VALVE_STEP,
+        coalesce_window: float = DEFAULT_COALESCE_WINDOW,
+        setpoint_min_delta: float = DEFAULT_SETPOINT_MIN_DELTA,
+        setpoint_refresh_interval: int = DEFAULT_SETPOINT_REFRESH_INTERVAL,
+        valve_update_interval: int = DEFAULT_VALVE_UPDATE_INTERVAL,
+        feedforward_gain: float = DEFAULT_FEEDFORWARD_GAIN,
+        trace: bool = DEFAULT_TRACE,
+        max_dt: float = DEFAULT_MAX_DT,
+        daily_travel_budget: float = DEFAULT_DAILY_TRAVEL_BUDGET,
+        trv_temp_filter: str = DEFAULT_FILTER,
     ) -> None:
         """Initialize the coordinator."""
         super().__init__(
@@ -70,107 +127,588 @@ class TRVManagerCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         self.entry_id = entry_id
         self.device_id = device_id
         self.trv_entity = trv_entity
-        self.reference_temp_entity = reference_temp_entity
-        self.target_temp_entity = target_temp_entity
         self.valve_position_entity = valve_position_entity
         
-        self._p_gain = p_gain
-        self._i_gain = i_gain
-        self._anti_windup_gain = DEFAULT_ANTI_WINDUP_GAIN
         self._trv_dwell_time = trv_dwell_time  # Seconds between TRV updates
-        self._valve_step = valve_step  # Valve position step size
+        self._coalesce_window = coalesce_window  # Seconds to merge event bursts
+        self._setpoint_min_delta = setpoint_min_delta  # Smallest setpoint change worth sending
+        self._setpoint_refresh_interval = setpoint_refresh_interval  # Command keep-alive period (0 = off)
+        self._valve_update_interval = valve_update_interval  # Seconds between periodic valve passes
+        self._feedforward_gain = feedforward_gain  # Valve % per °C target above outdoors
+        self._trace = trace  # Log a trace of every pass at INFO, whatever the log level
+        self._max_dt = max_dt  # Longest time step integrated at once
+
+        # The hub's monotonic time source for all control loop timing, in
+        # seconds; wall-clock jumps (DST, NTP) cannot produce negative or
+        # huge steps
+        self._clock = hub.clock
+
+        # Shared reference/target inputs, sampled once per hub
+        self._hub = hub
+        # The TRV's own temperature, filtered like the hub's reference
+        self.trv_filter = SensorFilter(trv_temp_filter, hub.sensor_max_age)
+
+        # PI controller (gains, valve step, integrator, last valve position);
+        # its valve step is the configured one, widened by the travel budget
+        self.controller = PIController(p_gain, i_gain, valve_step)
+        self._valve_step = valve_step
 
-        # PI controller state
-        self._integrator: float = 0.0
-        self._last_update: datetime | None = None
-        self._last_trv_update: datetime | None = None  # Track TRV temperature updates
+        # Valve travel, commands and battery cost over the last 24 hours
+        self.budget = ActuationBudget(daily_travel_budget, hub.clock)
+
+        # Control loop state
+        self._last_update: float | None = None  # Clock time of the last PI update
+        self._last_trv_update: float | None = None  # Clock time of the last setpoint pass
         self._last_target_temp: float | None = None  # Track target temp changes
-        self._last_valve_position: int | None = None  # Track last sent valve position
         self._last_error: float = 0.0
         self._last_hvac_action: str | None = None  # Track transitions
         self._startup_attempts: int = 0  # Track startup attempts
+        self._commanded_setpoint: float | None = None  # Last setpoint sent to the TRV
+        self._feedforward_bias: float = 0.0  # Valve % added to the PI output
+        self._feedforward_target: float | None = None  # Target the bias was computed for
+        self._preheat = PreheatPlanner()  # Heat-up rate and pre-heat window
+        self._preheat_planned_for: float | None = None  # Target the window was planned from
+        self._cancel_preheat_start: CALLBACK_TYPE | None = None  # Timer for the window start
+        self._pass_trace: PassTrace | None = None  # Trace of the running pass, if traced
 
-        # Data storage
-        self.data: dict[str, Any] = {
-            "error": 0.0,
-            "integrator": 0.0,
-            "temp_adjustment": 0.0,
-            "valve_output": 0,  # Integer valve position
-            "hvac_action": None,  # Current TRV hvac_action
-            "reference_temp": None,
-            "target_temp": None,
-            "trv_temp": None,
+        # Recent valve control passes, queried through the get_history service
+        self.history = PassHistory()
+
+        # Gains recommended by the last auto-tune, shown on the gain entities
+        self.autotune_result: AutotuneResult | RelayTuneResult | None = None
+
+        # Passes are held back until async_start (after Home Assistant started)
+        self._started: bool = False
+        # Control is suspended while a tuning experiment drives the valve
+        self._suspended: bool = False
+
+        # Single-flight pass execution: at most one running, at most one pending
+        self._cancel_scheduled_pass: CALLBACK_TYPE | None = None
+        self._pass_task: asyncio.Task | None = None
+        self._pending_pass: str | None = None
+
+        # Diagnostic counters
+        self.stats: dict[str, int] = {
+            "events_received": 0,
+            "events_coalesced": 0,
+            "control_passes": 0,
+            "passes_dropped": 0,
+            "events_echo": 0,
+            "events_ignored": 0,
+            "setpoint_writes": 0,
+            "setpoint_writes_suppressed": 0,
+            "valve_commands_sent": 0,
+            "valve_commands_skipped": 0,
+            "anti_windup_activations": 0,
+            "idle_to_heating_transitions": 0,
+            "heating_to_idle_transitions": 0,
+            "dt_clamped": 0,
         }
+        self.pass_latency = Histogram(PASS_LATENCY_BUCKETS)
+
+        # Data storage
+        self.data = ControllerData(valve_step=valve_step)
 
         # Listeners
         self._remove_listeners: list = []
 
-    async def async_setup(self) -> None:
-        """Set up the coordinator."""
-        # Track state changes for immediate updates
+    @callback
+    def async_setup(self) -> None:
+        """Set up listeners; control starts with async_start."""
+        # Reference and target temperature changes are pushed by the hub
+        self._hub.async_register(self)
+        self._sample_trv_temp(self.hass.states.get(self.trv_entity))
+        self._plan_preheat()
+        self._update_feedforward_bias()
+
+        # Track TRV state changes for immediate updates
         self._remove_listeners.append(
             async_track_state_change_event(
                 self.hass,
-                [
-                    self.reference_temp_entity,
-                    self.target_temp_entity,
-                    self.trv_entity,
-                ],
+                [self.trv_entity],
                 self._handle_state_change,
             )
         )
 
-        # Track periodic valve updates (every minute)
+        # Periodic valve updates, driven by the integration-wide ticker
         if self.valve_position_entity:
             self._remove_listeners.append(
-                async_track_time_interval(
-                    self.hass,
-                    self._handle_valve_update,
-                    VALVE_UPDATE_INTERVAL,
+                async_get_valve_ticker(self.hass).async_register(
+                    self, self._valve_update_interval
                 )
             )
 
-        # Initial update
-        await self._async_update_data()
+    async def async_start(self) -> float:
+        """Run the first control pass and enable event-driven passes.
+
+        Returns:
+            Seconds the first pass took
+        """
+        start = self._clock()
+        self._started = True
+
+        # Initial update, run through the single-flight runner so that
+        # events arriving meanwhile are merged into a follow-up pass
+        if self._cancel_scheduled_pass is None and self._pass_task is None:
+            self._start_pass(PASS_FULL)
+        if (task := self._pass_task) is not None:
+            await asyncio.shield(task)
+
+        return self._clock() - start
 
     async def async_shutdown(self) -> None:
         """Shutdown the coordinator."""
+        self._started = False
+        self._hub.async_unregister(self)
+        self._hub.command_cache.forget(self.trv_entity)
+        self._hub.scheduler.async_cancel(self.trv_entity)
+        if self.valve_position_entity:
+            self._hub.command_cache.forget(self.valve_position_entity)
+            self._hub.scheduler.async_cancel(self.valve_position_entity)
+        self._async_cancel_passes()
+        if self._cancel_preheat_start is not None:
+            self._cancel_preheat_start()
+            self._cancel_preheat_start = None
         for remove_listener in self._remove_listeners:
             remove_listener()
         self._remove_listeners.clear()
 
+    @callback
+    def _async_cancel_passes(self) -> None:
+        """Cancel queued, pending and running control passes."""
+        if self._cancel_scheduled_pass is not None:
+            self._cancel_scheduled_pass()
+            self._cancel_scheduled_pass = None
+        self._pending_pass = None
+        if self._pass_task is not None:
+            self._pass_task.cancel()
+            self._pass_task = None
+
+    @property
+    def clock(self) -> Callable[[], float]:
+        """Return the monotonic time source of the control loop."""
+        return self._clock
+
+    @property
+    def suspended(self) -> bool:
+        """Return True while control is handed over to a tuning experiment."""
+        return self._suspended
+
+    @callback
+    def async_suspend(self) -> None:
+        """Stop controlling the TRV and valve until async_resume.
+
+        Only this device is affected; events keep being counted and the
+        first pass after resuming picks up the latest state.
+        """
+        self._suspended = True
+        self._async_cancel_passes()
+        self._hub.scheduler.async_cancel(self.trv_entity)
+        if self.valve_position_entity:
+            self._hub.scheduler.async_cancel(self.valve_position_entity)
+
+    @callback
+    def async_resume(self) -> None:
+        """Take back control, overwriting whatever was sent meanwhile."""
+        self._suspended = False
+        self._hub.command_cache.forget(self.trv_entity)
+        if self.valve_position_entity:
+            self._hub.command_cache.forget(self.valve_position_entity)
+        # Force a setpoint write and start the PI step from a fresh dt
+        self._last_trv_update = None
+        self._last_update = None
+        self.controller.last_valve_position = None
+        self.async_request_update()
+
     @callback
     def _handle_state_change(self, event: Event) -> None:
-        """Handle state changes of monitored entities."""
-        self.hass.async_create_task(self._async_update_data())
+        """Handle state changes of the TRV entity."""
+        self._sample_trv_temp(event.data.get("new_state"))
+        if self._is_self_induced(event.data.get("old_state"), event.data.get("new_state")):
+            return
+        self.async_request_update()
+
+    def _is_self_induced(self, old_state: State | None, new_state: State | None) -> bool:
+        """Return True if a TRV update carries nothing new for the control loop.
+
+        Our own set_temperature and valve commands come back as state changes
+        of the TRV. When an update only echoes those commands (or only touches
+        attributes the loop doesn't use, such as battery or link quality), a
+        control pass would just recompute the same result.
+        """
+        if old_state is None or new_state is None or old_state.state != new_state.state:
+            return False
+
+        old_attrs = old_state.attributes
+        new_attrs = new_state.attributes
+        for attr in CONTROL_ATTRIBUTES:
+            if old_attrs.get(attr) != new_attrs.get(attr):
+                return False
+
+        echo = False
+        new_setpoint = new_attrs.get("temperature")
+        if new_setpoint != old_attrs.get("temperature"):
+            # A setpoint change we didn't command (e.g. manual) must be handled
+            if not self._matches_commanded_setpoint(new_setpoint, new_attrs):
+                return False
+            echo = True
+
+        if (last_valve_position := self.controller.last_valve_position) is not None:
+            for attr in VALVE_ATTRIBUTES:
+                value = new_attrs.get(attr)
+                if value != old_attrs.get(attr) and value == last_valve_position:
+                    echo = True
+
+        self.stats["events_echo" if echo else "events_ignored"] += 1
+        return True
+
+    def _sample_trv_temp(self, state: State | None) -> None:
+        """Feed the TRV's current temperature to its filter."""
+        if state is None:
+            self.trv_filter.sample(None, 0.0)
+            return
+        try:
+            value = float(state.attributes["current_temperature"])
+        except (KeyError, ValueError, TypeError):
+            value = None
+        self.trv_filter.sample(value, state.last_updated.timestamp())
+
+    def _matches_commanded_setpoint(self, setpoint: Any, attributes: Any) -> bool:
+        """Return True if a reported setpoint is the one we last commanded."""
+        if self._commanded_setpoint is None or setpoint is None:
+            return False
+        try:
+            # The TRV rounds our command to its own resolution
+            step = self._get_target_temp_step(attributes)
+            return abs(float(setpoint) - self._commanded_setpoint) <= step / 2 + 1e-6
+        except (ValueError, TypeError):
+            return False
+
+    @staticmethod
+    def _get_target_temp_step(attributes: Any) -> float:
+        """Return the setpoint resolution reported by the TRV."""
+        try:
+            step = float(attributes.get("target_temp_step") or DEFAULT_TARGET_TEMP_STEP)
+        except (ValueError, TypeError):
+            return DEFAULT_TARGET_TEMP_STEP
+        return step if step > 0 else DEFAULT_TARGET_TEMP_STEP
+
+    @staticmethod
+    def _get_reported_setpoint(attributes: Any) -> float | None:
+        """Return the setpoint the TRV currently reports."""
+        try:
+            return float(attributes["temperature"])
+        except (KeyError, ValueError, TypeError):
+            return None
+
+    @callback
+    def async_handle_hub_update(self) -> None:
+        """Handle a change of the shared reference or target temperature."""
+        if self._hub.target_temp != self._preheat_planned_for:
+            self._plan_preheat()
+        self._update_feedforward_bias()
+        self.async_request_update()
+
+    @callback
+    def async_handle_schedule_update(self) -> None:
+        """Handle a change of the pre-heat schedule."""
+        self._plan_preheat()
+        if self._preheat.active(dt_util.utcnow().timestamp()):
+            self._update_feedforward_bias()
+            self.async_request_update()
+
+    def _plan_preheat(self) -> None:
+        """Compute the pre-heat window, once per schedule or target change.
+
+        A pass is started when the window opens, so the ramp begins on time
+        rather than with the next state change.
+        """
+        self._preheat_planned_for = self._hub.target_temp
+        self._preheat.plan(
+            self._hub.preheat_event,
+            self._hub.preheat_comfort_temp if self._hub.preheat_schedule_entity else None,
+            self._hub.target_temp,
+        )
+        window_start = self._preheat.window_start
+        self.data.preheat_start = (
+            dt_util.utc_from_timestamp(window_start).isoformat()
+            if window_start is not None
+            else None
+        )
+
+        if self._cancel_preheat_start is not None:
+            self._cancel_preheat_start()
+            self._cancel_preheat_start = None
+        if (
+            window_start is not None
+            and (delay := window_start - dt_util.utcnow().timestamp()) > 0
+        ):
+            self._cancel_preheat_start = async_call_later(
+                self.hass, delay, self._handle_preheat_start
+            )
+
+    @callback
+    def _handle_preheat_start(self, now: datetime) -> None:
+        """Start ramping the target when the pre-heat window opens."""
+        self._cancel_preheat_start = None
+        self._update_feedforward_bias()
+        self.async_request_update()
+
+    @callback
+    def async_handle_feedforward_update(self) -> None:
+        """Handle a change of the outdoor temperature or forecast."""
+        self._update_feedforward_bias()
+
+    def _update_feedforward_bias(self) -> None:
+        """Precompute the valve bias for the current target and outdoor temperature.
+
+        Heat loss grows with the difference between target and outdoor
+        temperature, so the valve opening needed to hold the target does too.
+        Adding it up front spares the integrator from catching up after
+        every cold night. The target is the effective one, so the bias
+        follows the pre-heat ramp.
+        """
+        outdoor_temp = self._hub.feedforward_temp
+        target_temp = self._feedforward_target = self._effective_target_temp()
+        if not self._feedforward_gain or outdoor_temp is None or target_temp is None:
+            bias = 0.0
+        else:
+            bias = max(0.0, self._feedforward_gain * (target_temp - outdoor_temp))
+
+        if bias != self._feedforward_bias:
+            _LOGGER.debug(
+                "Feed-forward bias for %s: %f -> %f (outdoor=%s)",
+                self.trv_entity, self._feedforward_bias, bias, outdoor_temp
+            )
+            self._feedforward_bias = bias
+            self.data.feedforward_bias = bias
+
+    @callback
+    def async_request_update(self) -> None:
+        """Request a control pass, merging bursts of events into one pass.
+
+        The first event opens a coalescing window; events arriving while a
+        pass is queued are absorbed into it, and events arriving while a pass
+        is running are merged into a single follow-up pass.
+        """
+        self.stats["events_received"] += 1
+
+        if not self._started or self._suspended:
+            # The first pass (after resuming) will pick up this event's state
+            self.stats["events_coalesced"] += 1
+            return
+
+        if self._cancel_scheduled_pass is not None:
+            # A pass is already queued and will see this event's state
+            self.stats["events_coalesced"] += 1
+            return
+
+        if self._pass_task is not None:
+            if self._pending_pass == PASS_FULL:
+                self.stats["events_coalesced"] += 1
+            # A pending valve-only pass is superseded by the full pass
+            self._pending_pass = PASS_FULL
+            return
+
+        self._schedule_pass()
+
+    @callback
+    def _schedule_pass(self) -> None:
+        """Queue a full control pass after the coalescing window."""
+        if self._coalesce_window <= 0:
+            self._start_pass(PASS_FULL)
+            return
+
+        self._cancel_scheduled_pass = async_call_later(
+            self.hass, self._coalesce_window, self._handle_scheduled_pass
+        )
+
+    @callback
+    def _handle_scheduled_pass(self, now: datetime) -> None:
+        """Start the queued control pass once the window has closed."""
+        self._cancel_scheduled_pass = None
+        if self._pass_task is not None:
+            # Still busy, run straight after the current pass instead
+            self._pending_pass = PASS_FULL
+            return
+        self._start_pass(PASS_FULL)
+
+    @callback
+    def _start_pass(self, kind: str) -> None:
+        """Start a control pass as a background task.
+
+        Background tasks keep a slow pass from holding up Home Assistant
+        startup or the passes of other devices.
+        """
+        self._pass_task = self.hass.async_create_background_task(
+            self._async_run_pass(kind), f"{self.name} {kind} pass"
+        )
+
+    async def _async_run_pass(self, kind: str) -> None:
+        """Run a control pass, then the pending pass if one was requested."""
+        # Decide once per pass whether to trace it; untraced passes skip all
+        # trace bookkeeping
+        trace_level = logging.INFO if self._trace else logging.DEBUG
+        trace = self._pass_trace = (
+            PassTrace(entity=self.trv_entity, kind=kind)
+            if self._trace or _LOGGER.isEnabledFor(logging.DEBUG)
+            else None
+        )
+        start = time.perf_counter()
+        try:
+            self.stats["control_passes"] += 1
+            if kind == PASS_FULL:
+                await self._async_update_data()
+            else:
+                await self._async_update_valve_only()
+        except asyncio.CancelledError:
+            raise
+        except Exception:  # noqa: BLE001
+            _LOGGER.exception("Control pass failed for %s", self.trv_entity)
+        finally:
+            # A cancelled pass may unwind after its successor started, leave
+            # the successor's task and trace alone
+            if self._pass_task is asyncio.current_task():
+                self._pass_task = None
+            if self._pass_trace is trace:
+                self._pass_trace = None
+        self.pass_latency.observe(time.perf_counter() - start)
+
+        if trace is not None:
+            _LOGGER.log(trace_level, "Control pass: %s", trace, extra={"trace": trace})
+
+        if self._hub.state_store is not None:
+            self._hub.state_store.async_schedule_save()
+
+        if (pending := self._pending_pass) is not None:
+            self._pending_pass = None
+            if pending == PASS_FULL:
+                self._schedule_pass()
+            else:
+                self._start_pass(pending)
+
+    @callback
+    def async_request_valve_update(self) -> None:
+        """Request a periodic valve-only pass.
+
+        A tick that finds a pass queued or running is stale: that pass already
+        recomputes the valve position from fresh state, so the tick is dropped
+        instead of being queued behind it.
+        """
+        if (
+            not self._started
+            or self._suspended
+            or self._cancel_scheduled_pass is not None
+            or self._pass_task is not None
+        ):
+            self.stats["passes_dropped"] += 1
+            return
+
+        self._start_pass(PASS_VALVE)
+
+    def get_persistent_state(self, saved_at: float) -> dict[str, Any]:
+        """Return the controller state worth keeping across restarts.
+
+        Args:
+            saved_at: Wall time (UTC timestamp) the state is saved at
+        """
+        return {
+            "integrator": self.controller.integrator,
+            "last_valve_position": self.controller.last_valve_position,
+            "last_hvac_action": self._last_hvac_action,
+            "last_trv_update": (
+                # Clock times do not survive a restart, store the wall time
+                dt_util.utc_from_timestamp(
+                    saved_at - (self._clock() - self._last_trv_update)
+                ).isoformat()
+                if self._last_trv_update is not None
+                else None
+            ),
+            "heatup_rates": self._preheat.rates.values(),
+            "actuation": self.budget.get_state(),
+        }
 
     @callback
-    def _handle_valve_update(self, now: datetime) -> None:
-        """Handle periodic valve position updates."""
-        self.hass.async_create_task(self._async_update_valve_only())
+    def async_restore_state(self, state: dict[str, Any]) -> None:
+        """Restore controller state saved by a previous run."""
+        now = dt_util.utcnow().timestamp()
+        try:
+            position = state.get("last_valve_position")
+            self.controller.restore(
+                (
+                    float(state.get("integrator") or 0.0),
+                    int(position) if position is not None else None,
+                )
+            )
+            self._last_hvac_action = state.get("last_hvac_action")
+            if last_trv_update := state.get("last_trv_update"):
+                # Age by the wall clock, never in the future if it went back
+                age = max(0.0, now - datetime.fromisoformat(last_trv_update).timestamp())
+                self._last_trv_update = self._clock() - age
+            for rate in state.get("heatup_rates") or []:
+                self._preheat.rates.append(float(rate))
+            if actuation := state.get("actuation"):
+                self.budget.restore_state(
+                    actuation, max(0.0, now - float(state.get("saved_at") or 0))
+                )
+        except (ValueError, TypeError) as err:
+            _LOGGER.warning("Ignoring invalid saved state for %s: %s", self.trv_entity, err)
+            return
+
+        integrator, last_valve_position = self.controller.snapshot()
+        self.data.integrator = integrator
+        if last_valve_position is not None:
+            self.data.valve_output = last_valve_position
+        _LOGGER.debug(
+            "Restored controller state for %s: integrator=%f, valve=%s",
+            self.trv_entity, integrator, last_valve_position
+        )
+
+    @callback
+    def async_update_settings(self, settings: dict[str, Any]) -> None:
+        """Apply changed device settings in place, keeping controller state."""
+        if CONF_P_GAIN in settings or CONF_I_GAIN in settings:
+            self.update_gains(settings.get(CONF_P_GAIN), settings.get(CONF_I_GAIN))
+        if CONF_TRV_DWELL_TIME in settings:
+            self._trv_dwell_time = settings[CONF_TRV_DWELL_TIME]
+        if CONF_VALVE_STEP in settings:
+            self._valve_step = self.controller.valve_step = settings[CONF_VALVE_STEP]
+        if CONF_DAILY_TRAVEL_BUDGET in settings:
+            self.budget.daily_travel_budget = settings[CONF_DAILY_TRAVEL_BUDGET]
+        if CONF_TRV_TEMP_FILTER in settings:
+            self.trv_filter = SensorFilter(
+                settings[CONF_TRV_TEMP_FILTER], self._hub.sensor_max_age
+            )
+            self._sample_trv_temp(self.hass.states.get(self.trv_entity))
+        if CONF_COALESCE_WINDOW in settings:
+            self._coalesce_window = settings[CONF_COALESCE_WINDOW]
+        if CONF_SETPOINT_MIN_DELTA in settings:
+            self._setpoint_min_delta = settings[CONF_SETPOINT_MIN_DELTA]
+        if CONF_SETPOINT_REFRESH_INTERVAL in settings:
+            self._setpoint_refresh_interval = settings[CONF_SETPOINT_REFRESH_INTERVAL]
+        if CONF_FEEDFORWARD_GAIN in settings:
+            self._feedforward_gain = settings[CONF_FEEDFORWARD_GAIN]
+            self._update_feedforward_bias()
+        if CONF_TRACE in settings:
+            self._trace = settings[CONF_TRACE]
+        if CONF_MAX_DT in settings:
+            self._max_dt = settings[CONF_MAX_DT]
+        if CONF_VALVE_UPDATE_INTERVAL in settings:
+            self._valve_update_interval = settings[CONF_VALVE_UPDATE_INTERVAL]
+            async_get_valve_ticker(self.hass).async_set_interval(
+                self, self._valve_update_interval
+            )
 
     def update_gains(self, p_gain: float | None = None, i_gain: float | None = None) -> None:
         """Update PI controller gains."""
         if p_gain is not None:
-            self._p_gain = p_gain
+            self.controller.p_gain = p_gain
             _LOGGER.debug("Updated P gain to %f", p_gain)
         
         if i_gain is not None:
-            self._i_gain = i_gain
+            self.controller.i_gain = i_gain
             _LOGGER.debug("Updated I gain to %f", i_gain)
 
-    def _get_float_state(self, entity_id: str) -> float | None:
-        """Get numeric state value from entity."""
-        state = self.hass.states.get(entity_id)
-        if state is None or state.state in (STATE_UNAVAILABLE, STATE_UNKNOWN):
-            return None
-        
-        try:
-            return float(state.state)
-        except (ValueError, TypeError):
-            _LOGGER.warning("Could not convert state of %s to float: %s", entity_id, state.state)
-            return None
-
     def _calculate_temperature_compensation(
         self, target_temp: float, reference_temp: float, trv_temp: float
     ) -> float:
@@ -181,100 +719,30 @@ class TRVManagerCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         """
         compensation = trv_temp - reference_temp
         adjusted_target = target_temp + compensation
-        
-        _LOGGER.debug(
-            "Temperature compensation: target=%f, ref=%f, trv=%f, compensation=%f, adjusted=%f",
-            target_temp, reference_temp, trv_temp, compensation, adjusted_target
-        )
-        
-        return adjusted_target
-
-    def _update_pi_controller(self, error: float, dt: float) -> int:
-        """Update PI controller and return valve position output (0-100).
-        
-        Uses back-calculation anti-windup to prevent integrator windup.
-        Output is rounded to steps to prevent micro-adjustments.
-        
-        Args:
-            error: Temperature error (target - reference)
-            dt: Time delta in seconds since last update
-            
-        Returns:
-            Valve position as integer (0-100), rounded to configured step
-        """
-        if dt <= 0:
-            dt = 1.0  # Prevent division by zero
-
-        # Convert dt to minutes for integrator (as per requirements)
-        dt_minutes = dt / 60.0
-
-        # Calculate P and I terms
-        p_term = self._p_gain * error
-        i_term = self._i_gain * self._integrator
 
-        # Desired output (before saturation)
-        valve_output_desired = p_term + i_term
+        if (trace := self._pass_trace) is not None:
+            trace["compensation"] = compensation
 
-        # Apply saturation limits
-        valve_output_actual = max(MIN_VALVE_POSITION, min(MAX_VALVE_POSITION, valve_output_desired))
-
-        # Back-calculation anti-windup
-        if valve_output_desired != valve_output_actual:
-            # We're saturated - calculate excess
-            excess = valve_output_desired - valve_output_actual
-            # Reduce integrator based on excess (back-calculation)
-            self._integrator -= excess * self._anti_windup_gain * dt_minutes
-            _LOGGER.debug(
-                "Anti-windup active: desired=%f, actual=%f, excess=%f, integrator=%f",
-                valve_output_desired, valve_output_actual, excess, self._integrator
-            )
-        else:
-            # Not saturated - normal integration
-            self._integrator += error * dt_minutes
-
-        # Round to step size to prevent micro-adjustments
-        # This prevents 99%->100%->99% oscillations and saves battery
-        valve_stepped = round(valve_output_actual / self._valve_step) * self._valve_step
-        valve_stepped = int(max(MIN_VALVE_POSITION, min(MAX_VALVE_POSITION, valve_stepped)))
-
-        # Apply hysteresis: only change if difference is more than half a step
-        # This prevents ringing at step boundaries (17%->15%, 18%->20%, 17%->15%...)
-        if self._last_valve_position is not None:
-            diff = abs(valve_stepped - self._last_valve_position)
-            # Only change if at least one full step different
-            if diff > 0 and diff < self._valve_step:
-                # Too close to current position, don't change
-                valve_stepped = self._last_valve_position
-                _LOGGER.debug(
-                    "Hysteresis: raw=%f would step to %d%%, but only %d%% from current %d%% (< step=%d%%), keeping current",
-                    valve_output_actual, 
-                    round(valve_output_actual / self._valve_step) * self._valve_step,
-                    diff,
-                    self._last_valve_position,
-                    self._valve_step
-                )
-
-        _LOGGER.debug(
-            "PI Controller: error=%f, dt=%f, P=%f, I=%f, raw=%f, stepped=%d%% (step=%d%%), integrator=%f",
-            error, dt, p_term, i_term, valve_output_actual, valve_stepped, self._valve_step, self._integrator
-        )
-
-        return valve_stepped
+        return adjusted_target
 
-    async def _async_update_data(self) -> dict[str, Any]:
+    async def _async_update_data(self) -> ControllerData:
         """Fetch data and update TRV."""
-        # Get current states
-        reference_temp = self._get_float_state(self.reference_temp_entity)
-        target_temp = self._get_float_state(self.target_temp_entity)
-        
-        # Get TRV current temperature
+        # Get current states (parsed once per hub)
+        reference_temp = self._hub.reference_temp
+        target_temp = self._effective_target_temp()
+        if target_temp != self._feedforward_target:
+            # The pre-heat ramp moves the target between hub updates
+            self._update_feedforward_bias()
+
+        # Get TRV current temperature, filtered as its reports arrived
         trv_state = self.hass.states.get(self.trv_entity)
         trv_temp = None
-        if trv_state and trv_state.attributes.get("current_temperature"):
-            try:
-                trv_temp = float(trv_state.attributes["current_temperature"])
-            except (ValueError, TypeError):
-                pass
+        if trv_state is not None:
+            trv_filter = self.trv_filter
+            trv_temp = trv_filter.value(
+                dt_util.utcnow().timestamp(),
+                reported_at(trv_state) if trv_filter.max_age else None,
+            )
 
         # Validate we have all required data
         if reference_temp is None or target_temp is None or trv_temp is None:
@@ -294,12 +762,12 @@ class TRVManagerCoordinator(DataUpdateCoordinator[dict[str, Any]]):
                     self._startup_attempts, reference_temp, target_temp, trv_temp
                 )
             
-            self.data.update({
-                "reference_temp": reference_temp,
-                "target_temp": target_temp,
-                "trv_temp": trv_temp,
-            })
-            return self.data
+            data = self.data
+            data.reference_temp = reference_temp
+            data.target_temp = target_temp
+            data.trv_temp = trv_temp
+            self._update_raw_data()
+            return data
 
         # Reset startup counter on successful data fetch
         if self._startup_attempts > 0:
@@ -309,6 +777,14 @@ class TRVManagerCoordinator(DataUpdateCoordinator[dict[str, Any]]):
             )
             self._startup_attempts = 0
 
+        trace = self._pass_trace
+        if trace is not None:
+            trace.update(ref=reference_temp, target=target_temp, trv=trv_temp)
+            if (ref_raw := self._hub.reference_filter.raw) != reference_temp:
+                trace["ref_raw"] = ref_raw
+            if (trv_raw := self.trv_filter.raw) != trv_temp:
+                trace["trv_raw"] = trv_raw
+
         # Calculate temperature compensation
         adjusted_target = self._calculate_temperature_compensation(
             target_temp, reference_temp, trv_temp
@@ -318,7 +794,7 @@ class TRVManagerCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         adjusted_target = max(MIN_TRV_TARGET_TEMP, min(MAX_TRV_TARGET_TEMP, adjusted_target))
 
         # Determine if we should update TRV
-        now = datetime.now()
+        now = self._clock()
         target_temp_changed = (
             self._last_target_temp is None or
             abs(target_temp - self._last_target_temp) > 0.01
@@ -326,34 +802,63 @@ class TRVManagerCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         
         dwell_time_elapsed = (
             self._last_trv_update is None or
-            (now - self._last_trv_update).total_seconds() >= self._trv_dwell_time
+            now - self._last_trv_update >= self._trv_dwell_time
         )
         
         # Update TRV if target changed OR dwell time elapsed
         should_update_trv = target_temp_changed or dwell_time_elapsed
 
         if should_update_trv:
-            # Set TRV target temperature
-            await self.hass.services.async_call(
-                CLIMATE_DOMAIN,
-                SERVICE_SET_TEMPERATURE,
-                {
-                    ATTR_ENTITY_ID: self.trv_entity,
-                    ATTR_TEMPERATURE: adjusted_target,
-                },
-                blocking=True,
+            # Send the setpoint at the TRV's own resolution and skip the write
+            # if the TRV already reports that value
+            setpoint = quantize(adjusted_target, self._get_target_temp_step(trv_state.attributes))
+            command_cache = self._hub.command_cache
+            command_cache.confirm(
+                self.trv_entity, self._get_reported_setpoint(trv_state.attributes), now
             )
+
+            # A setpoint the TRV has not confirmed yet is resent after the
+            # dwell time, like valve positions
+            if command_cache.should_send(
+                self.trv_entity,
+                setpoint,
+                now,
+                self._setpoint_min_delta,
+                self._setpoint_refresh_interval,
+                retry_interval=self._trv_dwell_time,
+            ):
+                # Queue TRV target temperature, unchanged resends go last
+                record = command_cache.get(self.trv_entity)
+                self._hub.scheduler.async_submit(
+                    self.trv_entity,
+                    CLIMATE_DOMAIN,
+                    SERVICE_SET_TEMPERATURE,
+                    {
+                        ATTR_ENTITY_ID: self.trv_entity,
+                        ATTR_TEMPERATURE: setpoint,
+                    },
+                    PRIORITY_KEEPALIVE
+                    if record is not None and record.confirmed_value == setpoint
+                    else PRIORITY_SETPOINT,
+                )
+                command_cache.record_sent(self.trv_entity, setpoint, now)
+                self.budget.record_command()
+                self._commanded_setpoint = setpoint
+                self.stats["setpoint_writes"] += 1
+                setpoint_result = "target_changed" if target_temp_changed else "dwell_elapsed"
+            else:
+                self.stats["setpoint_writes_suppressed"] += 1
+                setpoint_result = "unchanged"
+
+            if trace is not None:
+                trace["setpoint"] = setpoint
+                trace["setpoint_write"] = setpoint_result
+
             self._last_trv_update = now
             self._last_target_temp = target_temp
-            
-            if target_temp_changed:
-                _LOGGER.debug("TRV target updated to %f (target temperature changed)", adjusted_target)
-            else:
-                _LOGGER.debug("TRV target updated to %f (dwell time elapsed)", adjusted_target)
-        else:
-            time_remaining = self._trv_dwell_time - (now - self._last_trv_update).total_seconds()
-            _LOGGER.debug(
-                "Skipping TRV update (dwell time: %ds remaining)", int(time_remaining)
+        elif trace is not None:
+            trace["dwell_remaining"] = int(
+                self._trv_dwell_time - (now - self._last_trv_update)
             )
 
         # Calculate error for PI controller
@@ -365,155 +870,262 @@ class TRVManagerCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         # Update PI controller if we have valve control
         valve_output = 0
         if self.valve_position_entity:
-            # Detect transition from idle to heating
-            transitioning_to_heating = (
-                self._last_hvac_action == "idle" and 
-                hvac_action not in ("idle", None)
-            )
-            
-            if hvac_action == "idle":
-                # TRV is idle (not heating), set valve to 100% to allow normal operation
-                # This ensures TRV can heat properly if HA becomes unavailable
-                valve_output = 100
-                
-                # Only send if changed
-                if valve_output != self._last_valve_position:
-                    await self.hass.services.async_call(
-                        NUMBER_DOMAIN,
-                        SERVICE_SET_VALUE,
-                        {
-                            ATTR_ENTITY_ID: self.valve_position_entity,
-                            "value": valve_output,
-                        },
-                        blocking=True,
-                    )
-                    self._last_valve_position = valve_output
-                    
-                    _LOGGER.debug(
-                        "TRV idle, valve set to 100%% (failsafe, was %s)",
-                        self._last_valve_position or "unknown"
-                    )
-            else:
-                # TRV is active, update valve position with PI controller
-                now = datetime.now()
-                dt = (now - self._last_update).total_seconds() if self._last_update else 1.0
-                self._last_update = now
-
-                # On transition from idle to heating, reduce integrator to prevent valve swing
-                if transitioning_to_heating:
-                    # Reduce integrator by 50% to provide smoother transition
-                    old_integrator = self._integrator
-                    self._integrator *= 0.5
-                    _LOGGER.debug(
-                        "Transition idle→heating detected, reducing integrator: %f → %f",
-                        old_integrator, self._integrator
-                    )
-
-                valve_output = self._update_pi_controller(error, dt)
-
-                # Only send command if valve position actually changed
-                if valve_output != self._last_valve_position:
-                    old_position = self._last_valve_position
-                    
-                    await self.hass.services.async_call(
-                        NUMBER_DOMAIN,
-                        SERVICE_SET_VALUE,
-                        {
-                            ATTR_ENTITY_ID: self.valve_position_entity,
-                            "value": valve_output,
-                        },
-                        blocking=True,
-                    )
-                    self._last_valve_position = valve_output
-                    
-                    _LOGGER.debug(
-                        "Valve position updated: hvac_action=%s, %s → %d%% (step=%d%%)",
-                        hvac_action, old_position, valve_output, self._valve_step
-                    )
-                else:
-                    _LOGGER.debug(
-                        "Valve position unchanged at %d%%, skipping update",
-                        valve_output
-                    )
-            
-            # Store current hvac_action for next transition detection
-            self._last_hvac_action = hvac_action
+            valve_output = self._control_valve(error, hvac_action, now)
+        self._record_heatup(reference_temp, hvac_action, valve_output, now)
 
         # Update stored data
-        self.data.update({
-            "error": error,
-            "integrator": self._integrator,
-            "temp_adjustment": adjusted_target - target_temp,
-            "valve_output": valve_output,
-            "hvac_action": hvac_action,
-            "reference_temp": reference_temp,
-            "target_temp": target_temp,
-            "trv_temp": trv_temp,
-        })
+        data = self.data
+        self._update_loop_data(error, valve_output, hvac_action)
+        data.temp_adjustment = adjusted_target - target_temp
+        data.reference_temp = reference_temp
+        data.target_temp = target_temp
+        data.trv_temp = trv_temp
+        self._update_raw_data()
 
         self._last_error = error
 
-        _LOGGER.debug(
-            "Updated: ref=%f, target=%f, trv=%f, adjusted=%f, error=%f, valve=%f",
-            reference_temp, target_temp, trv_temp, adjusted_target, error, valve_output
-        )
+        if trace is not None:
+            trace.update(error=error, adjusted=adjusted_target, hvac_action=hvac_action)
 
         # Notify all listeners (sensors, etc.) that data has been updated
-        self.async_set_updated_data(self.data)
+        self.async_set_updated_data(data)
 
-        return self.data
+        return data
 
     async def _async_update_valve_only(self) -> None:
         """Update only valve position (called periodically)."""
         if not self.valve_position_entity:
             return
 
-        # Get current states
-        reference_temp = self._get_float_state(self.reference_temp_entity)
-        target_temp = self._get_float_state(self.target_temp_entity)
+        # Get current states (parsed once per hub)
+        reference_temp = self._hub.reference_temp
+        target_temp = self._effective_target_temp()
 
         if reference_temp is None or target_temp is None:
             return
+        if target_temp != self._feedforward_target:
+            self._update_feedforward_bias()
+
+        # The ramping target has to reach the TRV setpoint too
+        if self._preheat.active(dt_util.utcnow().timestamp()):
+            self._pending_pass = PASS_FULL
 
         # Check if TRV is actively heating
         trv_state = self.hass.states.get(self.trv_entity)
         hvac_action = trv_state.attributes.get("hvac_action") if trv_state else None
-        
+
+        if (trace := self._pass_trace) is not None:
+            trace.update(ref=reference_temp, target=target_temp, hvac_action=hvac_action)
+
+        error = target_temp - reference_temp
+        now = self._clock()
+        valve_output = self._control_valve(error, hvac_action, now)
+        self._record_heatup(reference_temp, hvac_action, valve_output, now)
+
+        # Update stored data
+        self._update_loop_data(error, valve_output, hvac_action)
+
+        # Notify listeners
+        self.async_set_updated_data(self.data)
+
+    def _update_loop_data(
+        self, error: float, valve_output: int, hvac_action: str | None
+    ) -> None:
+        """Store the values every pass kind produces."""
+        data = self.data
+        data.error = error
+        data.integrator = self.controller.integrator
+        data.valve_output = valve_output
+        data.hvac_action = hvac_action
+        data.valve_travel = self.budget.travel()
+        data.valve_step = self.controller.valve_step
+
+    def _update_raw_data(self) -> None:
+        """Store the unfiltered inputs next to the filtered ones."""
+        self.data.reference_temp_raw = self._hub.reference_filter.raw
+        self.data.trv_temp_raw = self.trv_filter.raw
+
+    def _effective_target_temp(self) -> float | None:
+        """Return the hub target, raised along the ramp while pre-heating."""
+        if (target_temp := self._hub.target_temp) is None:
+            return None
+        return self._preheat.target(dt_util.utcnow().timestamp(), target_temp)
+
+    def _control_valve(
+        self, error: float, hvac_action: str | None, now: float
+    ) -> int:
+        """Run the valve part of a control pass and return the valve output.
+
+        Shared by the event-driven and the periodic pass so both apply the
+        same idle failsafe, transition handling and change detection.
+        """
+        controller = self.controller
+        trace = self._pass_trace
+
+        # Detect transition from idle to heating
+        transitioning_to_heating = (
+            self._last_hvac_action == "idle" and
+            hvac_action not in ("idle", None)
+        )
+
         if hvac_action == "idle":
-            # TRV is idle, set valve to 100% to allow TRV to work independently
-            # This is a safety feature - if HA fails, TRV can still heat
+            if self._last_hvac_action not in ("idle", None):
+                self.stats["heating_to_idle_transitions"] += 1
+            # TRV is idle (not heating), set valve to 100% to allow normal operation
+            # This ensures TRV can heat properly if HA becomes unavailable
             valve_output = 100
-            _LOGGER.debug("TRV idle, setting valve to 100%% (failsafe)")
+            controller.skip()
         else:
-            # Calculate error
-            error = target_temp - reference_temp
+            # TRV is active, update valve position with PI controller
+            dt = self._pi_dt(now)
+
+            # On transition from idle to heating, reduce integrator to prevent valve swing
+            if transitioning_to_heating:
+                # Reduce integrator by 50% to provide smoother transition
+                controller.resume_heating()
+                self.stats["idle_to_heating_transitions"] += 1
+                if trace is not None:
+                    trace["idle_to_heating"] = True
+
+            self._adapt_valve_step()
+            valve_output = controller.update(error, dt, self._feedforward_bias)
+            if controller.windup_excess:
+                self.stats["anti_windup_activations"] += 1
+            if trace is not None:
+                trace.update(
+                    dt=dt,
+                    p=controller.p_term,
+                    i=controller.i_term,
+                    ff=self._feedforward_bias,
+                    raw=controller.raw_output,
+                    windup_excess=controller.windup_excess,
+                    integrator=controller.integrator,
+                )
+                if controller.held is not None:
+                    trace["hysteresis_held"] = controller.held
 
-            # Update PI controller
-            now = datetime.now()
-            dt = (now - self._last_update).total_seconds() if self._last_update else 1.0
-            self._last_update = now
+        sent = self._set_valve_position(valve_output, now)
+        self.history.append(
+            dt_util.utcnow().timestamp(),
+            error,
+            controller.p_term,
+            controller.i_term,
+            controller.raw_output,
+            valve_output,
+            hvac_action,
+            sent,
+        )
+        if trace is not None:
+            trace["valve"] = valve_output
+            trace["valve_sent"] = sent
+
+        # Store current hvac_action for next transition detection
+        self._last_hvac_action = hvac_action
+
+        return valve_output
+
+    def _record_heatup(
+        self, reference_temp: float, hvac_action: str | None, valve_output: int, now: float
+    ) -> None:
+        """Learn the heat-up rate from passes at (nearly) full heat.
+
+        Without a valve entity the TRV drives its own valve, so heating is
+        taken at its word.
+        """
+        self._preheat.record(
+            now,
+            reference_temp,
+            hvac_action not in ("idle", None)
+            and (not self.valve_position_entity or valve_output >= HEATUP_MIN_VALVE),
+        )
+
+    def _adapt_valve_step(self) -> None:
+        """Widen the valve step, and with it the hysteresis band, as the budget runs out.
+
+        A wider step means fewer and larger valve moves: the controller
+        still reaches every region of its output range, it just stops
+        chasing small corrections that cost travel and battery.
+        """
+        step = self._valve_step
+        if (factor := self.budget.step_factor()) > 1.0:
+            step = max(step, min(MAX_ADAPTIVE_VALVE_STEP, round(step * factor)))
+            if (trace := self._pass_trace) is not None:
+                trace["valve_step"] = step
+        self.controller.valve_step = step
+
+    def _pi_dt(self, now: float) -> float:
+        """Return the PI time step since the last update.
+
+        The first update after a start or resume has no previous update to
+        measure from and uses a nominal step. Gaps longer than the maximum
+        time step (an idle period, a stalled event loop, a TRV that stopped
+        reporting) are clamped, so a single step cannot blow up the
+        integrator.
+        """
+        last_update = self._last_update
+        self._last_update = now
+        if last_update is None:
+            return FIRST_UPDATE_DT
+
+        dt = now - last_update
+        if dt > self._max_dt:
+            self.stats["dt_clamped"] += 1
+            if (trace := self._pass_trace) is not None:
+                trace["dt_gap"] = dt
+            return self._max_dt
+        return dt
 
-            valve_output = self._update_pi_controller(error, dt)
-            _LOGGER.debug("Valve update: error=%f, valve=%d%%, hvac_action=%s", error, valve_output, hvac_action)
+    def _set_valve_position(self, valve_output: int, now: float) -> bool:
+        """Queue a valve position unless the valve already reports it.
 
-        # Set valve position
-        await self.hass.services.async_call(
+        Returns:
+            True if a command was queued
+        """
+        command_cache = self._hub.command_cache
+        command_cache.confirm(
+            self.valve_position_entity,
+            parse_float_state(self.hass.states.get(self.valve_position_entity)),
+            now,
+        )
+
+        # Either way the valve is (or is about to be) at this position
+        self.controller.last_valve_position = valve_output
+
+        if not command_cache.should_send(
+            self.valve_position_entity,
+            float(valve_output),
+            now,
+            refresh_interval=self._setpoint_refresh_interval,
+            retry_interval=self._trv_dwell_time,
+        ):
+            self.stats["valve_commands_skipped"] += 1
+            return False
+
+        record = command_cache.get(self.valve_position_entity)
+        # Travel from where the valve last reported (or was last sent to)
+        previous = None
+        if record is not None:
+            previous = (
+                record.confirmed_value
+                if record.confirmed_value is not None
+                else record.sent_value
+            )
+        self.budget.record_command(
+            abs(valve_output - previous) if previous is not None else 0.0
+        )
+
+        self._hub.scheduler.async_submit(
+            self.valve_position_entity,
             NUMBER_DOMAIN,
             SERVICE_SET_VALUE,
             {
                 ATTR_ENTITY_ID: self.valve_position_entity,
                 "value": valve_output,
             },
-            blocking=False,
+            PRIORITY_KEEPALIVE
+            if record is not None and record.confirmed_value == valve_output
+            else PRIORITY_VALVE,
         )
-
-        # Update stored data
-        self.data.update({
-            "error": target_temp - reference_temp if reference_temp else 0,
-            "integrator": self._integrator,
-            "valve_output": valve_output,
-        })
-
-        # Notify listeners
-        self.async_set_updated_data(self.data)
-
+        command_cache.record_sent(self.valve_position_entity, float(valve_output), now)
+        self.stats["valve_commands_sent"] += 1
+        return True
@@ -0,0 +1,61 @@
+"""Diagnostics support for TRV Manager."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .coordinator import TRVManagerCoordinator
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    hub = entry_data["hub"]
+
+    devices = {}
+    for device_id, device_data in entry_data["coordinators"].items():
+        coordinator: TRVManagerCoordinator = device_data["coordinator"]
+        devices[device_id] = {
+            "device_name": device_data["device_name"],
+            "trv_entity": device_data["trv_entity"],
+            "data": coordinator.data.as_dict(),
+            "stats": dict(coordinator.stats),
+            "pass_latency": coordinator.pass_latency.as_dict(),
+            "actuation": coordinator.budget.as_dict(),
+            "trv_temp_filter": coordinator.trv_filter.as_dict(),
+            "autotune": (
+                coordinator.autotune_result.as_dict()
+                if coordinator.autotune_result
+                else None
+            ),
+            "history": coordinator.history.as_list(),
+            "relay_tune": (
+                tuner.as_dict()
+                if (tuner := entry_data["relay_tuners"].get(device_id))
+                else None
+            ),
+        }
+
+    return {
+        "hub": {
+            "name": entry_data["hub_name"],
+            "reference_temp_entity": hub.reference_temp_entity,
+            "reference_temp": hub.reference_temp,
+            "reference_filter": hub.reference_filter.as_dict(),
+            "target_temp_entity": hub.target_temp_entity,
+            "target_temp": hub.target_temp,
+            "outdoor_temp_entity": hub.outdoor_temp_entity,
+            "outdoor_temp": hub.outdoor_temp,
+            "forecast_entity": hub.forecast_entity,
+            "forecast_temp": hub.forecast_temp,
+            "preheat_schedule_entity": hub.preheat_schedule_entity,
+            "preheat_event": hub.preheat_event,
+            "command_scheduler": hub.scheduler.as_dict(),
+        },
+        "devices": devices,
+    }
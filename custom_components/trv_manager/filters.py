@@ -0,0 +1,224 @@
+"""Streaming filters for the temperature inputs of TRV Manager.
+
+Plain Python with no Home Assistant references. Every filter keeps a
+constant amount of state, so a sample costs O(1) whatever its history.
+"""
+from __future__ import annotations
+
+from collections import deque
+from typing import Any
+
+from .const import (
+    FILTER_EMA,
+    FILTER_EMA_ALPHA,
+    FILTER_KALMAN,
+    FILTER_KALMAN_MEASUREMENT_NOISE,
+    FILTER_KALMAN_PROCESS_NOISE,
+    FILTER_MEDIAN,
+    FILTER_MEDIAN_SIZE,
+    FILTER_NONE,
+    FILTER_OUTLIER_CONFIRM,
+    FILTER_OUTLIER_LIMIT,
+)
+
+
+class _Passthrough:
+    """Estimate that is the latest sample."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: float) -> None:
+        """Start from a first sample."""
+        self.value = value
+
+    def update(self, sample: float, dt: float) -> float:
+        """Add a sample taken dt seconds after the previous one."""
+        self.value = sample
+        return sample
+
+
+class _EMA(_Passthrough):
+    """Exponential moving average with a fixed weight per sample."""
+
+    __slots__ = ()
+
+    def update(self, sample: float, dt: float) -> float:
+        """Add a sample taken dt seconds after the previous one."""
+        self.value += FILTER_EMA_ALPHA * (sample - self.value)
+        return self.value
+
+
+class _Median(_Passthrough):
+    """Median of the last FILTER_MEDIAN_SIZE samples."""
+
+    __slots__ = ("_window",)
+
+    def __init__(self, value: float) -> None:
+        """Start from a first sample."""
+        super().__init__(value)
+        self._window: deque[float] = deque((value,), maxlen=FILTER_MEDIAN_SIZE)
+
+    def update(self, sample: float, dt: float) -> float:
+        """Add a sample taken dt seconds after the previous one."""
+        self._window.append(sample)
+        # Sorting a window of fixed, small size is constant work per sample
+        ordered = sorted(self._window)
+        middle = len(ordered) // 2
+        self.value = (
+            ordered[middle]
+            if len(ordered) % 2
+            else (ordered[middle - 1] + ordered[middle]) / 2
+        )
+        return self.value
+
+
+class _Kalman(_Passthrough):
+    """Scalar Kalman filter for a slowly drifting temperature.
+
+    The temperature is modelled as a random walk whose variance grows by
+    FILTER_KALMAN_PROCESS_NOISE per second, so a sample after a long gap
+    is trusted more than one straight after the previous sample.
+    """
+
+    __slots__ = ("_variance",)
+
+    def __init__(self, value: float) -> None:
+        """Start from a first sample."""
+        super().__init__(value)
+        self._variance = FILTER_KALMAN_MEASUREMENT_NOISE
+
+    def update(self, sample: float, dt: float) -> float:
+        """Add a sample taken dt seconds after the previous one."""
+        variance = self._variance + FILTER_KALMAN_PROCESS_NOISE * max(dt, 0.0)
+        gain = variance / (variance + FILTER_KALMAN_MEASUREMENT_NOISE)
+        self.value += gain * (sample - self.value)
+        self._variance = (1.0 - gain) * variance
+        return self.value
+
+
+FILTERS: dict[str, type[_Passthrough]] = {
+    FILTER_NONE: _Passthrough,
+    FILTER_EMA: _EMA,
+    FILTER_MEDIAN: _Median,
+    FILTER_KALMAN: _Kalman,
+}
+
+
+class SensorFilter:
+    """Filtered temperature input with outlier rejection and staleness.
+
+    With a filter selected, a sample that jumps more than
+    FILTER_OUTLIER_LIMIT away from the estimate is held back. If the
+    readings stay away for FILTER_OUTLIER_CONFIRM seconds the jump is real
+    (a window opened, the heating came on) and the filter restarts from
+    it; a single spike is dropped as soon as a normal reading arrives.
+    Without a filter every reading is used as it arrives.
+
+    An input whose last report is older than max_age is stale and reads
+    as missing, so the control loop waits instead of acting on it.
+    """
+
+    __slots__ = (
+        "kind",
+        "max_age",
+        "raw",
+        "stale",
+        "outliers_rejected",
+        "_estimate",
+        "_sampled_at",
+        "_outlier_since",
+    )
+
+    def __init__(self, kind: str = FILTER_NONE, max_age: float = 0.0) -> None:
+        """Initialize the filter.
+
+        Args:
+            kind: One of FILTERS
+            max_age: Seconds after the last report the input is stale (0 = never)
+        """
+        self.kind = kind if kind in FILTERS else FILTER_NONE
+        self.max_age = max_age
+        self.raw: float | None = None  # Latest reading, rejected or not
+        self.stale = False
+        self.outliers_rejected = 0
+        self._estimate: _Passthrough | None = None
+        self._sampled_at = 0.0
+        self._outlier_since: float | None = None  # When the pending jump began
+
+    @property
+    def filtered(self) -> float | None:
+        """Return the filtered value, whatever its age."""
+        return self._estimate.value if self._estimate is not None else None
+
+    def sample(self, raw: float | None, timestamp: float) -> None:
+        """Add a reading.
+
+        Args:
+            raw: Reading, None if the input is unavailable
+            timestamp: When the input reported it (seconds since the epoch)
+        """
+        if raw is None:
+            # Unavailable: start afresh from the next reading
+            self.raw = None
+            self._estimate = None
+            self._outlier_since = None
+            return
+        if raw == self.raw:
+            # Repeated report (only other attributes changed)
+            return
+        self.raw = raw
+
+        estimate = self._estimate
+        if estimate is None:
+            self._restart(raw, timestamp)
+            return
+
+        if self.kind != FILTER_NONE and abs(raw - estimate.value) > FILTER_OUTLIER_LIMIT:
+            if self._outlier_since is None:
+                self._outlier_since = timestamp
+            if timestamp - self._outlier_since < FILTER_OUTLIER_CONFIRM:
+                self.outliers_rejected += 1
+                return
+            self._restart(raw, timestamp)
+            return
+
+        self._outlier_since = None
+        estimate.update(raw, timestamp - self._sampled_at)
+        self._sampled_at = timestamp
+
+    def _restart(self, raw: float, timestamp: float) -> None:
+        """Start the estimate over from a reading."""
+        self._estimate = FILTERS[self.kind](raw)
+        self._sampled_at = timestamp
+        self._outlier_since = None
+
+    def value(self, now: float, reported_at: float | None) -> float | None:
+        """Return the filtered value, None while missing or stale.
+
+        Args:
+            now: Current time (seconds since the epoch)
+            reported_at: When the input last reported (seconds since the epoch)
+        """
+        if self._estimate is None:
+            return None
+        if (
+            self._outlier_since is not None
+            and self.raw is not None
+            and now - self._outlier_since >= FILTER_OUTLIER_CONFIRM
+        ):
+            # The jump outlasted the confirmation time without a new reading
+            self._restart(self.raw, now)
+        self.stale = bool(
+            self.max_age and reported_at is not None and now - reported_at > self.max_age
+        )
+        return None if self.stale else self._estimate.value
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the filter state for diagnostics."""
+        return {
+            "kind": self.kind,
+            "raw": self.raw,
+            "filtered": self.filtered,
+            "stale": self.stale,
+            "outliers_rejected": self.outliers_rejected,
+        }
@@ -0,0 +1,93 @@
+"""Control pass history for TRV Manager."""
+from __future__ import annotations
+
+from array import array
+import math
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+
+from .const import PASS_HISTORY_SIZE
+
+# hvac_action values stored as a small code; anything else is stored as 0
+HVAC_ACTIONS: tuple[str | None, ...] = (None, "idle", "heating", "preheating", "off")
+
+
+class PassHistory:
+    """Fixed-size ring buffer of the most recent valve control passes.
+
+    One typed array per field keeps it at 27 bytes per pass (about 3.5 KB
+    per device at the default size) with no per-pass objects to collect.
+    Terms that were not computed (the idle failsafe skips the PI step) are
+    stored as NaN.
+    """
+
+    def __init__(self, size: int = PASS_HISTORY_SIZE) -> None:
+        """Initialize the buffer."""
+        self._size = size
+        self._index = 0
+        self._count = 0
+        self._timestamp = array("d", bytes(8 * size))
+        self._error = array("f", bytes(4 * size))
+        self._p_term = array("f", bytes(4 * size))
+        self._i_term = array("f", bytes(4 * size))
+        self._raw_output = array("f", bytes(4 * size))
+        self._output = array("b", bytes(size))
+        self._hvac_action = array("b", bytes(size))
+        self._sent = array("b", bytes(size))
+
+    def __len__(self) -> int:
+        """Return the number of passes stored."""
+        return self._count
+
+    def append(
+        self,
+        timestamp: float,
+        error: float,
+        p_term: float,
+        i_term: float,
+        raw_output: float,
+        output: int,
+        hvac_action: str | None,
+        sent: bool,
+    ) -> None:
+        """Record a pass, overwriting the oldest once full."""
+        index = self._index
+        self._timestamp[index] = timestamp
+        self._error[index] = error
+        self._p_term[index] = p_term
+        self._i_term[index] = i_term
+        self._raw_output[index] = raw_output
+        self._output[index] = output
+        self._hvac_action[index] = (
+            HVAC_ACTIONS.index(hvac_action) if hvac_action in HVAC_ACTIONS else 0
+        )
+        self._sent[index] = sent
+        self._index = (index + 1) % self._size
+        self._count = min(self._count + 1, self._size)
+
+    def as_list(self, limit: int | None = None) -> list[dict[str, Any]]:
+        """Return the stored passes (at most limit, the newest), oldest first."""
+        count = self._count if limit is None else min(limit, self._count)
+        start = (self._index - count) % self._size
+        return [
+            self._entry((start + offset) % self._size) for offset in range(count)
+        ]
+
+    def _entry(self, index: int) -> dict[str, Any]:
+        """Return one stored pass."""
+        return {
+            "time": dt_util.utc_from_timestamp(self._timestamp[index]).isoformat(),
+            "error": _round(self._error[index]),
+            "p_term": _round(self._p_term[index]),
+            "i_term": _round(self._i_term[index]),
+            "raw_output": _round(self._raw_output[index]),
+            "output": self._output[index],
+            "hvac_action": HVAC_ACTIONS[self._hvac_action[index]],
+            "command_sent": bool(self._sent[index]),
+        }
+
+
+def _round(value: float) -> float | None:
+    """Round a stored float for output, NaN (not computed) becomes None."""
+    return None if math.isnan(value) else round(value, 3)
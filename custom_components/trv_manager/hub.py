@@ -0,0 +1,329 @@
+"""Shared hub state for TRV Manager."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+import logging
+import time
+from typing import TYPE_CHECKING
+
+from homeassistant.const import (
+    ATTR_ENTITY_ID,
+    STATE_OFF,
+    STATE_UNAVAILABLE,
+    STATE_UNKNOWN,
+)
+from homeassistant.core import Event, HomeAssistant, State, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import async_track_state_change_event
+from homeassistant.util import dt as dt_util
+
+from .commands import CommandCache
+from .const import (
+    DEFAULT_COMMAND_INTERVAL,
+    DEFAULT_COMMAND_JITTER,
+    DEFAULT_FILTER,
+    DEFAULT_PREHEAT_COMFORT_TEMP,
+    DEFAULT_SENSOR_MAX_AGE,
+    FORECAST_LOOKAHEAD,
+)
+from .filters import SensorFilter
+from .scheduler import TRVManagerCommandScheduler
+
+if TYPE_CHECKING:
+    from .coordinator import TRVManagerCoordinator
+    from .storage import TRVManagerStateStore
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def parse_float_state(state: State | None) -> float | None:
+    """Get numeric state value from a state object."""
+    if state is None or state.state in (STATE_UNAVAILABLE, STATE_UNKNOWN):
+        return None
+
+    try:
+        return float(state.state)
+    except (ValueError, TypeError):
+        _LOGGER.warning(
+            "Could not convert state of %s to float: %s", state.entity_id, state.state
+        )
+        return None
+
+
+def reported_at(state: State | None) -> float | None:
+    """Return when an entity last reported (seconds since the epoch)."""
+    if state is None:
+        return None
+    # last_reported also moves when a sensor repeats an unchanged value,
+    # last_updated only when the value changes
+    return (getattr(state, "last_reported", None) or state.last_updated).timestamp()
+
+
+class TRVManagerHub:
+    """Hub-level inputs shared by all device coordinators.
+
+    The reference and target temperature entities are the same for every
+    device in a hub, so they are subscribed to and parsed once here and the
+    parsed values are pushed to the device coordinators.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        reference_temp_entity: str,
+        target_temp_entity: str,
+        command_interval: float = DEFAULT_COMMAND_INTERVAL,
+        command_jitter: float = DEFAULT_COMMAND_JITTER,
+        state_store: TRVManagerStateStore | None = None,
+        outdoor_temp_entity: str | None = None,
+        forecast_entity: str | None = None,
+        preheat_schedule_entity: str | None = None,
+        preheat_comfort_temp: float = DEFAULT_PREHEAT_COMFORT_TEMP,
+        reference_filter: str = DEFAULT_FILTER,
+        sensor_max_age: float = DEFAULT_SENSOR_MAX_AGE,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the hub."""
+        self.hass = hass
+        # Monotonic time source, in seconds, for the timing of the hub, its
+        # command queue and its devices
+        self.clock = clock
+        self.reference_temp_entity = reference_temp_entity
+        self.target_temp_entity = target_temp_entity
+        self.outdoor_temp_entity = outdoor_temp_entity
+        self.forecast_entity = forecast_entity
+        self.preheat_schedule_entity = preheat_schedule_entity
+        self.preheat_comfort_temp = preheat_comfort_temp
+        self.sensor_max_age = sensor_max_age  # Also applies to the TRV temperatures
+
+        # Last parsed input values; the reference temperature is filtered
+        self.reference_filter = SensorFilter(reference_filter, sensor_max_age)
+        self.target_temp: float | None = None
+        self.outdoor_temp: float | None = None
+        self.forecast_temp: float | None = None  # Mean over FORECAST_LOOKAHEAD
+        self._forecast_task: asyncio.Task | None = None
+        self._forecast_refetch = False  # The weather entity updated during a fetch
+        # Start of the next comfort period (timestamp), None while in one
+        self.preheat_event: float | None = None
+
+        # Last sent/confirmed command values for all devices in the hub
+        self.command_cache = CommandCache()
+
+        # Rate-limited outbound queue for all devices in the hub
+        self.scheduler = TRVManagerCommandScheduler(
+            hass, self.command_cache, command_interval, command_jitter, clock=clock
+        )
+
+        # Controller state persistence (optional)
+        self.state_store = state_store
+
+        self._coordinators: list[TRVManagerCoordinator] = []
+        self._remove_listeners: list = []
+
+    @callback
+    def async_setup(self) -> None:
+        """Sample the shared inputs and start listening for changes."""
+        state = self.hass.states.get(self.reference_temp_entity)
+        self._sample_reference(parse_float_state(state), state)
+        self.target_temp = parse_float_state(
+            self.hass.states.get(self.target_temp_entity)
+        )
+        entities = [self.reference_temp_entity, self.target_temp_entity]
+
+        if self.outdoor_temp_entity:
+            self.outdoor_temp = parse_float_state(
+                self.hass.states.get(self.outdoor_temp_entity)
+            )
+            entities.append(self.outdoor_temp_entity)
+
+        self._remove_listeners.append(
+            async_track_state_change_event(
+                self.hass, entities, self._handle_state_change
+            )
+        )
+
+        if self.forecast_entity:
+            # Forecasts are fetched only when the weather entity updates
+            self._remove_listeners.append(
+                async_track_state_change_event(
+                    self.hass, [self.forecast_entity], self._handle_forecast_change
+                )
+            )
+            self._async_refresh_forecast()
+
+        if self.preheat_schedule_entity:
+            self.preheat_event = self._parse_schedule(
+                self.hass.states.get(self.preheat_schedule_entity)
+            )
+            self._remove_listeners.append(
+                async_track_state_change_event(
+                    self.hass,
+                    [self.preheat_schedule_entity],
+                    self._handle_schedule_change,
+                )
+            )
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Stop listening and release all coordinators."""
+        for remove_listener in self._remove_listeners:
+            remove_listener()
+        self._remove_listeners.clear()
+        self._coordinators.clear()
+        self.scheduler.async_shutdown()
+        self._forecast_refetch = False
+        if self._forecast_task is not None:
+            self._forecast_task.cancel()
+            self._forecast_task = None
+
+    @property
+    def reference_temp(self) -> float | None:
+        """Return the filtered reference temperature, None while missing or stale."""
+        reference_filter = self.reference_filter
+        return reference_filter.value(
+            dt_util.utcnow().timestamp(),
+            reported_at(self.hass.states.get(self.reference_temp_entity))
+            if reference_filter.max_age
+            else None,
+        )
+
+    def _sample_reference(self, value: float | None, state: State | None) -> None:
+        """Feed a parsed reference temperature report to its filter."""
+        self.reference_filter.sample(
+            value, state.last_updated.timestamp() if state is not None else 0.0
+        )
+
+    @property
+    def feedforward_temp(self) -> float | None:
+        """Return the outdoor temperature the feed-forward works from.
+
+        The current outdoor temperature and the forecast for the next hours
+        are averaged, so heating picks up ahead of a cold spell.
+        """
+        values = [
+            value for value in (self.outdoor_temp, self.forecast_temp) if value is not None
+        ]
+        return sum(values) / len(values) if values else None
+
+    @callback
+    def async_register(self, coordinator: TRVManagerCoordinator) -> None:
+        """Register a device coordinator to receive input updates."""
+        if coordinator not in self._coordinators:
+            self._coordinators.append(coordinator)
+
+    @callback
+    def async_unregister(self, coordinator: TRVManagerCoordinator) -> None:
+        """Stop pushing input updates to a device coordinator."""
+        if coordinator in self._coordinators:
+            self._coordinators.remove(coordinator)
+
+    @callback
+    def _handle_state_change(self, event: Event) -> None:
+        """Parse a changed input once and notify the coordinators."""
+        entity_id = event.data["entity_id"]
+        value = parse_float_state(event.data.get("new_state"))
+        changed = False
+
+        # The same entity may be used as both reference and target
+        if entity_id == self.reference_temp_entity:
+            filtered = self.reference_filter.filtered
+            self._sample_reference(value, event.data.get("new_state"))
+            changed = self.reference_filter.filtered != filtered
+        if entity_id == self.target_temp_entity and value != self.target_temp:
+            self.target_temp = value
+            changed = True
+
+        if entity_id == self.outdoor_temp_entity and value != self.outdoor_temp:
+            self.outdoor_temp = value
+            # Only shifts the valve bias; the next valve pass applies it
+            self._async_notify_feedforward()
+
+        # Attribute-only updates (e.g. battery, linkquality) don't affect control
+        if not changed:
+            return
+
+        for coordinator in self._coordinators:
+            coordinator.async_handle_hub_update()
+
+    @callback
+    def _async_notify_feedforward(self) -> None:
+        """Let the coordinators recompute their feed-forward bias."""
+        for coordinator in self._coordinators:
+            coordinator.async_handle_feedforward_update()
+
+    @staticmethod
+    def _parse_schedule(state: State | None) -> float | None:
+        """Return when the next comfort period starts, None during one."""
+        if state is None or state.state != STATE_OFF:
+            return None
+        next_event = state.attributes.get("next_event")
+        if isinstance(next_event, str):
+            next_event = dt_util.parse_datetime(next_event)
+        return next_event.timestamp() if next_event is not None else None
+
+    @callback
+    def _handle_schedule_change(self, event: Event) -> None:
+        """Let the coordinators plan for a changed schedule."""
+        preheat_event = self._parse_schedule(event.data.get("new_state"))
+        if preheat_event == self.preheat_event:
+            return
+        self.preheat_event = preheat_event
+        for coordinator in self._coordinators:
+            coordinator.async_handle_schedule_update()
+
+    @callback
+    def _handle_forecast_change(self, event: Event) -> None:
+        """Refetch the forecast when the weather entity updates."""
+        self._async_refresh_forecast()
+
+    @callback
+    def _async_refresh_forecast(self) -> None:
+        """Fetch the forecast in the background, once at a time.
+
+        An update arriving during a fetch may carry a newer forecast than
+        the one being fetched, so it is fetched again when that one is done.
+        """
+        if self._forecast_task is not None:
+            self._forecast_refetch = True
+            return
+        self._forecast_refetch = False
+        self._forecast_task = self.hass.async_create_background_task(
+            self._async_update_forecast(), f"trv_manager forecast {self.forecast_entity}"
+        )
+
+    async def _async_update_forecast(self) -> None:
+        """Average the forecast temperature over the lookahead period."""
+        try:
+            response = await self.hass.services.async_call(
+                "weather",
+                "get_forecasts",
+                {ATTR_ENTITY_ID: self.forecast_entity, "type": "hourly"},
+                blocking=True,
+                return_response=True,
+            )
+        except HomeAssistantError as err:
+            _LOGGER.debug("Could not get forecast of %s: %s", self.forecast_entity, err)
+            return
+        finally:
+            self._forecast_task = None
+            if self._forecast_refetch:
+                self._async_refresh_forecast()
+
+        now = dt_util.utcnow()
+        horizon = now + FORECAST_LOOKAHEAD
+        temperatures = []
+        for forecast in (response or {}).get(self.forecast_entity, {}).get("forecast", []):
+            when = dt_util.parse_datetime(str(forecast.get("datetime")))
+            if when is None or not now <= when <= horizon:
+                continue
+            try:
+                temperatures.append(float(forecast["temperature"]))
+            except (KeyError, ValueError, TypeError):
+                continue
+
+        forecast_temp = sum(temperatures) / len(temperatures) if temperatures else None
+        if forecast_temp != self.forecast_temp:
+            self.forecast_temp = forecast_temp
+            self._async_notify_feedforward()
@@ -0,0 +1,241 @@
+"""Prometheus-style metrics for TRV Manager."""
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable
+from http import HTTPStatus
+import math
+from typing import Any
+
+from aiohttp import web
+
+from homeassistant.components.http import KEY_HASS, HomeAssistantView
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, METRICS_URL
+
+
+class Histogram:
+    """Cumulative histogram with fixed bucket bounds.
+
+    Observing a value is a bisect and an increment; the per-bucket counts
+    are only accumulated when the histogram is exported.
+    """
+
+    __slots__ = ("_bounds", "_counts", "count", "sum")
+
+    def __init__(self, bounds: Iterable[float]) -> None:
+        """Initialize the histogram with the upper bounds of its buckets."""
+        self._bounds = tuple(sorted(bounds))
+        # One extra bucket for values above the largest bound (+Inf)
+        self._counts = array("L", bytes(array("L").itemsize * (len(self._bounds) + 1)))
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record a value."""
+        self._counts[bisect_left(self._bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def buckets(self) -> list[tuple[float, int]]:
+        """Return (upper bound, cumulative count) pairs, ending with +Inf."""
+        total = 0
+        buckets = []
+        for bound, count in zip((*self._bounds, math.inf), self._counts):
+            total += count
+            buckets.append((bound, total))
+        return buckets
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the histogram for diagnostics."""
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "buckets": {
+                _format_value(bound): count for bound, count in self.buckets()
+            },
+        }
+
+
+class _MetricFamilies:
+    """Samples grouped by metric name, rendered in the text exposition format."""
+
+    def __init__(self) -> None:
+        """Initialize an empty set of families."""
+        self._families: dict[str, tuple[str, str, list[str]]] = {}
+
+    def _samples(self, name: str, kind: str, description: str) -> list[str]:
+        """Return the sample lines of a family, creating it if needed."""
+        if name not in self._families:
+            self._families[name] = (kind, description, [])
+        return self._families[name][2]
+
+    def add(
+        self,
+        name: str,
+        kind: str,
+        description: str,
+        labels: dict[str, str],
+        value: float,
+    ) -> None:
+        """Add a counter or gauge sample."""
+        self._samples(name, kind, description).append(
+            f"{name}{_format_labels(labels)} {_format_value(value)}"
+        )
+
+    def add_histogram(
+        self,
+        name: str,
+        description: str,
+        labels: dict[str, str],
+        histogram: Histogram,
+    ) -> None:
+        """Add the bucket, sum and count samples of a histogram."""
+        samples = self._samples(name, "histogram", description)
+        for bound, count in histogram.buckets():
+            bucket_labels = {**labels, "le": _format_value(bound)}
+            samples.append(f"{name}_bucket{_format_labels(bucket_labels)} {count}")
+        samples.append(
+            f"{name}_sum{_format_labels(labels)} {_format_value(histogram.sum)}"
+        )
+        samples.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+
+    def render(self) -> str:
+        """Return all families in the text exposition format."""
+        lines = []
+        for name, (kind, description, samples) in self._families.items():
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    """Return a label set, escaped as the exposition format requires."""
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(
+            key,
+            value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for key, value in labels.items()
+    )
+    return f"{{{pairs}}}"
+
+
+def _format_value(value: float) -> str:
+    """Return a sample value or bucket bound."""
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_metrics(hass: HomeAssistant) -> str:
+    """Return the metrics of all loaded hubs in the text exposition format."""
+    families = _MetricFamilies()
+    domain_data = hass.data.get(DOMAIN, {})
+
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        if (entry_data := domain_data.get(entry.entry_id)) is None:
+            continue  # Not loaded
+        hub = entry_data["hub"]
+        hub_labels = {"hub": entry_data["hub_name"]}
+
+        scheduler = hub.scheduler
+        for key, value in scheduler.stats.items():
+            families.add(
+                f"{DOMAIN}_{key}_total",
+                "counter",
+                f"Radio commands ({key.replace('_', ' ')}) of the hub scheduler",
+                hub_labels,
+                value,
+            )
+        families.add(
+            f"{DOMAIN}_command_queue_length",
+            "gauge",
+            "Radio commands waiting to be sent",
+            hub_labels,
+            scheduler.queue_length,
+        )
+        families.add(
+            f"{DOMAIN}_outliers_rejected_total",
+            "counter",
+            "Temperature readings held back as outliers",
+            {**hub_labels, "input": "reference"},
+            hub.reference_filter.outliers_rejected,
+        )
+        families.add_histogram(
+            f"{DOMAIN}_service_call_duration_seconds",
+            "Round trip time of the service calls sent by the hub scheduler",
+            hub_labels,
+            scheduler.call_latency,
+        )
+
+        for device_id, device_data in entry_data["coordinators"].items():
+            coordinator = device_data["coordinator"]
+            device_labels = {**hub_labels, "device": device_id}
+            for key, value in coordinator.stats.items():
+                families.add(
+                    f"{DOMAIN}_{key}_total",
+                    "counter",
+                    f"Control loop {key.replace('_', ' ')}",
+                    device_labels,
+                    value,
+                )
+            families.add(
+                f"{DOMAIN}_outliers_rejected_total",
+                "counter",
+                "Temperature readings held back as outliers",
+                {**device_labels, "input": "trv"},
+                coordinator.trv_filter.outliers_rejected,
+            )
+            budget = coordinator.budget
+            families.add(
+                f"{DOMAIN}_valve_travel_percent_total",
+                "counter",
+                "Valve travel commanded since start, in percent",
+                device_labels,
+                budget.total_travel,
+            )
+            families.add(
+                f"{DOMAIN}_device_commands_total",
+                "counter",
+                "Radio commands sent to the device since start",
+                device_labels,
+                budget.total_commands,
+            )
+            families.add(
+                f"{DOMAIN}_battery_cost_24h",
+                "gauge",
+                "Estimated battery cost of the last 24 hours, in command equivalents",
+                device_labels,
+                budget.battery_cost(),
+            )
+            families.add_histogram(
+                f"{DOMAIN}_pass_duration_seconds",
+                "Time spent in a control pass",
+                device_labels,
+                coordinator.pass_latency,
+            )
+
+    return families.render()
+
+
+class TRVManagerMetricsView(HomeAssistantView):
+    """Serve the metrics to Prometheus (authenticated with a long-lived token)."""
+
+    url = METRICS_URL
+    name = f"api:{DOMAIN}:metrics"
+    requires_auth = True
+
+    async def get(self, request: web.Request) -> web.Response:
+        """Return the metrics."""
+        return web.Response(
+            status=HTTPStatus.OK,
+            text=render_metrics(request.app[KEY_HASS]),
+            content_type="text/plain",
+            charset="utf-8",
+        )
@@ -7,7 +7,8 @@ from typing import Any
 from homeassistant.components.number import NumberEntity, NumberMode
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_NAME
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
@@ -22,6 +23,8 @@ from .const import (
     MAX_P_GAIN,
     MIN_I_GAIN,
     MIN_P_GAIN,
+    SIGNAL_DEVICE_ADDED,
+    SIGNAL_SETTINGS_UPDATED,
 )
 from .coordinator import TRVManagerCoordinator
 
@@ -37,20 +40,40 @@ async def async_setup_entry(
     entry_data = hass.data[DOMAIN][entry.entry_id]
     coordinators = entry_data["coordinators"]
 
-    entities = []
-
-    # Create P and I gain entities for each device
-    for device_id, device_data in coordinators.items():
+    @callback
+    def _async_create_entities(device_id: str) -> list[NumberEntity]:
+        """Create P and I gain entities for one device."""
+        device_data = coordinators[device_id]
         coordinator: TRVManagerCoordinator = device_data["coordinator"]
         device_name = device_data["device_name"]
 
-        entities.extend([
+        entities = [
             TRVManagerPGainNumber(coordinator, entry, device_id, device_name),
             TRVManagerIGainNumber(coordinator, entry, device_id, device_name),
-        ])
+        ]
+        # Tracked so a reload can remove a single device's entities
+        entry_data["entities"].setdefault(device_id, []).extend(entities)
+        return entities
+
+    @callback
+    def _async_add_device(device_id: str) -> None:
+        """Add entities for a device added by a reload."""
+        async_add_entities(_async_create_entities(device_id))
+
+    entities = []
+
+    # Create P and I gain entities for each device
+    for device_id in coordinators:
+        entities.extend(_async_create_entities(device_id))
 
     async_add_entities(entities)
 
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_DEVICE_ADDED.format(entry.entry_id), _async_add_device
+        )
+    )
+
 
 class TRVManagerPGainNumber(NumberEntity):
     """Number entity for P gain control."""
@@ -71,7 +94,6 @@ class TRVManagerPGainNumber(NumberEntity):
         self._coordinator = coordinator
         self._entry = entry
         self._device_id = device_id
-        self._attr_native_value = coordinator._p_gain
         self._attr_native_min_value = MIN_P_GAIN
         self._attr_native_max_value = MAX_P_GAIN
         
@@ -85,9 +107,33 @@ class TRVManagerPGainNumber(NumberEntity):
             "via_device": (DOMAIN, entry.entry_id),
         }
 
+    async def async_added_to_hass(self) -> None:
+        """Follow gain changes and auto-tune results."""
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_SETTINGS_UPDATED.format(self._entry.entry_id, self._device_id),
+                self.async_write_ha_state,
+            )
+        )
+
+    @property
+    def native_value(self) -> float:
+        """Return the P gain in use."""
+        return self._coordinator.controller.p_gain
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the P gain recommended by the last auto-tune."""
+        if (result := self._coordinator.autotune_result) is None:
+            return None
+        return {
+            "suggested_value": result.p_gain,
+            "tuned_at": result.tuned_at.isoformat(),
+        }
+
     async def async_set_native_value(self, value: float) -> None:
         """Update the P gain."""
-        self._attr_native_value = value
         self._coordinator.update_gains(p_gain=value)
         self.async_write_ha_state()
         
@@ -113,7 +159,6 @@ class TRVManagerIGainNumber(NumberEntity):
         self._coordinator = coordinator
         self._entry = entry
         self._device_id = device_id
-        self._attr_native_value = coordinator._i_gain
         self._attr_native_min_value = MIN_I_GAIN
         self._attr_native_max_value = MAX_I_GAIN
         
@@ -127,9 +172,33 @@ class TRVManagerIGainNumber(NumberEntity):
             "via_device": (DOMAIN, entry.entry_id),
         }
 
+    async def async_added_to_hass(self) -> None:
+        """Follow gain changes and auto-tune results."""
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_SETTINGS_UPDATED.format(self._entry.entry_id, self._device_id),
+                self.async_write_ha_state,
+            )
+        )
+
+    @property
+    def native_value(self) -> float:
+        """Return the I gain in use."""
+        return self._coordinator.controller.i_gain
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the I gain recommended by the last auto-tune."""
+        if (result := self._coordinator.autotune_result) is None:
+            return None
+        return {
+            "suggested_value": result.i_gain,
+            "tuned_at": result.tuned_at.isoformat(),
+        }
+
     async def async_set_native_value(self, value: float) -> None:
         """Update the I gain."""
-        self._attr_native_value = value
         self._coordinator.update_gains(i_gain=value)
         self.async_write_ha_state()
         
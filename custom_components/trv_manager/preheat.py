@@ -0,0 +1,134 @@
+"""Pre-heat planning for TRV Manager."""
+from __future__ import annotations
+
+from array import array
+import logging
+
+from .const import (
+    DEFAULT_HEATUP_RATE,
+    HEATUP_RATE_BUFFER_SIZE,
+    HEATUP_SAMPLE_PERIOD,
+    MAX_PREHEAT_LEAD,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class HeatupRateBuffer:
+    """Rolling buffer of measured heat-up rates (°C per hour).
+
+    Backed by a fixed-size float array, so it stays a few hundred bytes no
+    matter how long it runs.
+    """
+
+    def __init__(self, size: int = HEATUP_RATE_BUFFER_SIZE) -> None:
+        """Initialize the buffer."""
+        self._rates = array("f", bytes(4 * size))
+        self._index = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        """Return the number of rates stored."""
+        return self._count
+
+    def append(self, rate: float) -> None:
+        """Add a rate, overwriting the oldest once full."""
+        self._rates[self._index] = rate
+        self._index = (self._index + 1) % len(self._rates)
+        self._count = min(self._count + 1, len(self._rates))
+
+    def values(self) -> list[float]:
+        """Return the stored rates, oldest first."""
+        if self._count < len(self._rates):
+            return list(self._rates[: self._count])
+        return list(self._rates[self._index :]) + list(self._rates[: self._index])
+
+    def rate(self) -> float:
+        """Return the typical heat-up rate (median, robust against outliers)."""
+        if not self._count:
+            return DEFAULT_HEATUP_RATE
+        ordered = sorted(self.values())
+        middle = len(ordered) // 2
+        if len(ordered) % 2:
+            return ordered[middle]
+        return (ordered[middle - 1] + ordered[middle]) / 2
+
+
+class PreheatPlanner:
+    """Learn how fast a room heats up and ramp the target ahead of schedule.
+
+    While the device heats at (nearly) full valve, the reference temperature
+    rise is sampled into a HeatupRateBuffer. When the schedule announces the
+    next comfort period, the pre-heat window is computed once: the target
+    then follows a ramp, at the learned rate, that reaches the comfort
+    temperature exactly when the period starts.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the planner."""
+        self.rates = HeatupRateBuffer()
+        self._sample_start: tuple[float, float] | None = None
+
+        # Planned window: (start, event) timestamps, comfort temperature, rate
+        self.window_start: float | None = None
+        self._event: float | None = None
+        self._comfort_temp: float | None = None
+        self._rate = DEFAULT_HEATUP_RATE
+
+    def record(self, now: float, reference_temp: float, heating: bool) -> None:
+        """Sample the heat-up rate while the room heats at full power."""
+        if not heating:
+            self._sample_start = None
+            return
+        if self._sample_start is None:
+            self._sample_start = (now, reference_temp)
+            return
+
+        start, start_temp = self._sample_start
+        if now - start < HEATUP_SAMPLE_PERIOD:
+            return
+
+        rate = (reference_temp - start_temp) / (now - start) * 3600
+        # A falling temperature at full heat says more about an open window
+        if rate > 0:
+            self.rates.append(rate)
+        self._sample_start = (now, reference_temp)
+
+    def plan(
+        self, event: float | None, comfort_temp: float | None, target_temp: float | None
+    ) -> None:
+        """Compute the pre-heat window for the next comfort period.
+
+        Called once per schedule change, not per control pass.
+        """
+        self.window_start = None
+        self._event = event
+        self._comfort_temp = comfort_temp
+        if event is None or comfort_temp is None or target_temp is None:
+            return
+        if comfort_temp <= target_temp:
+            return
+
+        self._rate = self.rates.rate()
+        lead = min((comfort_temp - target_temp) / self._rate * 3600, MAX_PREHEAT_LEAD)
+        self.window_start = event - lead
+        _LOGGER.debug(
+            "Pre-heat from %f to %f at %f °C/h starts %.0fs before the schedule",
+            target_temp, comfort_temp, self._rate, lead,
+        )
+
+    def active(self, now: float) -> bool:
+        """Return True inside the pre-heat window."""
+        return (
+            self.window_start is not None
+            and self._event is not None
+            and self.window_start <= now < self._event
+        )
+
+    def target(self, now: float, target_temp: float) -> float:
+        """Return the target to control to at this moment."""
+        if not self.active(now):
+            return target_temp
+        assert self._comfort_temp is not None and self._event is not None
+        ramp = self._comfort_temp - self._rate * (self._event - now) / 3600
+        return max(target_temp, min(self._comfort_temp, ramp))
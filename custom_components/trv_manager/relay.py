@@ -0,0 +1,306 @@
+"""Live relay (Åström–Hägglund) tuning experiment for TRV Manager."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+import logging
+import math
+from typing import Any
+
+from homeassistant.components.climate import (
+    ATTR_TEMPERATURE,
+    DOMAIN as CLIMATE_DOMAIN,
+    SERVICE_SET_TEMPERATURE,
+)
+from homeassistant.components.number import DOMAIN as NUMBER_DOMAIN, SERVICE_SET_VALUE
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import ATTR_DEVICE_ID, ATTR_ENTITY_ID
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    EVENT_RELAY_TUNE_FINISHED,
+    MAX_I_GAIN,
+    MAX_P_GAIN,
+    MAX_TRV_TARGET_TEMP,
+    MIN_I_GAIN,
+    MIN_P_GAIN,
+    RELAY_MAX_STALE,
+    RELAY_SAMPLE_INTERVAL,
+)
+from .coordinator import TRVManagerCoordinator
+from .hub import TRVManagerHub
+from .scheduler import PRIORITY_SETPOINT, PRIORITY_VALVE
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RelayTuneAborted(HomeAssistantError):
+    """The experiment hit a safety limit or could not be evaluated."""
+
+
+@dataclass
+class RelayTuneResult:
+    """Gains derived from a relay experiment."""
+
+    p_gain: float
+    i_gain: float
+    ultimate_gain: float  # Valve % per °C at which the loop oscillates
+    period: float  # Seconds, oscillation period
+    amplitude: float  # °C, half the peak to peak oscillation
+    cycles: int
+    tuned_at: datetime
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the result for events and diagnostics."""
+        return {
+            "p_gain": self.p_gain,
+            "i_gain": self.i_gain,
+            "ultimate_gain": self.ultimate_gain,
+            "period": self.period,
+            "amplitude": self.amplitude,
+            "cycles": self.cycles,
+            "tuned_at": self.tuned_at.isoformat(),
+        }
+
+
+def compute_relay_gains(
+    high: float,
+    low: float,
+    hysteresis: float,
+    period: float,
+    amplitude: float,
+    cycles: int,
+) -> RelayTuneResult:
+    """Return PI gains from a measured relay oscillation.
+
+    The ultimate gain follows from the describing function of a relay with
+    hysteresis; the gains use the Tyreus–Luyben rules, which are less
+    aggressive than Ziegler–Nichols and suit slow, lagging rooms.
+    """
+    if amplitude <= hysteresis:
+        raise RelayTuneAborted("The temperature did not oscillate beyond the hysteresis")
+
+    relay_amplitude = (high - low) / 2
+    ultimate_gain = 4 * relay_amplitude / (
+        math.pi * math.sqrt(amplitude**2 - hysteresis**2)
+    )
+    p_gain = ultimate_gain / 3.2
+    integral_time = 2.2 * period
+    i_gain = p_gain / (integral_time / 60.0)  # Per degree-minute
+
+    return RelayTuneResult(
+        p_gain=round(max(MIN_P_GAIN, min(MAX_P_GAIN, p_gain)), 2),
+        i_gain=round(max(MIN_I_GAIN, min(MAX_I_GAIN, i_gain)), 3),
+        ultimate_gain=ultimate_gain,
+        period=period,
+        amplitude=amplitude,
+        cycles=cycles,
+        tuned_at=dt_util.utcnow(),
+    )
+
+
+class TRVManagerRelayTuner:
+    """Drive one device's valve as a relay and measure the oscillation.
+
+    The valve switches between high and low whenever the reference
+    temperature crosses the target (with hysteresis), which makes the room
+    oscillate at its ultimate period. The device's normal control is
+    suspended for the duration; other devices are not affected. The
+    experiment is aborted when it runs too long, the room leaves the
+    allowed band around the target or the reference temperature goes
+    missing.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        device_id: str,
+        device_registry_id: str,
+        coordinator: TRVManagerCoordinator,
+        hub: TRVManagerHub,
+        finished_callback: Callable[[RelayTuneResult | None], None],
+        *,
+        high: float,
+        low: float,
+        hysteresis: float,
+        cycles: int,
+        max_duration: float,
+        max_deviation: float,
+    ) -> None:
+        """Initialize the tuner."""
+        self.hass = hass
+        self._entry = entry
+        self.device_id = device_id
+        self._device_registry_id = device_registry_id
+        self._coordinator = coordinator
+        self._hub = hub
+        self._finished_callback = finished_callback
+        self._high = high
+        self._low = low
+        self._hysteresis = hysteresis
+        self._cycles = cycles
+        self._max_duration = max_duration
+        self._max_deviation = max_deviation
+
+        self._task: asyncio.Task | None = None
+        self._started_at = 0.0
+        self._setpoint: float | None = None
+        self._output_high: bool | None = None
+
+    @callback
+    def async_start(self) -> None:
+        """Suspend normal control and start the experiment."""
+        if (setpoint := self._hub.target_temp) is None:
+            raise HomeAssistantError("The hub has no target temperature to tune around")
+
+        self._setpoint = setpoint
+        self._started_at = self._hub.clock()
+        self._coordinator.async_suspend()
+
+        # Open the TRV's own thermostat so the valve alone decides the heat
+        self._hub.scheduler.async_submit(
+            self._coordinator.trv_entity,
+            CLIMATE_DOMAIN,
+            SERVICE_SET_TEMPERATURE,
+            {
+                ATTR_ENTITY_ID: self._coordinator.trv_entity,
+                ATTR_TEMPERATURE: MAX_TRV_TARGET_TEMP,
+            },
+            PRIORITY_SETPOINT,
+        )
+        self._task = self._entry.async_create_background_task(
+            self.hass, self._async_run(), f"{self._coordinator.name} relay tune"
+        )
+
+    async def async_cancel(self) -> None:
+        """Stop the experiment and hand control back."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _async_run(self) -> None:
+        """Run the experiment, then apply or report the outcome."""
+        event_data: dict[str, Any] = {ATTR_DEVICE_ID: self._device_registry_id}
+        result: RelayTuneResult | None = None
+        try:
+            result = await self._async_experiment()
+        except RelayTuneAborted as err:
+            _LOGGER.warning("Relay tuning of %s aborted: %s", self.device_id, err)
+            event_data["error"] = str(err)
+        except asyncio.CancelledError:
+            _LOGGER.info("Relay tuning of %s cancelled", self.device_id)
+            event_data["error"] = "cancelled"
+            raise
+        else:
+            _LOGGER.info(
+                "Relay tuning of %s finished: Ku=%f, Tu=%fs -> P=%s, I=%s",
+                self.device_id, result.ultimate_gain, result.period,
+                result.p_gain, result.i_gain,
+            )
+            event_data["result"] = result.as_dict()
+        finally:
+            self._task = None
+            self._coordinator.async_resume()
+            self._finished_callback(result)
+            self.hass.bus.async_fire(EVENT_RELAY_TUNE_FINISHED, event_data)
+
+    @callback
+    def _async_set_output(self, high: bool) -> None:
+        """Switch the relay."""
+        self._output_high = high
+        valve_entity = self._coordinator.valve_position_entity
+        self._hub.scheduler.async_submit(
+            valve_entity,
+            NUMBER_DOMAIN,
+            SERVICE_SET_VALUE,
+            {
+                ATTR_ENTITY_ID: valve_entity,
+                "value": self._high if high else self._low,
+            },
+            PRIORITY_VALVE,
+        )
+
+    async def _async_experiment(self) -> RelayTuneResult:
+        """Relay the valve until enough oscillation periods were measured."""
+        setpoint = self._setpoint
+        assert setpoint is not None
+        clock = self._hub.clock
+        last_valid = clock()
+
+        # Switch times (low -> high) and temperature extremes per period
+        period_starts: list[float] = []
+        peaks: list[float] = []
+        troughs: list[float] = []
+        period_max = -math.inf
+        period_min = math.inf
+
+        while True:
+            now = clock()
+            if now - self._started_at > self._max_duration:
+                raise RelayTuneAborted(
+                    f"No stable oscillation within {self._max_duration / 60:.0f} minutes"
+                )
+
+            if (temperature := self._hub.reference_temp) is None:
+                if now - last_valid > RELAY_MAX_STALE:
+                    raise RelayTuneAborted("The reference temperature is unavailable")
+                await asyncio.sleep(RELAY_SAMPLE_INTERVAL)
+                continue
+            last_valid = now
+
+            # Safety band: too hot always aborts, too cold only once the room
+            # has reached the target (it may start far below)
+            if temperature > setpoint + self._max_deviation or (
+                period_starts and temperature < setpoint - self._max_deviation
+            ):
+                raise RelayTuneAborted(
+                    f"Temperature {temperature} left the allowed band around {setpoint}"
+                )
+
+            period_max = max(period_max, temperature)
+            period_min = min(period_min, temperature)
+            error = setpoint - temperature
+
+            if self._output_high is None:
+                self._async_set_output(error > 0)
+            elif self._output_high and error < -self._hysteresis:
+                self._async_set_output(False)
+            elif not self._output_high and error > self._hysteresis:
+                self._async_set_output(True)
+                # A full period ends on every low -> high switch
+                if period_starts:
+                    peaks.append(period_max)
+                    troughs.append(period_min)
+                period_starts.append(now)
+                period_max = period_min = temperature
+
+                if len(peaks) >= self._cycles:
+                    break
+
+            await asyncio.sleep(RELAY_SAMPLE_INTERVAL)
+
+        periods = [b - a for a, b in zip(period_starts, period_starts[1:])]
+        return compute_relay_gains(
+            self._high,
+            self._low,
+            self._hysteresis,
+            sum(periods) / len(periods),
+            (sum(peaks) - sum(troughs)) / (2 * len(peaks)),
+            len(peaks),
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the experiment state for diagnostics."""
+        return {
+            "setpoint": self._setpoint,
+            "output": None
+            if self._output_high is None
+            else (self._high if self._output_high else self._low),
+            "elapsed": round(self._hub.clock() - self._started_at),
+            "max_duration": self._max_duration,
+        }
@@ -0,0 +1,230 @@
+"""Outbound radio command scheduler for TRV Manager."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from dataclasses import dataclass
+import itertools
+import logging
+import random
+import time
+from typing import Any, Final
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from .commands import CommandCache
+from .const import SERVICE_CALL_BUCKETS
+from .metrics import Histogram
+
+_LOGGER = logging.getLogger(__name__)
+
+# Command priorities, lower is sent first
+PRIORITY_SETPOINT: Final = 0  # TRV setpoint changes
+PRIORITY_VALVE: Final = 1  # Valve position changes
+PRIORITY_KEEPALIVE: Final = 2  # Unchanged values resent as keep-alive
+
+# Seconds to wait for a single service call before giving up on it
+COMMAND_TIMEOUT: Final = 10.0
+
+
+@dataclass
+class QueuedCommand:
+    """A service call waiting to be sent."""
+
+    entity_id: str
+    domain: str
+    service: str
+    data: dict[str, Any]
+    priority: int
+    sequence: int
+    queued_at: float  # Clock time
+
+
+class TRVManagerCommandScheduler:
+    """Hub-wide queue for TRV and valve service calls.
+
+    Sending every device's commands at once floods the Zigbee/Z-Wave mesh
+    and some get dropped. Commands are queued per entity (a newer command
+    for the same entity replaces the queued one), sent highest priority
+    first, one at a time, with a minimum gap plus random jitter between
+    sends.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        command_cache: CommandCache,
+        interval: float,
+        jitter: float,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the scheduler."""
+        self.hass = hass
+        self._command_cache = command_cache
+        self._interval = interval
+        self._jitter = jitter
+        self._clock = clock  # Monotonic time source in seconds
+
+        self._queue: dict[str, QueuedCommand] = {}
+        self._sequence = itertools.count()
+        self._worker: asyncio.Task | None = None
+        self._listeners: list[CALLBACK_TYPE] = []
+
+        self.in_flight: QueuedCommand | None = None
+        self.stats: dict[str, int] = {
+            "commands_queued": 0,
+            "commands_sent": 0,
+            "commands_coalesced": 0,
+            "commands_failed": 0,
+        }
+        # Round trip of each service call, including failed ones
+        self.call_latency = Histogram(SERVICE_CALL_BUCKETS)
+
+    @callback
+    def async_set_rate(self, interval: float, jitter: float) -> None:
+        """Change the minimum gap and jitter between commands."""
+        self._interval = interval
+        self._jitter = jitter
+
+    @property
+    def queue_length(self) -> int:
+        """Return the number of commands waiting to be sent."""
+        return len(self._queue)
+
+    @callback
+    def async_submit(
+        self,
+        entity_id: str,
+        domain: str,
+        service: str,
+        data: dict[str, Any],
+        priority: int,
+    ) -> None:
+        """Queue a service call, replacing any queued call for the same entity."""
+        self.stats["commands_queued"] += 1
+
+        if (queued := self._queue.get(entity_id)) is not None:
+            # Last write wins, but keep the earlier place and better priority
+            self.stats["commands_coalesced"] += 1
+            queued.domain = domain
+            queued.service = service
+            queued.data = data
+            queued.priority = min(queued.priority, priority)
+        else:
+            self._queue[entity_id] = QueuedCommand(
+                entity_id,
+                domain,
+                service,
+                data,
+                priority,
+                next(self._sequence),
+                self._clock(),
+            )
+
+        if self._worker is None:
+            self._worker = self.hass.async_create_background_task(
+                self._async_process_queue(), "trv_manager command scheduler"
+            )
+        self._async_notify_listeners()
+
+    @callback
+    def async_cancel(self, entity_id: str) -> None:
+        """Drop a queued command for an entity."""
+        if self._queue.pop(entity_id, None) is not None:
+            self._async_notify_listeners()
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Drop all queued commands and stop sending."""
+        self._queue.clear()
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        self.in_flight = None
+        self._listeners.clear()
+
+    async def _async_process_queue(self) -> None:
+        """Send queued commands until the queue is empty."""
+        try:
+            while self._queue:
+                command = min(
+                    self._queue.values(), key=lambda c: (c.priority, c.sequence)
+                )
+                del self._queue[command.entity_id]
+                self.in_flight = command
+                self._async_notify_listeners()
+
+                await self._async_send(command)
+
+                self.in_flight = None
+                self._async_notify_listeners()
+
+                # Spread radio traffic out instead of sending back to back
+                if self._queue:
+                    await asyncio.sleep(self._interval + random.uniform(0, self._jitter))
+        finally:
+            self.in_flight = None
+            self._worker = None
+
+    async def _async_send(self, command: QueuedCommand) -> None:
+        """Send one command."""
+        start = self._clock()
+        try:
+            async with asyncio.timeout(COMMAND_TIMEOUT):
+                await self.hass.services.async_call(
+                    command.domain, command.service, command.data, blocking=True
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception as err:  # noqa: BLE001
+            self.call_latency.observe(self._clock() - start)
+            self.stats["commands_failed"] += 1
+            # Make sure the next control pass sends it again
+            self._command_cache.forget(command.entity_id)
+            _LOGGER.warning(
+                "Failed to send %s.%s to %s: %s",
+                command.domain, command.service, command.entity_id, err,
+            )
+            return
+
+        self.call_latency.observe(self._clock() - start)
+        self.stats["commands_sent"] += 1
+
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE) -> Callable[[], None]:
+        """Listen for queue changes."""
+        self._listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            if update_callback in self._listeners:
+                self._listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def _async_notify_listeners(self) -> None:
+        """Notify listeners of a queue change."""
+        for update_callback in list(self._listeners):
+            update_callback()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the queue state for diagnostics."""
+        now = self._clock()
+        return {
+            "in_flight": self.in_flight.entity_id if self.in_flight else None,
+            "queued": [
+                {
+                    "entity_id": command.entity_id,
+                    "service": f"{command.domain}.{command.service}",
+                    "priority": command.priority,
+                    "age": round(now - command.queued_at, 1),
+                }
+                for command in sorted(
+                    self._queue.values(), key=lambda c: (c.priority, c.sequence)
+                )
+            ],
+            **self.stats,
+            "call_latency": self.call_latency.as_dict(),
+        }
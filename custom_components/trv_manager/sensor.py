@@ -1,32 +1,60 @@
 """Sensor entities for TRV Manager diagnostics."""
 from __future__ import annotations
 
+from abc import abstractmethod
+from collections.abc import Callable
+from datetime import datetime
 import logging
 from typing import Any
 
 from homeassistant.components.sensor import (
+    DOMAIN as SENSOR_DOMAIN,
     SensorEntity,
     SensorDeviceClass,
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_NAME, UnitOfTemperature, PERCENTAGE
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import (
     DOMAIN,
+    ENTITY_ID_COMMAND_QUEUE,
+    ENTITY_ID_CONTROLLER,
     ENTITY_ID_ERROR,
+    ENTITY_ID_INPUT_TEMPERATURES,
     ENTITY_ID_INTEGRATOR,
+    ENTITY_ID_SETPOINT_WRITES_SUPPRESSED,
     ENTITY_ID_TEMP_ADJUSTMENT,
     ENTITY_ID_VALVE_OUTPUT,
+    ENTITY_ID_VALVE_TRAVEL,
+    ERROR_SIGNIFICANCE,
+    INPUT_TEMP_SIGNIFICANCE,
+    INTEGRATOR_SIGNIFICANCE,
+    SIGNAL_DEVICE_ADDED,
+    TEMP_ADJUSTMENT_SIGNIFICANCE,
+    VALVE_OUTPUT_SIGNIFICANCE,
+    VALVE_TRAVEL_SIGNIFICANCE,
 )
 from .coordinator import TRVManagerCoordinator
+from .hub import TRVManagerHub
 
 _LOGGER = logging.getLogger(__name__)
 
+# Sensors folded into the controller sensor when diagnostics are combined
+SEPARATE_DIAGNOSTIC_SUFFIXES = (
+    ENTITY_ID_ERROR,
+    ENTITY_ID_INTEGRATOR,
+    ENTITY_ID_TEMP_ADJUSTMENT,
+    ENTITY_ID_VALVE_OUTPUT,
+)
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -36,33 +64,161 @@ async def async_setup_entry(
     """Set up TRV Manager sensor entities."""
     entry_data = hass.data[DOMAIN][entry.entry_id]
     coordinators = entry_data["coordinators"]
+    min_interval = entry_data["sensor_min_interval"]
+    entity_registry = er.async_get(hass)
 
-    entities = []
+    # Either one combined controller sensor or the four separate ones
+    if entry_data["combined_diagnostics"]:
+        sensor_types = [(TRVManagerControllerSensor, ENTITY_ID_CONTROLLER)]
+        replaced_suffixes = SEPARATE_DIAGNOSTIC_SUFFIXES
+    else:
+        sensor_types = [
+            (TRVManagerErrorSensor, ENTITY_ID_ERROR),
+            (TRVManagerIntegratorSensor, ENTITY_ID_INTEGRATOR),
+            (TRVManagerTempAdjustmentSensor, ENTITY_ID_TEMP_ADJUSTMENT),
+            (TRVManagerValveOutputSensor, ENTITY_ID_VALVE_OUTPUT),
+        ]
+        replaced_suffixes = (ENTITY_ID_CONTROLLER,)
+    sensor_types.extend(
+        (
+            (TRVManagerSetpointWritesSuppressedSensor, ENTITY_ID_SETPOINT_WRITES_SUPPRESSED),
+            (TRVManagerValveTravelSensor, ENTITY_ID_VALVE_TRAVEL),
+            (TRVManagerInputTemperaturesSensor, ENTITY_ID_INPUT_TEMPERATURES),
+        )
+    )
 
-    # Create diagnostic sensors for each device
-    for device_id, device_data in coordinators.items():
+    @callback
+    def _async_create_entities(device_id: str) -> list[SensorEntity]:
+        """Create diagnostic sensors for one device."""
+        device_data = coordinators[device_id]
         coordinator: TRVManagerCoordinator = device_data["coordinator"]
         device_name = device_data["device_name"]
 
-        entities.extend([
-            TRVManagerErrorSensor(coordinator, entry, device_id, device_name),
-            TRVManagerIntegratorSensor(coordinator, entry, device_id, device_name),
-            TRVManagerTempAdjustmentSensor(coordinator, entry, device_id, device_name),
-            TRVManagerValveOutputSensor(coordinator, entry, device_id, device_name),
-        ])
+        # Drop the registry entries of the sensors the other layout uses
+        for suffix in replaced_suffixes:
+            if entity_id := entity_registry.async_get_entity_id(
+                SENSOR_DOMAIN, DOMAIN, f"{entry.entry_id}_{device_id}{suffix}"
+            ):
+                entity_registry.async_remove(entity_id)
+
+        entities: list[SensorEntity] = [
+            sensor_type(
+                coordinator, entry, device_id, device_name, suffix, min_interval
+            )
+            for sensor_type, suffix in sensor_types
+        ]
+        # Tracked so a reload can remove a single device's entities
+        entry_data["entities"].setdefault(device_id, []).extend(entities)
+        return entities
+
+    @callback
+    def _async_add_device(device_id: str) -> None:
+        """Add entities for a device added by a reload."""
+        async_add_entities(_async_create_entities(device_id))
+
+    entities: list[SensorEntity] = [
+        TRVManagerCommandQueueSensor(entry_data["hub"], entry, min_interval),
+    ]
+
+    # Create diagnostic sensors for each device
+    for device_id in coordinators:
+        entities.extend(_async_create_entities(device_id))
 
     async_add_entities(entities)
 
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_DEVICE_ADDED.format(entry.entry_id), _async_add_device
+        )
+    )
 
-class TRVManagerErrorSensor(CoordinatorEntity[TRVManagerCoordinator], SensorEntity):
-    """Sensor for temperature error (target - reference)."""
+
+class _ThrottledSensor(SensorEntity):
+    """Sensor written only on significant changes, at most every min_interval.
+
+    Every control pass notifies the coordinator's listeners; writing each
+    sensor's state every time adds a recorder row and a websocket push even
+    when the value moved by 0.001. A sensor writes its state only when one
+    of its values changed by at least its significance. A change arriving
+    within the minimum interval since the last write is written once the
+    interval has passed, so the latest value is never left unwritten.
+    """
+
+    # Values that make up the state, and the smallest change of each worth
+    # a write
+    _significance: dict[str, float] = {}
+
+    _min_interval = 0.0
+    _clock: Callable[[], float]  # Monotonic time source of the hub
+    _written: dict[str, Any] | None = None
+    _written_at = 0.0
+    _cancel_deferred_write: CALLBACK_TYPE | None = None
+
+    @abstractmethod
+    def _values(self) -> dict[str, Any]:
+        """Return the current values that make up the state."""
+
+    @callback
+    def _async_write_if_significant(self) -> None:
+        """Write the state if it changed enough since the last write."""
+        values = self._values()
+        if self._written is None:
+            self._async_write(values)
+            return
+        if not any(
+            _is_significant(self._written[key], value, self._significance[key])
+            for key, value in values.items()
+        ):
+            return
+
+        remaining = self._min_interval - (self._clock() - self._written_at)
+        if remaining > 0:
+            # Too soon, write the then latest values when the interval is over
+            if self._cancel_deferred_write is None:
+                self._cancel_deferred_write = async_call_later(
+                    self.hass, remaining, self._async_deferred_write
+                )
+            return
+
+        self._async_write(values)
+
+    @callback
+    def _async_deferred_write(self, now: datetime) -> None:
+        """Write the values that changed during the minimum interval."""
+        self._cancel_deferred_write = None
+        self._async_write(self._values())
+
+    @callback
+    def _async_write(self, values: dict[str, Any]) -> None:
+        """Write the state and remember what was written."""
+        if self._cancel_deferred_write is not None:
+            self._cancel_deferred_write()
+            self._cancel_deferred_write = None
+        self._written = values
+        self._written_at = self._clock()
+        self.async_write_ha_state()
+
+    async def async_added_to_hass(self) -> None:
+        """Start throttling from the state written when the entity was added."""
+        await super().async_added_to_hass()
+        self._written = self._values()
+        self._written_at = self._clock()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Cancel a deferred write."""
+        if self._cancel_deferred_write is not None:
+            self._cancel_deferred_write()
+            self._cancel_deferred_write = None
+        await super().async_will_remove_from_hass()
+
+
+class TRVManagerDeviceSensor(CoordinatorEntity[TRVManagerCoordinator], _ThrottledSensor):
+    """Diagnostic sensor of a TRV device, written through the throttle."""
 
     _attr_has_entity_name = True
     _attr_entity_category = EntityCategory.DIAGNOSTIC
     _attr_entity_registry_enabled_default = False
-    _attr_device_class = SensorDeviceClass.TEMPERATURE
     _attr_state_class = SensorStateClass.MEASUREMENT
-    _attr_native_unit_of_measurement = UnitOfTemperature.CELSIUS
 
     def __init__(
         self,
@@ -70,12 +226,15 @@ class TRVManagerErrorSensor(CoordinatorEntity[TRVManagerCoordinator], SensorEnti
         entry: ConfigEntry,
         device_id: str,
         device_name: str,
+        unique_id_suffix: str,
+        min_interval: float,
     ) -> None:
-        """Initialize the error sensor."""
+        """Initialize the sensor."""
         super().__init__(coordinator)
         self._device_id = device_id
-        self._attr_name = "Temperature Error"
-        self._attr_unique_id = f"{entry.entry_id}_{device_id}{ENTITY_ID_ERROR}"
+        self._min_interval = min_interval
+        self._clock = coordinator.clock
+        self._attr_unique_id = f"{entry.entry_id}_{device_id}{unique_id_suffix}"
         self._attr_device_info = {
             "identifiers": {(DOMAIN, f"{entry.entry_id}_{device_id}")},
             "name": device_name,
@@ -84,112 +243,238 @@ class TRVManagerErrorSensor(CoordinatorEntity[TRVManagerCoordinator], SensorEnti
             "via_device": (DOMAIN, entry.entry_id),
         }
 
+    def _values(self) -> dict[str, Any]:
+        """Return the current coordinator data values that make up the state."""
+        data = self.coordinator.data
+        return {key: getattr(data, key) for key in self._significance}
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle a control pass."""
+        self._async_write_if_significant()
+
+
+def _is_significant(old: Any, new: Any, significance: float) -> bool:
+    """Return True if a value changed by at least its significance."""
+    if old == new:
+        return False
+    if isinstance(old, (int, float)) and isinstance(new, (int, float)):
+        return abs(new - old) >= significance
+    # Becoming (un)available or a non-numeric change always counts
+    return True
+
+
+class TRVManagerErrorSensor(TRVManagerDeviceSensor):
+    """Sensor for temperature error (target - reference)."""
+
+    _attr_name = "Temperature Error"
+    _attr_device_class = SensorDeviceClass.TEMPERATURE
+    _attr_native_unit_of_measurement = UnitOfTemperature.CELSIUS
+    _significance = {"error": ERROR_SIGNIFICANCE}
+
     @property
     def native_value(self) -> float | None:
         """Return the temperature error."""
-        return self.coordinator.data.get("error")
+        return self.coordinator.data.error
 
 
-class TRVManagerIntegratorSensor(CoordinatorEntity[TRVManagerCoordinator], SensorEntity):
+class TRVManagerIntegratorSensor(TRVManagerDeviceSensor):
     """Sensor for PI controller integrator value."""
 
-    _attr_has_entity_name = True
-    _attr_entity_category = EntityCategory.DIAGNOSTIC
-    _attr_entity_registry_enabled_default = False
-    _attr_state_class = SensorStateClass.MEASUREMENT
-
-    def __init__(
-        self,
-        coordinator: TRVManagerCoordinator,
-        entry: ConfigEntry,
-        device_id: str,
-        device_name: str,
-    ) -> None:
-        """Initialize the integrator sensor."""
-        super().__init__(coordinator)
-        self._device_id = device_id
-        self._attr_name = "Integrator Value"
-        self._attr_unique_id = f"{entry.entry_id}_{device_id}{ENTITY_ID_INTEGRATOR}"
-        self._attr_device_info = {
-            "identifiers": {(DOMAIN, f"{entry.entry_id}_{device_id}")},
-            "name": device_name,
-            "manufacturer": "TRV Manager",
-            "model": "TRV Controller",
-            "via_device": (DOMAIN, entry.entry_id),
-        }
+    _attr_name = "Integrator Value"
+    _significance = {"integrator": INTEGRATOR_SIGNIFICANCE}
 
     @property
     def native_value(self) -> float | None:
         """Return the integrator value."""
-        return self.coordinator.data.get("integrator")
+        return self.coordinator.data.integrator
 
 
-class TRVManagerTempAdjustmentSensor(CoordinatorEntity[TRVManagerCoordinator], SensorEntity):
+class TRVManagerTempAdjustmentSensor(TRVManagerDeviceSensor):
     """Sensor for temperature adjustment applied to TRV."""
 
-    _attr_has_entity_name = True
-    _attr_entity_category = EntityCategory.DIAGNOSTIC
-    _attr_entity_registry_enabled_default = False
+    _attr_name = "Temperature Adjustment"
     _attr_device_class = SensorDeviceClass.TEMPERATURE
-    _attr_state_class = SensorStateClass.MEASUREMENT
     _attr_native_unit_of_measurement = UnitOfTemperature.CELSIUS
-
-    def __init__(
-        self,
-        coordinator: TRVManagerCoordinator,
-        entry: ConfigEntry,
-        device_id: str,
-        device_name: str,
-    ) -> None:
-        """Initialize the temperature adjustment sensor."""
-        super().__init__(coordinator)
-        self._device_id = device_id
-        self._attr_name = "Temperature Adjustment"
-        self._attr_unique_id = f"{entry.entry_id}_{device_id}{ENTITY_ID_TEMP_ADJUSTMENT}"
-        self._attr_device_info = {
-            "identifiers": {(DOMAIN, f"{entry.entry_id}_{device_id}")},
-            "name": device_name,
-            "manufacturer": "TRV Manager",
-            "model": "TRV Controller",
-            "via_device": (DOMAIN, entry.entry_id),
-        }
+    _significance = {"temp_adjustment": TEMP_ADJUSTMENT_SIGNIFICANCE}
 
     @property
     def native_value(self) -> float | None:
         """Return the temperature adjustment."""
-        return self.coordinator.data.get("temp_adjustment")
+        return self.coordinator.data.temp_adjustment
 
 
-class TRVManagerValveOutputSensor(CoordinatorEntity[TRVManagerCoordinator], SensorEntity):
+class TRVManagerValveOutputSensor(TRVManagerDeviceSensor):
     """Sensor for PI controller valve position output."""
 
+    _attr_name = "Valve Position Output"
+    _attr_native_unit_of_measurement = PERCENTAGE
+    _significance = {"valve_output": VALVE_OUTPUT_SIGNIFICANCE}
+
+    @property
+    def native_value(self) -> int | None:
+        """Return the valve position output."""
+        return self.coordinator.data.valve_output
+
+
+class TRVManagerControllerSensor(TRVManagerDeviceSensor):
+    """Valve position output with the other diagnostics as attributes.
+
+    Replaces the four separate diagnostic sensors when the hub combines
+    diagnostics, so a pass causes at most one state write per device.
+    """
+
+    _attr_name = "Controller"
+    _attr_native_unit_of_measurement = PERCENTAGE
+    _significance = {
+        "valve_output": VALVE_OUTPUT_SIGNIFICANCE,
+        "error": ERROR_SIGNIFICANCE,
+        "integrator": INTEGRATOR_SIGNIFICANCE,
+        "temp_adjustment": TEMP_ADJUSTMENT_SIGNIFICANCE,
+    }
+
+    @property
+    def native_value(self) -> int | None:
+        """Return the valve position output."""
+        return self.coordinator.data.valve_output
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the error, integrator and temperature adjustment."""
+        data = self.coordinator.data
+        return {
+            "error": data.error,
+            "integrator": data.integrator,
+            "temp_adjustment": data.temp_adjustment,
+        }
+
+
+class TRVManagerSetpointWritesSuppressedSensor(TRVManagerDeviceSensor):
+    """Sensor counting TRV setpoint writes skipped because nothing changed."""
+
+    _attr_name = "Setpoint Writes Suppressed"
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _significance = {"setpoint_writes_suppressed": 1, "setpoint_writes": 1}
+
+    def _values(self) -> dict[str, Any]:
+        """Return the counters that make up the state."""
+        return {key: self.coordinator.stats[key] for key in self._significance}
+
+    @property
+    def native_value(self) -> int:
+        """Return the number of suppressed setpoint writes."""
+        return self.coordinator.stats["setpoint_writes_suppressed"]
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the number of setpoint writes actually sent."""
+        return {"setpoint_writes": self.coordinator.stats["setpoint_writes"]}
+
+
+class TRVManagerValveTravelSensor(TRVManagerDeviceSensor):
+    """Sensor for the valve travel of the last 24 hours, with the actuation budget."""
+
+    _attr_name = "Valve Travel (24h)"
+    _attr_native_unit_of_measurement = PERCENTAGE
+    _significance = {"valve_travel": VALVE_TRAVEL_SIGNIFICANCE, "valve_step": 1}
+
+    @property
+    def native_value(self) -> float:
+        """Return the valve travel of the last 24 hours."""
+        return round(self.coordinator.data.valve_travel, 1)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the commands, battery cost and valve step of the last 24 hours."""
+        budget = self.coordinator.budget
+        return {
+            "commands": budget.commands(),
+            "battery_cost": round(budget.battery_cost(), 1),
+            "daily_travel_budget": budget.daily_travel_budget,
+            "valve_step": self.coordinator.data.valve_step,
+        }
+
+
+class TRVManagerInputTemperaturesSensor(TRVManagerDeviceSensor):
+    """Sensor for the filtered TRV temperature, with the raw inputs as attributes."""
+
+    _attr_name = "Filtered TRV Temperature"
+    _attr_device_class = SensorDeviceClass.TEMPERATURE
+    _attr_native_unit_of_measurement = UnitOfTemperature.CELSIUS
+    _significance = {
+        "trv_temp": INPUT_TEMP_SIGNIFICANCE,
+        "trv_temp_raw": INPUT_TEMP_SIGNIFICANCE,
+        "reference_temp": INPUT_TEMP_SIGNIFICANCE,
+        "reference_temp_raw": INPUT_TEMP_SIGNIFICANCE,
+    }
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the filtered TRV temperature."""
+        return self.coordinator.data.trv_temp
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the raw and filtered inputs and the rejected outliers."""
+        data = self.coordinator.data
+        return {
+            "trv_temp_raw": data.trv_temp_raw,
+            "reference_temp": data.reference_temp,
+            "reference_temp_raw": data.reference_temp_raw,
+            "trv_outliers_rejected": self.coordinator.trv_filter.outliers_rejected,
+        }
+
+
+class TRVManagerCommandQueueSensor(_ThrottledSensor):
+    """Sensor for radio commands queued or in flight in the hub.
+
+    The scheduler notifies on every enqueue, send and coalesce; the state
+    is only written when the number of pending commands changed, through
+    the same throttle as the device sensors.
+    """
+
     _attr_has_entity_name = True
     _attr_entity_category = EntityCategory.DIAGNOSTIC
     _attr_entity_registry_enabled_default = False
     _attr_state_class = SensorStateClass.MEASUREMENT
-    _attr_native_unit_of_measurement = PERCENTAGE
+    _attr_should_poll = False
+    # The queue listing changes with every command, keep it out of history
+    _unrecorded_attributes = frozenset({"in_flight", "queued"})
+    _significance = {"pending": 1}
 
     def __init__(
         self,
-        coordinator: TRVManagerCoordinator,
+        hub: TRVManagerHub,
         entry: ConfigEntry,
-        device_id: str,
-        device_name: str,
+        min_interval: float,
     ) -> None:
-        """Initialize the valve output sensor."""
-        super().__init__(coordinator)
-        self._device_id = device_id
-        self._attr_name = "Valve Position Output"
-        self._attr_unique_id = f"{entry.entry_id}_{device_id}{ENTITY_ID_VALVE_OUTPUT}"
+        """Initialize the command queue sensor."""
+        self._scheduler = hub.scheduler
+        self._min_interval = min_interval
+        self._clock = hub.clock
+        self._attr_name = "Radio Commands Pending"
+        self._attr_unique_id = f"{entry.entry_id}{ENTITY_ID_COMMAND_QUEUE}"
         self._attr_device_info = {
-            "identifiers": {(DOMAIN, f"{entry.entry_id}_{device_id}")},
-            "name": device_name,
-            "manufacturer": "TRV Manager",
-            "model": "TRV Controller",
-            "via_device": (DOMAIN, entry.entry_id),
+            "identifiers": {(DOMAIN, entry.entry_id)},
         }
 
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to queue changes, written through the throttle."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self._scheduler.async_add_listener(self._async_write_if_significant)
+        )
+
+    def _values(self) -> dict[str, Any]:
+        """Return the number of pending commands."""
+        return {"pending": self.native_value}
+
     @property
-    def native_value(self) -> int | None:
-        """Return the valve position output."""
-        return self.coordinator.data.get("valve_output")
+    def native_value(self) -> int:
+        """Return the number of commands queued or in flight."""
+        return self._scheduler.queue_length + (1 if self._scheduler.in_flight else 0)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the queue contents and counters."""
+        return self._scheduler.as_dict()
@@ -0,0 +1,299 @@
+"""Services for TRV Manager."""
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import ATTR_DEVICE_ID
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv, device_registry as dr
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+
+from .autotune import AutotuneResult, async_autotune
+from .const import (
+    ATTR_APPLY,
+    ATTR_CYCLES,
+    ATTR_DAYS,
+    ATTR_HIGH,
+    ATTR_HYSTERESIS,
+    ATTR_LIMIT,
+    ATTR_LOW,
+    ATTR_MAX_DEVIATION,
+    ATTR_MAX_DURATION,
+    CONF_DEVICE_ID,
+    CONF_DEVICES,
+    CONF_I_GAIN,
+    CONF_P_GAIN,
+    DEFAULT_AUTOTUNE_DAYS,
+    DEFAULT_RELAY_CYCLES,
+    DEFAULT_RELAY_HIGH,
+    DEFAULT_RELAY_HYSTERESIS,
+    DEFAULT_RELAY_LOW,
+    DEFAULT_RELAY_MAX_DEVIATION,
+    DEFAULT_RELAY_MAX_DURATION,
+    DOMAIN,
+    MAX_AUTOTUNE_DAYS,
+    MAX_HISTORY_LIMIT,
+    MAX_RELAY_MAX_DEVIATION,
+    MAX_RELAY_MAX_DURATION,
+    SERVICE_AUTOTUNE,
+    SERVICE_CANCEL_RELAY_TUNE,
+    SERVICE_GET_HISTORY,
+    SERVICE_RELAY_TUNE,
+    SIGNAL_SETTINGS_UPDATED,
+)
+from .coordinator import TRVManagerCoordinator
+from .relay import RelayTuneResult, TRVManagerRelayTuner
+
+_LOGGER = logging.getLogger(__name__)
+
+AUTOTUNE_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_DEVICE_ID): cv.string,
+        vol.Optional(ATTR_DAYS, default=DEFAULT_AUTOTUNE_DAYS): vol.All(
+            vol.Coerce(float), vol.Range(min=0.25, max=MAX_AUTOTUNE_DAYS)
+        ),
+        vol.Optional(ATTR_APPLY, default=False): cv.boolean,
+    }
+)
+
+def _validate_relay_outputs(data: dict[str, Any]) -> dict[str, Any]:
+    """Validate that the relay opens the valve further when heating."""
+    if data[ATTR_HIGH] <= data[ATTR_LOW]:
+        raise vol.Invalid("high must be above low")
+    return data
+
+
+RELAY_TUNE_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Required(ATTR_DEVICE_ID): cv.string,
+            vol.Optional(ATTR_HIGH, default=DEFAULT_RELAY_HIGH): vol.All(
+                vol.Coerce(int), vol.Range(min=0, max=100)
+            ),
+            vol.Optional(ATTR_LOW, default=DEFAULT_RELAY_LOW): vol.All(
+                vol.Coerce(int), vol.Range(min=0, max=100)
+            ),
+            vol.Optional(ATTR_HYSTERESIS, default=DEFAULT_RELAY_HYSTERESIS): vol.All(
+                vol.Coerce(float), vol.Range(min=0.0, max=1.0)
+            ),
+            vol.Optional(ATTR_CYCLES, default=DEFAULT_RELAY_CYCLES): vol.All(
+                vol.Coerce(int), vol.Range(min=1, max=10)
+            ),
+            vol.Optional(ATTR_MAX_DURATION, default=DEFAULT_RELAY_MAX_DURATION): vol.All(
+                vol.Coerce(int), vol.Range(min=30, max=MAX_RELAY_MAX_DURATION)
+            ),
+            vol.Optional(
+                ATTR_MAX_DEVIATION, default=DEFAULT_RELAY_MAX_DEVIATION
+            ): vol.All(vol.Coerce(float), vol.Range(min=0.5, max=MAX_RELAY_MAX_DEVIATION)),
+            vol.Optional(ATTR_APPLY, default=True): cv.boolean,
+        }
+    ),
+    _validate_relay_outputs,
+)
+
+CANCEL_RELAY_TUNE_SCHEMA = vol.Schema({vol.Required(ATTR_DEVICE_ID): cv.string})
+
+GET_HISTORY_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_DEVICE_ID): cv.string,
+        vol.Optional(ATTR_LIMIT): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=MAX_HISTORY_LIMIT)
+        ),
+    }
+)
+
+
+@callback
+def async_get_device(
+    hass: HomeAssistant, device_registry_id: str
+) -> tuple[ConfigEntry, str, TRVManagerCoordinator]:
+    """Return the config entry, device ID and coordinator of a TRV device.
+
+    Raises ServiceValidationError if the registry device is not a TRV
+    Manager device of a loaded hub.
+    """
+    device = dr.async_get(hass).async_get(device_registry_id)
+    if device is not None:
+        domain_data = hass.data.get(DOMAIN, {})
+        for entry in hass.config_entries.async_entries(DOMAIN):
+            if (entry_data := domain_data.get(entry.entry_id)) is None:
+                continue  # Not loaded
+            for device_id, device_data in entry_data["coordinators"].items():
+                if (DOMAIN, f"{entry.entry_id}_{device_id}") in device.identifiers:
+                    return entry, device_id, device_data["coordinator"]
+
+    raise ServiceValidationError(
+        f"{device_registry_id} is not a TRV Manager device of a loaded hub"
+    )
+
+
+@callback
+def async_update_device_config(
+    hass: HomeAssistant, entry: ConfigEntry, device_id: str, changes: dict[str, Any]
+) -> None:
+    """Store new settings for a device; the update listener applies them."""
+    devices = [
+        {**device_config, **changes}
+        if device_config[CONF_DEVICE_ID] == device_id
+        else device_config
+        for device_config in entry.data.get(CONF_DEVICES, [])
+    ]
+    hass.config_entries.async_update_entry(
+        entry, data={**entry.data, CONF_DEVICES: devices}
+    )
+
+
+@callback
+def _async_publish_result(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    device_id: str,
+    coordinator: TRVManagerCoordinator,
+    result: AutotuneResult | RelayTuneResult,
+    apply: bool,
+) -> None:
+    """Show tuned gains on the gain entities and optionally use them."""
+    coordinator.autotune_result = result
+    async_dispatcher_send(
+        hass, SIGNAL_SETTINGS_UPDATED.format(entry.entry_id, device_id)
+    )
+
+    if apply:
+        async_update_device_config(
+            hass,
+            entry,
+            device_id,
+            {CONF_P_GAIN: result.p_gain, CONF_I_GAIN: result.i_gain},
+        )
+
+
+async def _async_handle_autotune(call: ServiceCall) -> ServiceResponse:
+    """Recommend (and optionally apply) PI gains from recorded history."""
+    hass = call.hass
+    entry, device_id, coordinator = async_get_device(hass, call.data[ATTR_DEVICE_ID])
+    if coordinator.valve_position_entity is None:
+        raise ServiceValidationError(
+            "Auto-tune needs a valve position entity to read the valve history from"
+        )
+
+    result = await async_autotune(
+        hass,
+        hass.data[DOMAIN][entry.entry_id]["reference_temp_entity"],
+        coordinator.trv_entity,
+        coordinator.valve_position_entity,
+        call.data[ATTR_DAYS],
+    )
+    _LOGGER.info(
+        "Auto-tune of %s recommends P=%s, I=%s", device_id, result.p_gain, result.i_gain
+    )
+
+    _async_publish_result(
+        hass, entry, device_id, coordinator, result, call.data[ATTR_APPLY]
+    )
+
+    return result.as_dict() if call.return_response else None
+
+
+async def _async_handle_relay_tune(call: ServiceCall) -> None:
+    """Start a relay tuning experiment on a device."""
+    hass = call.hass
+    device_registry_id = call.data[ATTR_DEVICE_ID]
+    entry, device_id, coordinator = async_get_device(hass, device_registry_id)
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    tuners: dict[str, TRVManagerRelayTuner] = entry_data["relay_tuners"]
+
+    if coordinator.valve_position_entity is None:
+        raise ServiceValidationError("Relay tuning needs a valve position entity to drive")
+    if device_id in tuners:
+        raise ServiceValidationError(f"Relay tuning of {device_id} is already running")
+
+    @callback
+    def _async_finished(result: RelayTuneResult | None) -> None:
+        tuners.pop(device_id, None)
+        if result is not None:
+            _async_publish_result(
+                hass, entry, device_id, coordinator, result, call.data[ATTR_APPLY]
+            )
+
+    tuner = TRVManagerRelayTuner(
+        hass,
+        entry,
+        device_id,
+        device_registry_id,
+        coordinator,
+        entry_data["hub"],
+        _async_finished,
+        high=call.data[ATTR_HIGH],
+        low=call.data[ATTR_LOW],
+        hysteresis=call.data[ATTR_HYSTERESIS],
+        cycles=call.data[ATTR_CYCLES],
+        max_duration=call.data[ATTR_MAX_DURATION] * 60,
+        max_deviation=call.data[ATTR_MAX_DEVIATION],
+    )
+    tuner.async_start()
+    tuners[device_id] = tuner
+    _LOGGER.info("Relay tuning of %s started", device_id)
+
+
+async def _async_handle_cancel_relay_tune(call: ServiceCall) -> None:
+    """Stop a running relay tuning experiment."""
+    entry, device_id, _coordinator = async_get_device(
+        call.hass, call.data[ATTR_DEVICE_ID]
+    )
+    tuners = call.hass.data[DOMAIN][entry.entry_id]["relay_tuners"]
+    if (tuner := tuners.get(device_id)) is None:
+        raise ServiceValidationError(f"No relay tuning of {device_id} is running")
+    await tuner.async_cancel()
+
+
+async def _async_handle_get_history(call: ServiceCall) -> ServiceResponse:
+    """Return the recent control passes of a device."""
+    _entry, device_id, coordinator = async_get_device(
+        call.hass, call.data[ATTR_DEVICE_ID]
+    )
+    return {
+        "device_id": device_id,
+        "passes": coordinator.history.as_list(call.data.get(ATTR_LIMIT)),
+    }
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the TRV Manager services."""
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_AUTOTUNE,
+        _async_handle_autotune,
+        schema=AUTOTUNE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_RELAY_TUNE,
+        _async_handle_relay_tune,
+        schema=RELAY_TUNE_SCHEMA,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_CANCEL_RELAY_TUNE,
+        _async_handle_cancel_relay_tune,
+        schema=CANCEL_RELAY_TUNE_SCHEMA,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_HISTORY,
+        _async_handle_get_history,
+        schema=GET_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
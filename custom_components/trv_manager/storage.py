@@ -0,0 +1,110 @@
+"""Persistent controller state for TRV Manager."""
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, Any, Final
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+
+if TYPE_CHECKING:
+    from .coordinator import TRVManagerCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION: Final = 1
+# Seconds to collect state changes of all devices into one write
+STORAGE_SAVE_DELAY: Final = 30
+
+
+class TRVManagerStateStore:
+    """Store the PI controller state of all devices in a hub.
+
+    Without it every restart or reload resets the integrator to zero and
+    rooms take a long time to re-converge. Saves are debounced and written
+    for the whole hub at once.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, max_age: float) -> None:
+        """Initialize the store.
+
+        Args:
+            hass: Home Assistant instance
+            entry_id: Config entry of the hub
+            max_age: Seconds after which saved state is discarded (0 = never restore)
+        """
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}"
+        )
+        self._max_age = max_age
+        self._restored: dict[str, dict[str, Any]] = {}
+        self._coordinators: dict[str, TRVManagerCoordinator] = {}
+        self._save_scheduled = False
+
+    async def async_load(self) -> None:
+        """Load saved state, discarding anything too old to be useful."""
+        data = await self._store.async_load() or {}
+        now = dt_util.utcnow().timestamp()
+
+        for device_id, state in data.get("devices", {}).items():
+            age = now - state.get("saved_at", 0)
+            if self._max_age <= 0 or age > self._max_age:
+                _LOGGER.debug(
+                    "Discarding saved controller state of %s (%.0fs old)", device_id, age
+                )
+                continue
+            self._restored[device_id] = state
+
+    def pop_state(self, device_id: str) -> dict[str, Any] | None:
+        """Return the saved state of a device, once."""
+        return self._restored.pop(device_id, None)
+
+    @callback
+    def async_register(self, device_id: str, coordinator: TRVManagerCoordinator) -> None:
+        """Include a device in saves."""
+        self._coordinators[device_id] = coordinator
+
+    @callback
+    def async_unregister(self, device_id: str) -> None:
+        """Stop saving a device."""
+        self._coordinators.pop(device_id, None)
+
+    @callback
+    def async_schedule_save(self) -> None:
+        """Save the state of all devices within STORAGE_SAVE_DELAY.
+
+        Store.async_delay_save restarts its delay on every call, so a hub
+        running passes more often than the delay would never be saved.
+        Only the first call after a save schedules the next one.
+        """
+        if self._save_scheduled:
+            return
+        self._save_scheduled = True
+        self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY)
+
+    async def async_save(self) -> None:
+        """Save the state of all devices now."""
+        await self._store.async_save(self._data_to_save())
+
+    async def async_remove(self) -> None:
+        """Delete the saved state, for a hub that is removed."""
+        await self._store.async_remove()
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the data to store."""
+        # Called when the store writes, the next change schedules a new save
+        self._save_scheduled = False
+        saved_at = dt_util.utcnow().timestamp()
+        return {
+            "devices": {
+                device_id: {
+                    **coordinator.get_persistent_state(saved_at),
+                    "saved_at": saved_at,
+                }
+                for device_id, coordinator in self._coordinators.items()
+            }
+        }
@@ -0,0 +1,119 @@
+"""Shared periodic valve tick for TRV Manager."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+import logging
+from typing import TYPE_CHECKING, Final
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+
+from .const import DOMAIN, VALVE_TICK_INTERVAL
+
+if TYPE_CHECKING:
+    from .coordinator import TRVManagerCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# Kept outside hass.data[DOMAIN], which only holds per-entry data
+DATA_VALVE_TICKER: Final = f"{DOMAIN}_valve_ticker"
+
+# Fractional part of the golden ratio. Successive multiples of it are spread
+# evenly over [0, 1) no matter how many devices are registered, so offsets
+# never need to be recomputed when devices come and go.
+_PHASE_STEP: Final = 0.6180339887498949
+
+
+@dataclass
+class _TickEntry:
+    """Schedule of one device."""
+
+    interval: float
+    next_due: float  # Time of the device's clock
+    clock: Callable[[], float]  # Monotonic time source of the device's hub
+
+
+@callback
+def async_get_valve_ticker(hass: HomeAssistant) -> TRVManagerValveTicker:
+    """Return the integration-wide valve ticker, creating it if needed."""
+    if (ticker := hass.data.get(DATA_VALVE_TICKER)) is None:
+        ticker = hass.data[DATA_VALVE_TICKER] = TRVManagerValveTicker(hass)
+    return ticker
+
+
+@callback
+def async_remove_valve_ticker(hass: HomeAssistant) -> None:
+    """Drop the valve ticker once the last hub has unloaded."""
+    hass.data.pop(DATA_VALVE_TICKER, None)
+
+
+class TRVManagerValveTicker:
+    """One timer driving the periodic valve passes of every device.
+
+    Instead of each coordinator owning its own interval timer, a single
+    timer fires every VALVE_TICK_INTERVAL and starts the passes of all
+    devices that are due. Each device gets its own phase offset within its
+    interval so that radio traffic is spread out rather than bunched up.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the ticker."""
+        self.hass = hass
+        self._entries: dict[TRVManagerCoordinator, _TickEntry] = {}
+        self._registrations = 0
+        self._unsub_timer: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_register(
+        self, coordinator: TRVManagerCoordinator, interval: float
+    ) -> CALLBACK_TYPE:
+        """Register a device for periodic valve passes.
+
+        Returns:
+            Callback that unregisters the device
+        """
+        offset = (self._registrations * _PHASE_STEP) % 1.0 * interval
+        self._registrations += 1
+        clock = coordinator.clock
+        self._entries[coordinator] = _TickEntry(interval, clock() + offset, clock)
+
+        if self._unsub_timer is None:
+            self._unsub_timer = async_track_time_interval(
+                self.hass, self._handle_tick, VALVE_TICK_INTERVAL
+            )
+
+        @callback
+        def unregister() -> None:
+            self._entries.pop(coordinator, None)
+            if not self._entries and self._unsub_timer is not None:
+                self._unsub_timer()
+                self._unsub_timer = None
+
+        return unregister
+
+    @callback
+    def async_set_interval(self, coordinator: TRVManagerCoordinator, interval: float) -> None:
+        """Change the interval of a registered device, keeping its phase."""
+        if (entry := self._entries.get(coordinator)) is not None:
+            entry.next_due += interval - entry.interval
+            entry.interval = interval
+
+    @callback
+    def _handle_tick(self, now: datetime) -> None:
+        """Start the valve passes of all due devices."""
+        due = 0
+        for coordinator, entry in list(self._entries.items()):
+            current = entry.clock()
+            if entry.next_due > current:
+                continue
+            due += 1
+            entry.next_due += entry.interval
+            if entry.next_due <= current:
+                # Fell behind (e.g. event loop stall), don't fire a burst
+                entry.next_due = current + entry.interval
+            coordinator.async_request_valve_update()
+
+        if due:
+            _LOGGER.debug("Valve tick: %d of %d device(s) due", due, len(self._entries))
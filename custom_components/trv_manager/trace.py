@@ -0,0 +1,28 @@
+"""Per-pass structured tracing for TRV Manager."""
+from __future__ import annotations
+
+from typing import Any
+
+
+class PassTrace(dict[str, Any]):
+    """Fields collected during one control pass, logged as a single record.
+
+    The control loop only creates a trace when tracing is enabled for the
+    pass, so a disabled trace costs one None check per decision point.
+    Formatting is deferred to the log handler: the record's message renders
+    the fields as compact key=value pairs and the dict itself is attached
+    to the record (as ``trace``) for structured handlers.
+    """
+
+    __slots__ = ()
+
+    def __str__(self) -> str:
+        """Return the fields as key=value pairs."""
+        return " ".join(f"{key}={_format(value)}" for key, value in self.items())
+
+
+def _format(value: Any) -> str:
+    """Return a compact representation of a trace value."""
+    if isinstance(value, float):
+        return f"{value:.3f}".rstrip("0").rstrip(".")
+    return str(value)
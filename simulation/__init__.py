@@ -0,0 +1,7 @@
+"""Offline simulation and benchmarking tools for TRV Manager.
+
+These run the integration's coordinator against local stand-ins for
+``hass.states`` and ``hass.services`` so that the control loop can be
+exercised without Home Assistant running or real radiators. Run from the
+repository root, e.g. ``python -m simulation.benchmark --help``.
+"""
@@ -0,0 +1,306 @@
+"""Regression benchmark for the TRV Manager control loop.
+
+Drives many coordinators with synthetic event streams and reports event
+throughput, control pass latency, service calls emitted and memory per
+device. Exits non-zero when a --max-*/--min-* threshold is not met, so it
+can gate CI:
+
+    python -m simulation.benchmark --devices 500 --events 50000 \
+        --json bench.json --max-pass-p95-ms 2
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any
+
+from homeassistant.core import Event
+
+from custom_components.trv_manager.const import DEFAULT_FILTER, FILTER_TYPES
+from custom_components.trv_manager.controller import ControllerData
+from custom_components.trv_manager.coordinator import TRVManagerCoordinator
+
+from .harness import FakeClock, FakeHass, SimulatedHub, async_drain
+
+# Synthetic event mix (relative weights)
+EVENT_WEIGHTS = {
+    "trv_burst": 10,  # current_temperature, hvac_action and noise attributes
+    "reference": 3,  # shared reference temperature update
+    "target": 1,  # shared target temperature step
+}
+
+
+class TimedCoordinator(TRVManagerCoordinator):
+    """Coordinator that records the duration of every control pass."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Initialize the coordinator."""
+        super().__init__(*args, **kwargs)
+        self.pass_latencies: list[float] = []
+
+    async def _async_update_data(self) -> ControllerData:
+        """Run and time a full pass."""
+        start = time.perf_counter()
+        try:
+            return await super()._async_update_data()
+        finally:
+            self.pass_latencies.append(time.perf_counter() - start)
+
+    async def _async_update_valve_only(self) -> None:
+        """Run and time a valve-only pass."""
+        start = time.perf_counter()
+        try:
+            await super()._async_update_valve_only()
+        finally:
+            self.pass_latencies.append(time.perf_counter() - start)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Return the pct-th percentile (nearest rank) of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _trv_burst(hass: FakeHass, hub: SimulatedHub, rng: random.Random) -> list[Event]:
+    """Return a Zigbee-style burst of separate attribute updates for one TRV."""
+    trv_entity = hub.trv_entity(rng.randrange(hub.num_devices))
+    state = hass.states.get(trv_entity)
+    assert state is not None
+    events = [
+        hass.states.set_attributes(
+            trv_entity,
+            current_temperature=round(
+                state.attributes["current_temperature"] + rng.uniform(-0.3, 0.3), 1
+            ),
+        )
+    ]
+    if rng.random() < 0.1:
+        action = "idle" if state.attributes["hvac_action"] == "heating" else "heating"
+        events.append(hass.states.set_attributes(trv_entity, hvac_action=action))
+    events.append(hass.states.set_attributes(trv_entity, linkquality=rng.randrange(255)))
+    return events
+
+
+def _shared_update(
+    hass: FakeHass, hub: SimulatedHub, kind: str, rng: random.Random
+) -> list[Event]:
+    """Return an update of a hub's reference or target temperature."""
+    if kind == "reference":
+        value = round(rng.gauss(20.0, 1.0), 1)
+        return [hass.states.set(hub.reference_entity, value)]
+    value = rng.choice((17.0, 19.0, 21.0, 22.0))
+    return [hass.states.set(hub.target_entity, value)]
+
+
+async def async_measure_memory(
+    num_devices: int, reference_filter: str = DEFAULT_FILTER, **kwargs: Any
+) -> float:
+    """Return the memory allocated per coordinator, in bytes."""
+    hass = FakeHass()
+    hub = SimulatedHub(hass, "mem", num_devices, reference_filter, clock=FakeClock())
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    hub.create_coordinators(**kwargs)
+    await hub.async_start()
+    await async_drain([hub], hass)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return allocated / num_devices
+
+
+def bench_pi_controller(
+    coordinator: TRVManagerCoordinator, iterations: int, rng: random.Random
+) -> float:
+    """Return the cost of one PIController.update call, in nanoseconds."""
+    errors = [rng.uniform(-3.0, 3.0) for _ in range(1024)]
+
+    update = coordinator.controller.update
+    start = time.perf_counter_ns()
+    for index in range(iterations):
+        update(errors[index & 1023], 60.0)
+    return (time.perf_counter_ns() - start) / iterations
+
+
+async def async_run(args: argparse.Namespace) -> dict[str, Any]:
+    """Run the benchmark and return the results."""
+    rng = random.Random(args.seed)
+    coordinator_kwargs = {
+        "coalesce_window": args.coalesce_window,
+        "trv_temp_filter": args.filter,
+    }
+
+    memory_per_device = await async_measure_memory(
+        min(args.devices, 100), args.filter, **coordinator_kwargs
+    )
+
+    hass = FakeHass(args.service_latency)
+    # Simulated time, so dwell times and keep-alives elapse during the run
+    clock = FakeClock()
+    per_hub = max(1, args.devices // args.hubs)
+    hubs = [
+        SimulatedHub(hass, f"hub{index}", per_hub, args.filter, clock=clock)
+        for index in range(args.hubs)
+    ]
+    routes: dict[str, SimulatedHub] = {}
+    for hub in hubs:
+        hub.create_coordinators(TimedCoordinator, **coordinator_kwargs)
+        routes[hub.reference_entity] = routes[hub.target_entity] = hub
+        for index in range(hub.num_devices):
+            routes[hub.trv_entity(index)] = hub
+
+    # Feed command echoes back in, like the real TRVs would
+    def route(event: Event) -> None:
+        if (hub := routes.get(event.data["entity_id"])) is not None:
+            hub.dispatch(event)
+
+    hass.services.on_state_change = route
+
+    for hub in hubs:
+        await hub.async_start()
+    await async_drain(hubs, hass)
+    calls_before = hass.services.calls.copy()
+    for hub in hubs:
+        for coordinator in hub.coordinators.values():
+            coordinator.pass_latencies.clear()
+
+    kinds = list(EVENT_WEIGHTS)
+    weights = list(EVENT_WEIGHTS.values())
+    events_sent = 0
+    start = time.perf_counter()
+
+    while events_sent < args.events:
+        for _ in range(args.batch):
+            hub = rng.choice(hubs)
+            kind = rng.choices(kinds, weights)[0]
+            if kind == "trv_burst":
+                events = _trv_burst(hass, hub, rng)
+            else:
+                events = _shared_update(hass, hub, kind, rng)
+            for event in events:
+                hub.dispatch(event)
+            events_sent += len(events)
+
+        # Periodic valve ticks are interleaved with the event stream
+        if rng.random() < args.tick_probability:
+            for hub in hubs:
+                for coordinator in hub.coordinators.values():
+                    coordinator.async_request_valve_update()
+
+        # Let the queued passes and commands run
+        await asyncio.sleep(0)
+        clock.advance(args.batch_seconds)
+
+    await async_drain(hubs, hass)
+    elapsed = time.perf_counter() - start
+
+    coordinators = [c for hub in hubs for c in hub.coordinators.values()]
+    latencies = [latency for c in coordinators for latency in c.pass_latencies]
+    stats: dict[str, int] = {}
+    for coordinator in coordinators:
+        for key, value in coordinator.stats.items():
+            stats[key] = stats.get(key, 0) + value
+
+    outliers_rejected = sum(
+        hub.hub.reference_filter.outliers_rejected for hub in hubs
+    ) + sum(coordinator.trv_filter.outliers_rejected for coordinator in coordinators)
+
+    pi_ns = bench_pi_controller(coordinators[0], args.pi_iterations, rng)
+
+    return {
+        "devices": len(coordinators),
+        "hubs": len(hubs),
+        "events": events_sent,
+        "elapsed_s": round(elapsed, 3),
+        "simulated_s": round(clock.now, 1),
+        "events_per_s": round(events_sent / elapsed, 1),
+        "control_passes": len(latencies),
+        "pass_latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 4),
+            "p95": round(percentile(latencies, 95) * 1000, 4),
+            "p99": round(percentile(latencies, 99) * 1000, 4),
+            "max": round(max(latencies, default=0.0) * 1000, 4),
+        },
+        "service_calls": dict(hass.services.calls - calls_before),
+        "coordinator_stats": stats,
+        "filter": args.filter,
+        "outliers_rejected": outliers_rejected,
+        "memory_per_device_bytes": round(memory_per_device),
+        "pi_controller_ns_per_call": round(pi_ns, 1),
+    }
+
+
+def _check_thresholds(args: argparse.Namespace, results: dict[str, Any]) -> list[str]:
+    """Return a description of every threshold that was not met."""
+    failures = []
+    checks = (
+        (args.max_pass_p95_ms, results["pass_latency_ms"]["p95"], "pass p95 latency (ms)", max),
+        (args.max_pi_ns, results["pi_controller_ns_per_call"], "PI controller (ns/call)", max),
+        (args.max_memory_per_device, results["memory_per_device_bytes"], "memory/device (B)", max),
+        (args.min_events_per_s, results["events_per_s"], "events/s", min),
+    )
+    for limit, value, label, kind in checks:
+        if limit is None:
+            continue
+        if (kind is max and value > limit) or (kind is min and value < limit):
+            failures.append(f"{label}: {value} (limit {limit})")
+    return failures
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--devices", type=int, default=200)
+    parser.add_argument("--hubs", type=int, default=10)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=20, help="events per loop iteration")
+    parser.add_argument(
+        "--batch-seconds",
+        type=float,
+        default=5.0,
+        help="simulated seconds per loop iteration",
+    )
+    parser.add_argument("--tick-probability", type=float, default=0.01)
+    parser.add_argument("--coalesce-window", type=float, default=0.0)
+    parser.add_argument("--service-latency", type=float, default=0.0)
+    parser.add_argument(
+        "--filter",
+        choices=FILTER_TYPES,
+        default=DEFAULT_FILTER,
+        help="filter of the reference and TRV temperatures",
+    )
+    parser.add_argument("--pi-iterations", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--max-pass-p95-ms", type=float)
+    parser.add_argument("--max-pi-ns", type=float)
+    parser.add_argument("--max-memory-per-device", type=float)
+    parser.add_argument("--min-events-per-s", type=float)
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(async_run(args))
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+
+    if failures := _check_thresholds(args, results):
+        for failure in failures:
+            print(f"FAILED {failure}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+"""Headless stand-in for Home Assistant used by the simulation tools."""
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from collections.abc import Callable, Coroutine
+import inspect
+import time
+from typing import Any
+
+from homeassistant.core import Event, State
+
+from custom_components.trv_manager.const import (
+    DEFAULT_FILTER,
+    DEFAULT_I_GAIN,
+    DEFAULT_P_GAIN,
+)
+from custom_components.trv_manager.coordinator import TRVManagerCoordinator
+from custom_components.trv_manager.hub import TRVManagerHub
+
+
+class FakeClock:
+    """Manually advanced monotonic clock.
+
+    Pass as clock=FakeClock() to SimulatedHub to run the control loop's
+    timing (PI time steps, dwell times, keep-alives) faster than real time.
+    """
+
+    def __init__(self, start: float = 0.0) -> None:
+        """Initialize the clock."""
+        self.now = start
+
+    def __call__(self) -> float:
+        """Return the current time in seconds."""
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        """Move the clock forward."""
+        self.now += seconds
+
+
+class FakeStates:
+    """Minimal replacement for hass.states."""
+
+    def __init__(self) -> None:
+        """Initialize the state machine."""
+        self._states: dict[str, State] = {}
+
+    def get(self, entity_id: str) -> State | None:
+        """Return the state of an entity."""
+        return self._states.get(entity_id)
+
+    def set(
+        self, entity_id: str, state: Any, attributes: dict[str, Any] | None = None
+    ) -> Event:
+        """Set the state of an entity and return the resulting change event."""
+        old_state = self._states.get(entity_id)
+        new_state = State(entity_id, str(state), attributes or {})
+        self._states[entity_id] = new_state
+        return Event(
+            "state_changed",
+            {"entity_id": entity_id, "old_state": old_state, "new_state": new_state},
+        )
+
+    def set_attributes(self, entity_id: str, **changes: Any) -> Event:
+        """Update some attributes of an entity and return the change event."""
+        old_state = self._states[entity_id]
+        return self.set(entity_id, old_state.state, {**old_state.attributes, **changes})
+
+
+class FakeServices:
+    """Minimal replacement for hass.services that applies commands to states.
+
+    climate.set_temperature updates the TRV's temperature attribute and
+    number.set_value updates the valve state, like a real device reporting
+    back. The resulting change events are handed to on_state_change so the
+    caller can feed them back into the coordinators (the "echo").
+    """
+
+    def __init__(self, states: FakeStates, latency: float = 0.0) -> None:
+        """Initialize the service registry."""
+        self._states = states
+        self._latency = latency
+        self.calls: Counter[str] = Counter()
+        self.on_state_change: Callable[[Event], None] | None = None
+
+    async def async_call(
+        self,
+        domain: str,
+        service: str,
+        service_data: dict[str, Any] | None = None,
+        blocking: bool = False,
+        **kwargs: Any,
+    ) -> None:
+        """Record a service call and apply it."""
+        self.calls[f"{domain}.{service}"] += 1
+        if self._latency:
+            await asyncio.sleep(self._latency)
+
+        data = service_data or {}
+        entity_id = data["entity_id"]
+        if (domain, service) == ("climate", "set_temperature"):
+            event = self._states.set_attributes(entity_id, temperature=data["temperature"])
+        elif (domain, service) == ("number", "set_value"):
+            event = self._states.set(entity_id, data["value"])
+        else:
+            return
+
+        if self.on_state_change is not None:
+            self.on_state_change(event)
+
+
+class FakeHass:
+    """The parts of HomeAssistant the coordinator uses outside of listeners."""
+
+    def __init__(self, service_latency: float = 0.0) -> None:
+        """Initialize the fake instance (must be called inside a running loop)."""
+        self.loop = asyncio.get_running_loop()
+        self.data: dict[str, Any] = {}
+        self.states = FakeStates()
+        self.services = FakeServices(self.states, service_latency)
+        self._tasks: set[asyncio.Task] = set()
+
+    def async_create_task(
+        self, target: Coroutine[Any, Any, Any], name: str | None = None, **kwargs: Any
+    ) -> asyncio.Task:
+        """Schedule a coroutine."""
+        task = self.loop.create_task(target, name=name)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def async_create_background_task(
+        self, target: Coroutine[Any, Any, Any], name: str, **kwargs: Any
+    ) -> asyncio.Task:
+        """Schedule a background coroutine."""
+        return self.async_create_task(target, name)
+
+    def async_run_hass_job(self, hassjob: Any, *args: Any, **kwargs: Any) -> Any:
+        """Run a HassJob (used by async_call_later)."""
+        result = hassjob.target(*args)
+        if inspect.iscoroutine(result):
+            return self.async_create_task(result)
+        return result
+
+    async def async_block_till_done(self) -> None:
+        """Wait until all scheduled tasks are done."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+
+class SimulatedHub:
+    """A hub of coordinators wired to a FakeHass without HA event listeners."""
+
+    def __init__(
+        self,
+        hass: FakeHass,
+        name: str,
+        num_devices: int,
+        reference_filter: str = DEFAULT_FILTER,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Create the hub and the entities of its devices.
+
+        Coordinators are created separately by create_coordinators so their
+        memory can be measured without the fake states.
+        """
+        self.hass = hass
+        self.name = name
+        self.num_devices = num_devices
+        self.reference_entity = f"sensor.{name}_reference"
+        self.target_entity = f"input_number.{name}_target"
+
+        hass.states.set(self.reference_entity, 19.0)
+        hass.states.set(self.target_entity, 21.0)
+
+        # No rate limiting: the benchmark measures our own overhead
+        self.hub = TRVManagerHub(
+            hass,  # type: ignore[arg-type]
+            self.reference_entity,
+            self.target_entity,
+            0.0,
+            0.0,
+            reference_filter=reference_filter,
+            clock=clock,
+        )
+        # Initial readings, through the reference filter like async_setup
+        self.hub._sample_reference(19.0, hass.states.get(self.reference_entity))
+        self.hub.target_temp = 21.0
+
+        self.coordinators: dict[str, TRVManagerCoordinator] = {}
+        for index in range(num_devices):
+            hass.states.set(
+                self.trv_entity(index),
+                "heat",
+                {
+                    "current_temperature": 22.0,
+                    "temperature": 21.0,
+                    "target_temp_step": 0.5,
+                    "hvac_action": "heating",
+                },
+            )
+            hass.states.set(self.valve_entity(index), 100)
+
+    def trv_entity(self, index: int) -> str:
+        """Return the TRV entity ID of a device."""
+        return f"climate.{self.name}_trv_{index}"
+
+    def valve_entity(self, index: int) -> str:
+        """Return the valve entity ID of a device."""
+        return f"number.{self.name}_valve_{index}"
+
+    def create_coordinators(
+        self,
+        coordinator_factory: type[TRVManagerCoordinator] = TRVManagerCoordinator,
+        p_gain: float = DEFAULT_P_GAIN,
+        i_gain: float = DEFAULT_I_GAIN,
+        **coordinator_kwargs: Any,
+    ) -> None:
+        """Create a coordinator for every device."""
+        for index in range(self.num_devices):
+            trv_entity = self.trv_entity(index)
+            coordinator = coordinator_factory(
+                self.hass,  # type: ignore[arg-type]
+                f"sim_{self.name}",
+                f"{self.name}_{index}",
+                self.hub,
+                trv_entity,
+                self.valve_entity(index),
+                p_gain,
+                i_gain,
+                **coordinator_kwargs,
+            )
+            self.hub.async_register(coordinator)
+            # Initial TRV temperature, through its filter like async_setup
+            coordinator._sample_trv_temp(self.hass.states.get(trv_entity))
+            self.coordinators[trv_entity] = coordinator
+
+    async def async_start(self) -> None:
+        """Run the first control pass of every device."""
+        await asyncio.gather(
+            *(coordinator.async_start() for coordinator in self.coordinators.values())
+        )
+
+    def dispatch(self, event: Event) -> None:
+        """Deliver a state change event the way HA's listeners would."""
+        entity_id = event.data["entity_id"]
+        if entity_id in (self.reference_entity, self.target_entity):
+            self.hub._handle_state_change(event)
+        elif (coordinator := self.coordinators.get(entity_id)) is not None:
+            coordinator._handle_state_change(event)
+
+    @property
+    def busy(self) -> bool:
+        """Return True while passes or commands are outstanding."""
+        return self.hub.scheduler.queue_length > 0 or any(
+            coordinator._pass_task is not None
+            or coordinator._cancel_scheduled_pass is not None
+            for coordinator in self.coordinators.values()
+        )
+
+
+async def async_drain(hubs: list[SimulatedHub], hass: FakeHass) -> None:
+    """Wait until every pass and queued command has completed."""
+    while any(hub.busy for hub in hubs):
+        await asyncio.sleep(0.001)
+    await hass.async_block_till_done()
@@ -0,0 +1,381 @@
+"""Batched offline sweep of PI controller settings.
+
+Simulates a room (see thermal.RoomModel) under the coordinator's control
+logic for every combination of p_gain, i_gain, valve_step and
+anti_windup_gain at once, using NumPy arrays of shape (combinations,).
+Each step replicates _control_valve and PIController.update exactly:
+the idle failsafe, integrator halving on idle -> heating, back-calculation
+anti-windup, rounding to the valve step and the one-step hysteresis.
+--verify replays a few combinations through the integration's own
+PIController and checks that the valve trajectories are identical.
+
+    python -m simulation.sweep --p-gains 2:30:15 --i-gains 0:2:21 \
+        --valve-steps 1,5,10 --top 10
+
+Needs NumPy, which is not a dependency of the integration itself.
+"""
+from __future__ import annotations
+
+import argparse
+from dataclasses import fields
+import json
+import random
+import sys
+from typing import Any
+
+try:
+    import numpy as np
+except ImportError as err:  # pragma: no cover
+    raise SystemExit("The PI sweep needs NumPy: pip install numpy") from err
+
+from .thermal import RoomModel
+
+# Mirrors the coordinator constants, kept here so the sweep runs without
+# Home Assistant installed
+MIN_VALVE_POSITION = 0.0
+MAX_VALVE_POSITION = 100.0
+MIN_TRV_TARGET_TEMP = 5.0
+MAX_TRV_TARGET_TEMP = 25.0
+DEFAULT_MAX_DT = 300.0
+
+# Default target schedule: (seconds from start, target °C)
+DEFAULT_SCHEDULE = ((0, 21.0), (12 * 3600, 18.0), (18 * 3600, 21.0))
+
+
+def parse_values(text: str) -> list[float]:
+    """Parse "1,2,5" or "start:stop:count" into a list of values."""
+    if ":" in text:
+        start, stop, count = text.split(":")
+        return list(np.linspace(float(start), float(stop), int(count)))
+    return [float(value) for value in text.split(",")]
+
+
+def target_at(schedule: tuple[tuple[float, float], ...], time_s: float) -> float:
+    """Return the target temperature in effect at time_s."""
+    target = schedule[0][1]
+    for start, value in schedule:
+        if time_s >= start:
+            target = value
+    return target
+
+
+def simulate_batch(
+    model: RoomModel,
+    p_gain: np.ndarray,
+    i_gain: np.ndarray,
+    valve_step: np.ndarray,
+    anti_windup_gain: np.ndarray,
+    *,
+    start_temp: float = 16.0,
+    duration: float = 24 * 3600.0,
+    pass_interval: float = 60.0,
+    substeps: int = 6,
+    schedule: tuple[tuple[float, float], ...] = DEFAULT_SCHEDULE,
+    max_dt: float = DEFAULT_MAX_DT,
+    record_valves: bool = False,
+) -> dict[str, np.ndarray]:
+    """Simulate all combinations and return their performance metrics.
+
+    The TRV is modelled as an on/off thermostat on its own (biased) sensor,
+    with the compensated setpoint the coordinator would send. Heat only
+    flows while it is heating, at the valve opening the PI controller set.
+    """
+    size = np.broadcast(p_gain, i_gain, valve_step, anti_windup_gain).size
+    p_gain, i_gain, valve_step, anti_windup_gain = (
+        np.broadcast_to(np.asarray(values, dtype=float), (size,))
+        for values in (p_gain, i_gain, valve_step, anti_windup_gain)
+    )
+
+    room = np.full(size, start_temp)
+    radiator = np.zeros(size)
+    heating = np.zeros(size, dtype=bool)  # TRV hvac_action
+    setpoint = np.zeros(size)
+
+    # Coordinator state
+    integrator = np.zeros(size)
+    last_update = np.full(size, np.nan)  # Only advanced while heating
+    last_valve = np.zeros(size, dtype=int)
+    has_last_valve = np.zeros(size, dtype=bool)
+    last_heating = np.zeros(size, dtype=bool)
+    has_last_action = np.zeros(size, dtype=bool)
+
+    # Metrics
+    abs_error = np.zeros(size)
+    overshoot = np.zeros(size)
+    valve_moves = np.zeros(size, dtype=int)
+    valve_travel = np.zeros(size)
+    heating_seconds = np.zeros(size)
+    valves = []
+
+    passes = int(duration // pass_interval)
+    substep = pass_interval / substeps
+    previous_target = None
+
+    for index in range(passes):
+        now = index * pass_interval
+        target = target_at(schedule, now)
+
+        # _async_update_data: reference is the room, setpoint compensated
+        trv_temp = model.trv_temp(room, radiator)
+        adjusted = target + (trv_temp - room)
+        adjusted = np.round(adjusted / model.trv_temp_step) * model.trv_temp_step
+        setpoint = np.clip(adjusted, MIN_TRV_TARGET_TEMP, MAX_TRV_TARGET_TEMP)
+        error = target - room
+
+        # _control_valve
+        transitioning = has_last_action & ~last_heating & heating
+        dt = np.where(np.isnan(last_update), 1.0, now - last_update)
+        dt = np.minimum(dt, max_dt)
+        dt = np.where(dt <= 0, 1.0, dt)
+        last_update = np.where(heating, now, last_update)
+        integrator = np.where(heating & transitioning, integrator * 0.5, integrator)
+
+        # PIController.update
+        dt_minutes = dt / 60.0
+        desired = p_gain * error + i_gain * integrator
+        actual = np.clip(desired, MIN_VALVE_POSITION, MAX_VALVE_POSITION)
+        saturated = desired != actual
+        integrator = np.where(
+            heating,
+            np.where(
+                saturated,
+                integrator - (desired - actual) * anti_windup_gain * dt_minutes,
+                integrator + error * dt_minutes,
+            ),
+            integrator,
+        )
+        stepped = np.round(actual / valve_step) * valve_step
+        stepped = np.clip(stepped, MIN_VALVE_POSITION, MAX_VALVE_POSITION).astype(int)
+        diff = np.abs(stepped - last_valve)
+        stepped = np.where(
+            has_last_valve & (diff > 0) & (diff < valve_step), last_valve, stepped
+        )
+
+        # Idle failsafe opens the valve fully
+        valve = np.where(heating, stepped, 100)
+
+        changed = has_last_valve & (valve != last_valve)
+        valve_moves += changed
+        valve_travel += np.where(has_last_valve, np.abs(valve - last_valve), 0)
+        last_valve = valve
+        has_last_valve[:] = True
+        last_heating = heating
+        has_last_action[:] = True
+        if record_valves:
+            valves.append(valve)
+
+        # Physics between control passes, the TRV switching on its own sensor
+        for _ in range(substeps):
+            trv_temp = model.trv_temp(room, radiator)
+            heating = np.where(
+                trv_temp < setpoint - model.trv_hysteresis,
+                True,
+                np.where(trv_temp > setpoint + model.trv_hysteresis, False, heating),
+            )
+            heating_seconds += heating * substep
+            room, radiator = model.step(room, radiator, heating * valve / 100.0, substep)
+
+        # Overshoot only counts once the room had a chance to settle
+        if target == previous_target:
+            overshoot = np.maximum(overshoot, room - target)
+        previous_target = target
+        abs_error += np.abs(target - room) * pass_interval
+
+    results = {
+        "p_gain": p_gain,
+        "i_gain": i_gain,
+        "valve_step": valve_step,
+        "anti_windup_gain": anti_windup_gain,
+        "iae": abs_error / 3600.0,  # °C·h
+        "overshoot": np.maximum(overshoot, 0.0),
+        "valve_moves": valve_moves,
+        "valve_travel": valve_travel,
+        "heating_hours": heating_seconds / 3600.0,
+    }
+    if record_valves:
+        results["valves"] = np.stack(valves, axis=1)
+    return results
+
+
+def score(
+    results: dict[str, np.ndarray], overshoot_weight: float, move_weight: float
+) -> np.ndarray:
+    """Return the cost of every combination, lower is better."""
+    return (
+        results["iae"]
+        + overshoot_weight * results["overshoot"]
+        + move_weight * results["valve_moves"]
+    )
+
+
+def verify(
+    model: RoomModel, combinations: list[tuple[float, float, int, float]], **kwargs: Any
+) -> list[str]:
+    """Check the vectorized controller against the integration's own code.
+
+    Replays each combination's inputs (error, dt, heating) through
+    PIController and returns a description of every combination whose
+    valve trajectory differs.
+    """
+    # Imported here: the package needs Home Assistant, the sweep itself does not
+    from custom_components.trv_manager.controller import PIController
+
+    mismatches = []
+    for p_gain, i_gain, valve_step, anti_windup_gain in combinations:
+        batch = simulate_batch(
+            model,
+            np.array([p_gain]),
+            np.array([i_gain]),
+            np.array([valve_step]),
+            np.array([anti_windup_gain]),
+            record_valves=True,
+            **kwargs,
+        )
+        expected = _replay_scalar(
+            PIController, model, p_gain, i_gain, valve_step, anti_windup_gain, **kwargs
+        )
+        if list(batch["valves"][0]) != expected:
+            first = next(
+                index
+                for index, (a, b) in enumerate(zip(batch["valves"][0], expected))
+                if a != b
+            )
+            mismatches.append(
+                f"p={p_gain} i={i_gain} step={valve_step} aw={anti_windup_gain}: "
+                f"first difference at pass {first}"
+            )
+    return mismatches
+
+
+def _replay_scalar(
+    controller_cls: Any,
+    model: RoomModel,
+    p_gain: float,
+    i_gain: float,
+    valve_step: int,
+    anti_windup_gain: float,
+    *,
+    start_temp: float = 16.0,
+    duration: float = 24 * 3600.0,
+    pass_interval: float = 60.0,
+    substeps: int = 6,
+    schedule: tuple[tuple[float, float], ...] = DEFAULT_SCHEDULE,
+    max_dt: float = DEFAULT_MAX_DT,
+) -> list[int]:
+    """Run one combination with the integration's PI controller, in plain Python."""
+    controller = controller_cls(p_gain, i_gain, valve_step, anti_windup_gain)
+    room, radiator, heating = start_temp, 0.0, False
+    last_update: float | None = None
+    last_heating: bool | None = None
+    valves = []
+
+    for index in range(int(duration // pass_interval)):
+        now = index * pass_interval
+        target = target_at(schedule, now)
+        trv_temp = model.trv_temp(room, radiator)
+        setpoint = round((target + trv_temp - room) / model.trv_temp_step) * model.trv_temp_step
+        setpoint = max(MIN_TRV_TARGET_TEMP, min(MAX_TRV_TARGET_TEMP, setpoint))
+
+        if not heating:
+            valve = 100
+        else:
+            dt = min(now - last_update, max_dt) if last_update is not None else 1.0
+            last_update = now
+            if last_heating is False:
+                controller.resume_heating()
+            valve = controller.update(target - room, dt)
+        controller.last_valve_position = valve
+        last_heating = heating
+        valves.append(valve)
+
+        substep = pass_interval / substeps
+        for _ in range(substeps):
+            trv_temp = model.trv_temp(room, radiator)
+            if trv_temp < setpoint - model.trv_hysteresis:
+                heating = True
+            elif trv_temp > setpoint + model.trv_hysteresis:
+                heating = False
+            room, radiator = model.step(room, radiator, heating * valve / 100.0, substep)
+
+    return valves
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the sweep from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--p-gains", default="2:30:15")
+    parser.add_argument("--i-gains", default="0:2:21")
+    parser.add_argument("--valve-steps", default="1,5,10")
+    parser.add_argument("--anti-windup-gains", default="0.5,1,2")
+    parser.add_argument("--start-temp", type=float, default=16.0)
+    parser.add_argument("--hours", type=float, default=24.0)
+    parser.add_argument("--pass-interval", type=float, default=60.0)
+    parser.add_argument("--max-dt", type=float, default=DEFAULT_MAX_DT)
+    parser.add_argument("--overshoot-weight", type=float, default=10.0)
+    parser.add_argument("--move-weight", type=float, default=0.01)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--verify", type=int, default=0, help="combinations to check")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="write the ranked results to this file")
+    for model_field in fields(RoomModel):
+        parser.add_argument(
+            f"--{model_field.name.replace('_', '-')}",
+            type=float,
+            default=model_field.default,
+        )
+    args = parser.parse_args(argv)
+
+    model = RoomModel(
+        **{model_field.name: getattr(args, model_field.name) for model_field in fields(RoomModel)}
+    )
+    grid = np.meshgrid(
+        parse_values(args.p_gains),
+        parse_values(args.i_gains),
+        [int(step) for step in parse_values(args.valve_steps)],
+        parse_values(args.anti_windup_gains),
+        indexing="ij",
+    )
+    p_gain, i_gain, valve_step, anti_windup_gain = (axis.ravel() for axis in grid)
+    options = {
+        "start_temp": args.start_temp,
+        "duration": args.hours * 3600.0,
+        "pass_interval": args.pass_interval,
+        "max_dt": args.max_dt,
+    }
+
+    results = simulate_batch(model, p_gain, i_gain, valve_step, anti_windup_gain, **options)
+    cost = score(results, args.overshoot_weight, args.move_weight)
+    order = np.argsort(cost)[: args.top]
+
+    ranked = [
+        {
+            **{key: round(float(values[index]), 4) for key, values in results.items()},
+            "cost": round(float(cost[index]), 4),
+        }
+        for index in order
+    ]
+    print(f"{p_gain.size} combinations simulated, best {len(ranked)}:")
+    print(json.dumps(ranked, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(ranked, file, indent=2)
+
+    if args.verify:
+        rng = random.Random(args.seed)
+        sample = rng.sample(
+            list(zip(p_gain, i_gain, valve_step.astype(int), anti_windup_gain)),
+            min(args.verify, p_gain.size),
+        )
+        combinations = [
+            (float(p), float(i), int(step), float(aw)) for p, i, step, aw in sample
+        ]
+        if mismatches := verify(model, combinations, **options):
+            for mismatch in mismatches:
+                print(f"MISMATCH {mismatch}", file=sys.stderr)
+            return 1
+        print(f"Verified {len(combinations)} combinations against the coordinator")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
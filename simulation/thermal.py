@@ -0,0 +1,61 @@
+"""First-order room and radiator model for offline tuning.
+
+The room is a single thermal mass losing heat to the outside, heated by a
+radiator whose output lags the valve. The TRV's own sensor sits near the
+radiator and reads high while it is warm, which is what the temperature
+compensation in the coordinator corrects for.
+
+All functions work on floats as well as NumPy arrays, so the same model
+drives a single simulation and a batched sweep.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+import math
+from typing import Any
+
+
+@dataclass(frozen=True)
+class RoomModel:
+    """Thermal parameters of a room, its radiator and TRV."""
+
+    outdoor_temp: float = 5.0  # °C
+    room_time_constant: float = 3 * 3600.0  # Seconds, heat capacity / heat loss
+    max_rise: float = 25.0  # °C above outdoor reached with the radiator fully on
+    radiator_lag: float = 600.0  # Seconds for the radiator to follow the valve
+    trv_sensor_bias: float = 3.0  # °C the TRV reads high with the radiator fully on
+    trv_hysteresis: float = 0.2  # °C around the setpoint where the TRV keeps its state
+    trv_temp_step: float = 0.5  # °C setpoint resolution of the TRV
+
+    def step(
+        self, room_temp: Any, radiator: Any, heat_input: Any, dt: float
+    ) -> tuple[Any, Any]:
+        """Advance the model by dt seconds.
+
+        Args:
+            room_temp: Room temperature in °C
+            radiator: Radiator output as a fraction of its maximum (0-1)
+            heat_input: Heat requested from the radiator (0-1), i.e. valve
+                opening while the TRV is heating
+            dt: Seconds to advance
+
+        Returns:
+            The new room temperature and radiator output. Both first-order
+            lags are solved exactly, so dt can be as long as a control pass.
+        """
+        radiator = heat_input + (radiator - heat_input) * math.exp(
+            -dt / self.radiator_lag
+        )
+        equilibrium = self.outdoor_temp + self.max_rise * radiator
+        room_temp = equilibrium + (room_temp - equilibrium) * math.exp(
+            -dt / self.room_time_constant
+        )
+        return room_temp, radiator
+
+    def trv_temp(self, room_temp: Any, radiator: Any) -> Any:
+        """Return the temperature the TRV's own sensor reports."""
+        return room_temp + self.trv_sensor_bias * radiator
+
+    def equilibrium_valve(self, room_temp: float) -> float:
+        """Return the valve opening (%) that holds the room at room_temp."""
+        return 100.0 * (room_temp - self.outdoor_temp) / self.max_rise
@@ -0,0 +1,69 @@
+"""Helpers shared by the TRV Manager tests."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.const import CONF_NAME
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_mock_service,
+)
+
+from custom_components.trv_manager.const import (
+    CONF_DEVICE_ID,
+    CONF_DEVICE_NAME,
+    CONF_DEVICES,
+    CONF_REFERENCE_TEMP_ENTITY,
+    CONF_TARGET_TEMP_ENTITY,
+    CONF_TRV_ENTITY,
+    CONF_VALVE_POSITION_ENTITY,
+    DOMAIN,
+)
+
+
+def device_config(index: int, **settings: Any) -> dict[str, Any]:
+    """Return the configuration of a TRV device with a valve entity."""
+    return {
+        CONF_DEVICE_ID: f"device_{index}",
+        CONF_DEVICE_NAME: f"Radiator {index}",
+        CONF_TRV_ENTITY: f"climate.trv_{index}",
+        CONF_VALVE_POSITION_ENTITY: f"number.valve_{index}",
+        **settings,
+    }
+
+
+async def async_setup_hub(
+    hass: HomeAssistant, devices: list[dict[str, Any]], **hub_settings: Any
+) -> MockConfigEntry:
+    """Set up a hub and the input entities of its devices."""
+    async_mock_service(hass, "climate", "set_temperature")
+    async_mock_service(hass, "number", "set_value")
+    hass.states.async_set("sensor.reference", "19.0")
+    hass.states.async_set("input_number.target", "21.0")
+    for device in devices:
+        hass.states.async_set(
+            device[CONF_TRV_ENTITY],
+            "heat",
+            {"current_temperature": 22.0, "temperature": 21.0, "hvac_action": "heating"},
+        )
+        if valve_entity := device.get(CONF_VALVE_POSITION_ENTITY):
+            hass.states.async_set(valve_entity, "100")
+
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=2,
+        data={
+            CONF_NAME: "Home",
+            CONF_REFERENCE_TEMP_ENTITY: "sensor.reference",
+            CONF_TARGET_TEMP_ENTITY: "input_number.target",
+            CONF_DEVICES: devices,
+            **hub_settings,
+        },
+    )
+    entry.add_to_hass(hass)
+    assert await async_setup_component(hass, "http", {})
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    return entry
@@ -0,0 +1,47 @@
+"""Smoke test of the control loop through the simulation benchmark.
+
+Run from the repository root with Home Assistant installed:
+
+    python -m pytest tests
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from custom_components.trv_manager.const import FILTER_TYPES
+from simulation.benchmark import main
+
+
+@pytest.mark.parametrize("filter_kind", FILTER_TYPES)
+def test_benchmark_runs(tmp_path: Path, filter_kind: str) -> None:
+    """Run a short benchmark and check that every device was controlled."""
+    output = tmp_path / "bench.json"
+
+    exit_code = main(
+        [
+            "--devices", "10",
+            "--hubs", "2",
+            "--events", "500",
+            "--pi-iterations", "1000",
+            "--tick-probability", "0.2",
+            "--filter", filter_kind,
+            "--json", str(output),
+        ]
+    )
+
+    assert exit_code == 0
+    results = json.loads(output.read_text(encoding="utf-8"))
+    assert results["devices"] == 10
+    assert results["filter"] == filter_kind
+    assert results["events"] >= 500
+    assert results["control_passes"] > 0
+    assert results["service_calls"].get("climate.set_temperature", 0) > 0
+    assert results["service_calls"].get("number.set_value", 0) > 0
+    stats = results["coordinator_stats"]
+    assert stats["control_passes"] >= results["control_passes"]
+    assert stats["setpoint_writes"] > 0
+    assert stats["valve_commands_sent"] > 0
+    assert results["pass_latency_ms"]["max"] > 0
@@ -0,0 +1,85 @@
+"""Tests for the TRV Manager actuation budget."""
+from __future__ import annotations
+
+import pytest
+
+from custom_components.trv_manager.budget import ActuationBudget
+from custom_components.trv_manager.const import (
+    BUDGET_BUCKET_SECONDS,
+    COMMAND_BATTERY_COST,
+    MAX_STEP_FACTOR,
+    TRAVEL_BATTERY_COST,
+)
+
+from simulation.harness import FakeClock
+
+HOUR = BUDGET_BUCKET_SECONDS
+
+
+def test_rolling_window() -> None:
+    """Test travel and commands drop out of the window after 24 hours."""
+    clock = FakeClock()
+    budget = ActuationBudget(0, clock)
+
+    budget.record_command(10.0)
+    clock.advance(HOUR)
+    budget.record_command(5.0)
+    budget.record_command()
+
+    assert budget.travel(1) == 5.0
+    assert budget.commands(1) == 2
+    assert budget.travel() == 15.0
+    assert budget.commands() == 3
+    assert budget.battery_cost() == pytest.approx(
+        3 * COMMAND_BATTERY_COST + 15.0 * TRAVEL_BATTERY_COST
+    )
+
+    clock.advance(23 * HOUR)
+    assert budget.travel() == 5.0
+    assert budget.commands() == 2
+
+    # Idle for longer than the window
+    clock.advance(100 * HOUR)
+    assert budget.travel() == 0.0
+    assert budget.commands() == 0
+    assert budget.total_travel == 15.0
+    assert budget.total_commands == 3
+
+
+def test_step_factor() -> None:
+    """Test the step widens once half the budget is used, up to the maximum."""
+    assert ActuationBudget(0, FakeClock()).step_factor() == 1.0
+
+    budget = ActuationBudget(100.0, FakeClock())
+    budget.record_command(50.0)
+    assert budget.step_factor() == 1.0
+    budget.record_command(25.0)
+    assert budget.step_factor() == pytest.approx(1.0 + (MAX_STEP_FACTOR - 1.0) / 2)
+    budget.record_command(100.0)
+    assert budget.step_factor() == MAX_STEP_FACTOR
+
+
+def test_state_round_trip() -> None:
+    """Test saved buckets are restored shifted by their age."""
+    clock = FakeClock()
+    budget = ActuationBudget(0, clock)
+    budget.record_command(10.0)
+    clock.advance(HOUR)
+    budget.record_command(5.0)
+    state = budget.get_state()
+
+    assert len(state["travel"]) == 24
+    assert state["travel"][-2:] == [10.0, 5.0]
+    assert state["commands"][-2:] == [1, 1]
+
+    restored = ActuationBudget(0, FakeClock(1000 * HOUR))
+    restored.restore_state(state, 2 * HOUR)
+    assert restored.travel(2) == 0.0
+    assert restored.travel(3) == 5.0
+    assert restored.travel() == 15.0
+    assert restored.commands() == 2
+
+    # Too old to matter
+    restored = ActuationBudget(0, FakeClock())
+    restored.restore_state(state, 24 * HOUR)
+    assert restored.travel() == 0.0
@@ -0,0 +1,82 @@
+"""Tests for the TRV Manager command cache."""
+from __future__ import annotations
+
+from custom_components.trv_manager.commands import CommandCache, quantize
+
+ENTITY = "climate.trv"
+
+
+def test_quantize() -> None:
+    """Test values are rounded to the device resolution without float noise."""
+    assert quantize(21.26, 0.5) == 21.5
+    assert quantize(21.24, 0.5) == 21.0
+    assert quantize(0.1 + 0.2, 0.1) == 0.3
+    assert quantize(21.26, 0) == 21.26
+
+
+def test_unknown_entity_is_sent() -> None:
+    """Test a value is sent when nothing is known about the entity."""
+    assert CommandCache().should_send(ENTITY, 21.0, 0.0)
+
+
+def test_confirmed_value_is_suppressed() -> None:
+    """Test the value the device already reports is not sent again."""
+    cache = CommandCache()
+    cache.confirm(ENTITY, 21.0, 0.0)
+
+    assert not cache.should_send(ENTITY, 21.0, 10.0)
+    assert cache.should_send(ENTITY, 21.5, 10.0)
+
+
+def test_min_delta() -> None:
+    """Test changes smaller than min_delta are suppressed."""
+    cache = CommandCache()
+    cache.confirm(ENTITY, 21.0, 0.0)
+
+    assert not cache.should_send(ENTITY, 21.5, 10.0, min_delta=1.0)
+    assert cache.should_send(ENTITY, 22.0, 10.0, min_delta=1.0)
+
+
+def test_keepalive() -> None:
+    """Test an unchanged value is resent once the refresh interval passed."""
+    cache = CommandCache()
+    cache.confirm(ENTITY, 21.0, 0.0)
+    cache.record_sent(ENTITY, 21.0, 100.0)
+
+    assert not cache.should_send(ENTITY, 21.0, 1099.0, refresh_interval=1000)
+    assert cache.should_send(ENTITY, 21.0, 1100.0, refresh_interval=1000)
+    # Measured from the confirmation when nothing was sent
+    cache.forget(ENTITY)
+    cache.confirm(ENTITY, 21.0, 100.0)
+    assert cache.should_send(ENTITY, 21.0, 1100.0, refresh_interval=1000)
+
+
+def test_retry_waits_for_confirmation() -> None:
+    """Test a sent value is not repeated until the retry interval passed."""
+    cache = CommandCache()
+    cache.confirm(ENTITY, 20.0, 0.0)
+    cache.record_sent(ENTITY, 21.0, 10.0)
+
+    assert not cache.should_send(ENTITY, 21.0, 20.0, retry_interval=30)
+    assert cache.should_send(ENTITY, 21.0, 40.0, retry_interval=30)
+    # A different value is sent straight away
+    assert cache.should_send(ENTITY, 21.5, 20.0, retry_interval=30)
+
+    # Sent but never confirmed
+    cache.forget(ENTITY)
+    cache.record_sent(ENTITY, 21.0, 10.0)
+    assert not cache.should_send(ENTITY, 21.0, 20.0, retry_interval=30)
+    assert cache.should_send(ENTITY, 21.0, 20.0)
+
+
+def test_confirm_keeps_time_of_first_report() -> None:
+    """Test repeated reports of the same value don't restart the keep-alive."""
+    cache = CommandCache()
+    cache.confirm(ENTITY, 21.0, 0.0)
+    cache.confirm(ENTITY, 21.0, 500.0)
+    cache.confirm(ENTITY, None, 600.0)
+
+    record = cache.get(ENTITY)
+    assert record is not None
+    assert record.confirmed_value == 21.0
+    assert record.confirmed_at == 0.0
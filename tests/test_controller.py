@@ -0,0 +1,90 @@
+"""Tests for the TRV Manager PI controller."""
+from __future__ import annotations
+
+import math
+
+from custom_components.trv_manager.controller import ControllerData, PIController
+
+
+def test_integrates_when_not_saturated() -> None:
+    """Test the error is integrated per minute inside the valve range."""
+    controller = PIController(p_gain=10.0, i_gain=1.0, valve_step=5)
+
+    assert controller.update(1.0, 120.0) == 10
+    assert controller.integrator == 2.0
+    assert controller.windup_excess == 0.0
+
+    # The integral term uses the integrator from before this update
+    assert controller.update(1.0, 60.0, bias=3.0) == 15
+    assert controller.i_term == 2.0
+    assert controller.raw_output == 15.0
+    assert controller.integrator == 3.0
+
+
+def test_anti_windup() -> None:
+    """Test the integrator is wound back by the excess while saturated."""
+    controller = PIController(p_gain=10.0, i_gain=1.0, valve_step=5)
+
+    assert controller.update(20.0, 60.0) == 100
+    assert controller.raw_output == 100.0
+    assert controller.windup_excess == 100.0
+    assert controller.integrator == -100.0
+
+    # Saturated low, the bias counts towards the excess
+    controller = PIController(p_gain=10.0, i_gain=1.0, valve_step=5)
+    assert controller.update(-1.0, 30.0, bias=-10.0) == 0
+    assert controller.windup_excess == -20.0
+    assert controller.integrator == 10.0
+
+
+def test_zero_dt() -> None:
+    """Test a zero or negative time step counts as one second."""
+    controller = PIController(p_gain=0.0, i_gain=1.0, valve_step=1)
+    controller.update(6.0, 0.0)
+
+    assert controller.integrator == 0.1
+
+
+def test_step_hysteresis() -> None:
+    """Test outputs less than a step from the last position are held back."""
+    controller = PIController(p_gain=1.0, i_gain=0.0, valve_step=5)
+    controller.restore((0.0, 52))
+
+    assert controller.update(54.0, 60.0) == 52
+    assert controller.held == 55
+    assert controller.update(58.0, 60.0) == 60
+    assert controller.held is None
+
+
+def test_skip() -> None:
+    """Test a skipped pass clears the terms but keeps the state."""
+    controller = PIController(p_gain=10.0, i_gain=1.0, valve_step=5)
+    controller.update(1.0, 60.0)
+    controller.skip()
+
+    assert math.isnan(controller.p_term)
+    assert math.isnan(controller.i_term)
+    assert math.isnan(controller.raw_output)
+    assert controller.integrator == 1.0
+
+
+def test_snapshot_restore() -> None:
+    """Test the state round-trips through snapshot and restore."""
+    controller = PIController(p_gain=10.0, i_gain=1.0, valve_step=5)
+    controller.update(1.5, 60.0)
+    controller.last_valve_position = 15
+    snapshot = controller.snapshot()
+
+    restored = PIController(p_gain=10.0, i_gain=1.0, valve_step=5)
+    restored.restore(snapshot)
+    assert restored.snapshot() == (1.5, 15)
+    assert restored.update(1.0, 60.0) == controller.update(1.0, 60.0)
+
+    restored.resume_heating()
+    assert restored.integrator == 1.25
+
+
+def test_slots() -> None:
+    """Test the controller and its data have no per-instance dict."""
+    assert not hasattr(PIController(1.0, 1.0, 1), "__dict__")
+    assert not hasattr(ControllerData(), "__dict__")
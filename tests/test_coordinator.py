@@ -0,0 +1,108 @@
+"""Tests for the TRV Manager control loop in Home Assistant."""
+from __future__ import annotations
+
+from datetime import timedelta
+
+from freezegun.api import FrozenDateTimeFactory
+import pytest
+from homeassistant.const import STATE_OFF
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.trv_manager.const import (
+    CONF_FEEDFORWARD_GAIN,
+    CONF_OUTDOOR_TEMP_ENTITY,
+    CONF_PREHEAT_COMFORT_TEMP,
+    CONF_PREHEAT_SCHEDULE_ENTITY,
+    CONF_VALVE_POSITION_ENTITY,
+    DOMAIN,
+    HEATUP_SAMPLE_PERIOD,
+)
+
+from tests.common import async_setup_hub, device_config
+
+
+async def _async_advance(
+    hass: HomeAssistant, freezer: FrozenDateTimeFactory, delta: timedelta
+) -> None:
+    """Move time forward and run what became due."""
+    freezer.tick(delta)
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+
+
+async def test_preheat_starts_at_window_start(
+    hass: HomeAssistant,
+    enable_custom_integrations: None,
+    freezer: FrozenDateTimeFactory,
+) -> None:
+    """Test the ramp starts when the window opens, with the bias following it."""
+    comfort_at = dt_util.utcnow() + timedelta(hours=2)
+    hass.states.async_set("sensor.outdoor", "1.0")
+    hass.states.async_set(
+        "schedule.comfort", STATE_OFF, {"next_event": comfort_at.isoformat()}
+    )
+    entry = await async_setup_hub(
+        hass,
+        # Without a valve entity no periodic pass runs
+        [
+            device_config(
+                0, **{CONF_VALVE_POSITION_ENTITY: None, CONF_FEEDFORWARD_GAIN: 1.0}
+            )
+        ],
+        **{
+            CONF_OUTDOOR_TEMP_ENTITY: "sensor.outdoor",
+            CONF_PREHEAT_SCHEDULE_ENTITY: "schedule.comfort",
+            CONF_PREHEAT_COMFORT_TEMP: 22.0,
+        },
+    )
+    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinators"]["device_0"][
+        "coordinator"
+    ]
+    # One degree at the assumed 1 °C/h: the window opens an hour ahead
+    assert coordinator.data.preheat_start == (comfort_at - timedelta(hours=1)).isoformat()
+    assert coordinator.data.target_temp == 21.0
+    assert coordinator.data.feedforward_bias == 20.0
+    passes = coordinator.stats["control_passes"]
+
+    # Nothing but the window opening triggers a pass
+    await _async_advance(hass, freezer, timedelta(minutes=90))
+    await _async_advance(hass, freezer, timedelta(seconds=1))
+
+    assert coordinator.stats["control_passes"] > passes
+    assert 21.49 < coordinator.data.target_temp < 21.51
+    assert 20.49 < coordinator.data.feedforward_bias < 20.51
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_heatup_rate_learned_without_valve(
+    hass: HomeAssistant,
+    enable_custom_integrations: None,
+    freezer: FrozenDateTimeFactory,
+) -> None:
+    """Test a device without a valve entity learns its heat-up rate."""
+    entry = await async_setup_hub(
+        hass, [device_config(0, **{CONF_VALVE_POSITION_ENTITY: None})]
+    )
+    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinators"]["device_0"][
+        "coordinator"
+    ]
+    def heatup_rates() -> list[float]:
+        return coordinator.get_persistent_state(0.0)["heatup_rates"]
+
+    assert heatup_rates() == []
+
+    # Half a degree warmer after a full sample period of heating
+    clock = coordinator._clock()
+    coordinator._clock = lambda: clock + HEATUP_SAMPLE_PERIOD
+    hass.states.async_set("sensor.reference", "19.5")
+    await hass.async_block_till_done()
+    await _async_advance(hass, freezer, timedelta(seconds=1))
+
+    assert heatup_rates() == [pytest.approx(2.0)]
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
@@ -0,0 +1,131 @@
+"""Tests for the TRV Manager input filters."""
+from __future__ import annotations
+
+import pytest
+
+from custom_components.trv_manager.const import (
+    FILTER_EMA,
+    FILTER_EMA_ALPHA,
+    FILTER_KALMAN,
+    FILTER_MEDIAN,
+    FILTER_NONE,
+    FILTER_OUTLIER_CONFIRM,
+    FILTER_OUTLIER_LIMIT,
+)
+from custom_components.trv_manager.filters import SensorFilter
+
+SPIKE = 20.0 + FILTER_OUTLIER_LIMIT + 1.0
+
+
+def test_no_filter_uses_every_reading() -> None:
+    """Test readings pass straight through, jumps included."""
+    sensor = SensorFilter(FILTER_NONE)
+    sensor.sample(20.0, 0.0)
+    sensor.sample(SPIKE, 10.0)
+
+    assert sensor.value(10.0, 10.0) == SPIKE
+    assert sensor.outliers_rejected == 0
+
+
+def test_unknown_kind_falls_back_to_none() -> None:
+    """Test an unknown filter kind is treated as no filter."""
+    assert SensorFilter("unknown").kind == FILTER_NONE
+
+
+def test_ema() -> None:
+    """Test the moving average."""
+    sensor = SensorFilter(FILTER_EMA)
+    sensor.sample(20.0, 0.0)
+    sensor.sample(21.0, 60.0)
+
+    assert sensor.value(60.0, 60.0) == pytest.approx(20.0 + FILTER_EMA_ALPHA)
+    assert sensor.raw == 21.0
+
+
+def test_median() -> None:
+    """Test the median of the window."""
+    sensor = SensorFilter(FILTER_MEDIAN)
+    for timestamp, reading in enumerate((20.0, 21.5, 20.5, 21.0)):
+        sensor.sample(reading, timestamp)
+
+    assert sensor.filtered == 20.75
+    sensor.sample(20.2, 5.0)
+    assert sensor.filtered == 20.5
+
+
+def test_kalman_trusts_readings_after_a_gap() -> None:
+    """Test a reading moves the estimate further the longer it was awaited."""
+    quick = SensorFilter(FILTER_KALMAN)
+    quick.sample(20.0, 0.0)
+    quick.sample(21.0, 10.0)
+    slow = SensorFilter(FILTER_KALMAN)
+    slow.sample(20.0, 0.0)
+    slow.sample(21.0, 3600.0)
+
+    assert 20.0 < quick.filtered < slow.filtered < 21.0
+
+
+@pytest.mark.parametrize("kind", (FILTER_EMA, FILTER_MEDIAN, FILTER_KALMAN))
+def test_spike_is_rejected(kind: str) -> None:
+    """Test a single spike is dropped once a normal reading follows."""
+    sensor = SensorFilter(kind)
+    sensor.sample(20.0, 0.0)
+    sensor.sample(SPIKE, 10.0)
+
+    assert sensor.value(10.0, 10.0) == 20.0
+    assert sensor.raw == SPIKE
+    assert sensor.outliers_rejected == 1
+
+    sensor.sample(20.0, 20.0)
+    # The next jump is timed from its own start
+    sensor.sample(SPIKE, FILTER_OUTLIER_CONFIRM)
+    assert sensor.value(FILTER_OUTLIER_CONFIRM, FILTER_OUTLIER_CONFIRM) == 20.0
+    assert sensor.outliers_rejected == 2
+
+
+@pytest.mark.parametrize("kind", (FILTER_EMA, FILTER_MEDIAN, FILTER_KALMAN))
+def test_lasting_jump_is_accepted(kind: str) -> None:
+    """Test a jump is accepted once it lasted the confirmation time."""
+    sensor = SensorFilter(kind)
+    sensor.sample(20.0, 0.0)
+    sensor.sample(SPIKE, 10.0)
+    sensor.sample(SPIKE + 0.1, FILTER_OUTLIER_CONFIRM + 10.0)
+
+    assert sensor.filtered == SPIKE + 0.1
+
+    # Without a new reading, the jump is accepted when the value is read
+    sensor = SensorFilter(kind)
+    sensor.sample(20.0, 0.0)
+    sensor.sample(SPIKE, 10.0)
+    assert sensor.value(FILTER_OUTLIER_CONFIRM, 10.0) == 20.0
+    assert sensor.value(FILTER_OUTLIER_CONFIRM + 10.0, 10.0) == SPIKE
+
+
+def test_staleness() -> None:
+    """Test the input reads as missing once its last report is too old."""
+    sensor = SensorFilter(FILTER_EMA, max_age=600)
+    sensor.sample(20.0, 0.0)
+
+    assert sensor.value(600.0, 0.0) == 20.0
+    assert not sensor.stale
+    assert sensor.value(601.0, 0.0) is None
+    assert sensor.stale
+    assert sensor.filtered == 20.0
+    assert sensor.value(601.0, 600.0) == 20.0
+
+    # No maximum age
+    sensor = SensorFilter(FILTER_EMA)
+    sensor.sample(20.0, 0.0)
+    assert sensor.value(1e9, 0.0) == 20.0
+
+
+def test_unavailable_restarts() -> None:
+    """Test the estimate restarts from the first reading after an outage."""
+    sensor = SensorFilter(FILTER_EMA)
+    sensor.sample(20.0, 0.0)
+    sensor.sample(None, 10.0)
+
+    assert sensor.value(10.0, 10.0) is None
+    sensor.sample(SPIKE, 20.0)
+    assert sensor.value(20.0, 20.0) == SPIKE
+    assert sensor.outliers_rejected == 0
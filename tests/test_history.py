@@ -0,0 +1,62 @@
+"""Tests for the TRV Manager control pass history."""
+from __future__ import annotations
+
+import math
+from typing import Any
+
+from custom_components.trv_manager.history import PassHistory
+
+
+def _append(history: PassHistory, timestamp: float, **changes: Any) -> None:
+    """Record a pass with default terms."""
+    values = {
+        "error": 0.5,
+        "p_term": 10.0,
+        "i_term": 2.0,
+        "raw_output": 12.0,
+        "output": 10,
+        "hvac_action": "heating",
+        "sent": True,
+        **changes,
+    }
+    history.append(timestamp, **values)
+
+
+def test_empty() -> None:
+    """Test an empty history."""
+    history = PassHistory(3)
+
+    assert len(history) == 0
+    assert history.as_list() == []
+
+
+def test_wraparound() -> None:
+    """Test the oldest passes are overwritten once the buffer is full."""
+    history = PassHistory(3)
+    for second in range(5):
+        _append(history, 1700000000 + second, output=second)
+
+    assert len(history) == 3
+    assert [entry["output"] for entry in history.as_list()] == [2, 3, 4]
+    assert [entry["output"] for entry in history.as_list(2)] == [3, 4]
+    assert [entry["output"] for entry in history.as_list(10)] == [2, 3, 4]
+    assert history.as_list()[0]["time"] == "2023-11-14T22:13:22+00:00"
+
+
+def test_entry_values() -> None:
+    """Test how the fields of a pass are stored and returned."""
+    history = PassHistory(3)
+    _append(history, 0.0, error=0.1234, p_term=math.nan, hvac_action="fan", sent=False)
+
+    assert history.as_list() == [
+        {
+            "time": "1970-01-01T00:00:00+00:00",
+            "error": 0.123,
+            "p_term": None,
+            "i_term": 2.0,
+            "raw_output": 12.0,
+            "output": 10,
+            "hvac_action": None,
+            "command_sent": False,
+        }
+    ]
@@ -0,0 +1,84 @@
+"""Tests for setting up and reconfiguring a TRV Manager hub."""
+from __future__ import annotations
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.trv_manager.const import (
+    CONF_DEVICES,
+    CONF_TRV_ENTITY,
+    DOMAIN,
+    ENTITY_ID_ERROR,
+    ENTITY_ID_P_GAIN,
+)
+
+from tests.common import async_setup_hub, device_config
+
+
+async def _async_update_devices(
+    hass: HomeAssistant, entry: MockConfigEntry, devices: list[dict]
+) -> None:
+    """Store a new device list the way the options flow does."""
+    hass.config_entries.async_update_entry(
+        entry, data={**entry.data, CONF_DEVICES: devices}
+    )
+    await hass.async_block_till_done()
+
+
+async def test_remove_device(hass: HomeAssistant, enable_custom_integrations: None) -> None:
+    """Test removing a device leaves the other devices running."""
+    entry = await async_setup_hub(hass, [device_config(0), device_config(1)])
+    entity_registry = er.async_get(hass)
+    device_registry = dr.async_get(hass)
+
+    # The diagnostic sensors are disabled by default and never added
+    error_sensor = entity_registry.async_get_entity_id(
+        "sensor", DOMAIN, f"{entry.entry_id}_device_1{ENTITY_ID_ERROR}"
+    )
+    assert entity_registry.async_get(error_sensor).disabled
+    assert hass.states.get(error_sensor) is None
+    p_gain = entity_registry.async_get_entity_id(
+        "number", DOMAIN, f"{entry.entry_id}_device_1{ENTITY_ID_P_GAIN}"
+    )
+    assert hass.states.get(p_gain) is not None
+
+    await _async_update_devices(hass, entry, [device_config(0)])
+
+    assert entry.state is ConfigEntryState.LOADED
+    coordinators = hass.data[DOMAIN][entry.entry_id]["coordinators"]
+    assert list(coordinators) == ["device_0"]
+    assert hass.states.get(p_gain) is None
+    assert device_registry.async_get_device(
+        identifiers={(DOMAIN, f"{entry.entry_id}_device_1")}
+    ) is None
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_rebind_device(hass: HomeAssistant, enable_custom_integrations: None) -> None:
+    """Test binding a device to another TRV recreates only that device."""
+    entry = await async_setup_hub(hass, [device_config(0), device_config(1)])
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    kept = entry_data["coordinators"]["device_0"]["coordinator"]
+    hass.states.async_set(
+        "climate.trv_2",
+        "heat",
+        {"current_temperature": 20.0, "temperature": 21.0, "hvac_action": "heating"},
+    )
+
+    await _async_update_devices(
+        hass,
+        entry,
+        [device_config(0), device_config(1, **{CONF_TRV_ENTITY: "climate.trv_2"})],
+    )
+
+    assert entry.state is ConfigEntryState.LOADED
+    coordinators = entry_data["coordinators"]
+    assert coordinators["device_0"]["coordinator"] is kept
+    assert coordinators["device_1"]["coordinator"].trv_entity == "climate.trv_2"
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
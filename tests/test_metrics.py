@@ -0,0 +1,66 @@
+"""Tests for the TRV Manager metrics."""
+from __future__ import annotations
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from custom_components.trv_manager.metrics import Histogram, render_metrics
+
+from tests.common import async_setup_hub, device_config
+
+
+def test_histogram_buckets() -> None:
+    """Test values are counted in the first bucket whose bound they don't exceed."""
+    histogram = Histogram((1.0, 0.1, 0.5))
+    for value in (0.05, 0.1, 0.3, 2.0):
+        histogram.observe(value)
+
+    assert histogram.count == 4
+    assert histogram.sum == pytest.approx(2.45)
+    assert histogram.buckets() == [
+        (0.1, 2),
+        (0.5, 3),
+        (1.0, 3),
+        (float("inf"), 4),
+    ]
+    assert histogram.as_dict() == {
+        "count": 4,
+        "sum": 2.45,
+        "buckets": {"0.1": 2, "0.5": 3, "1.0": 3, "+Inf": 4},
+    }
+
+
+async def test_render_metrics(
+    hass: HomeAssistant, enable_custom_integrations: None
+) -> None:
+    """Test the exposition of a loaded hub and its devices."""
+    assert render_metrics(hass) == "\n"
+
+    entry = await async_setup_hub(hass, [device_config(0)])
+    text = render_metrics(hass)
+    lines = text.splitlines()
+
+    # Every family is announced once, before its samples
+    assert lines.count("# TYPE trv_manager_control_passes_total counter") == 1
+    assert lines.count("# TYPE trv_manager_outliers_rejected_total counter") == 1
+    assert 'trv_manager_command_queue_length{hub="Home"} ' in text
+    assert (
+        'trv_manager_outliers_rejected_total{hub="Home",input="reference"} 0' in lines
+    )
+    assert (
+        'trv_manager_outliers_rejected_total{hub="Home",device="device_0",input="trv"} 0'
+        in lines
+    )
+    assert any(
+        line.startswith('trv_manager_control_passes_total{hub="Home",device="device_0"} ')
+        and int(line.rsplit(" ", 1)[1]) > 0
+        for line in lines
+    )
+    assert (
+        'trv_manager_pass_duration_seconds_bucket{hub="Home",device="device_0",le="+Inf"}'
+        in text
+    )
+    assert 'trv_manager_pass_duration_seconds_count{hub="Home",device="device_0"}' in text
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    assert render_metrics(hass) == "\n"